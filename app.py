@@ -1,9 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, make_response, abort, Response, stream_with_context, send_file
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import json
 import os
+import base64
+import hashlib
+import mimetypes
+import calendar
 from datetime import datetime, timedelta
 import pytz
 from werkzeug.utils import secure_filename
@@ -14,13 +18,33 @@ import bcrypt  # Add bcrypt for password hashing
 import secrets  # Add secrets for secure token generation
 from flask_login import LoginManager, UserMixin, login_user, login_required, current_user, logout_user
 from functools import wraps
-from sqlalchemy import func
+from sqlalchemy import func, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as SASession
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_mail import Message, Mail
 from dotenv import load_dotenv
 from config import MUSIC_AI_API_KEY
-from drive_config import get_google_drive_service, upload_file, create_folder, delete_file
+from drive_config import (
+    get_google_drive_service, upload_file_to_folder, delete_file, file_exists,
+    batch_delete_files, download_to, get_file_metadata, is_not_found, get_drive_metrics, DRIVE_BATCH_SIZE
+)
+from occupancy import (
+    OccupancyIndex, ALL_RESOURCES, SLOT_MINUTES, MAX_DURATION_MINUTES, room_key, instrument_key,
+    minute_of_day, format_minute, is_valid_duration
+)
+from booking_events import (
+    KEEPALIVE_SECONDS, POLL_SECONDS, RECONNECT_MILLISECONDS, format_event,
+    refresh_active_flags
+)
+from term_calendar import TermCalendarCache
+from concurrent.futures import ThreadPoolExecutor
+from file_cache import FileCache, LocalFileStorage, FILE_CACHE_MAX_BYTES
+import material_search
+import threading
+import time
 import traceback
-from googleapiclient.http import MediaFileUpload
 import requests
 from musicai_sdk import MusicAiClient
 import tempfile
@@ -48,6 +72,13 @@ db = SQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
+# Precomputed term dates, rebuilt when the terms change log version moves
+term_calendars = TermCalendarCache()
+# Sends accepted material uploads to Google Drive off the request thread
+upload_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('UPLOAD_WORKERS', 2)),
+    thread_name_prefix='drive-upload'
+)
 
 # Create the Flask app
 app = Flask(__name__)
@@ -65,8 +96,8 @@ db_config = {
     'ssl_verify_cert': os.getenv('DB_SSL_VERIFY', 'true').lower() == 'true'
 }
 
-# Construct the URI
-app.config['SQLALCHEMY_DATABASE_URI'] = (
+# Construct the URI; DATABASE_URL overrides it, e.g. with a scratch SQLite database for the tests
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or (
     f"mysql+pymysql://{db_config['user']}:{db_config['password']}"
     f"@{db_config['host']}/{db_config['database']}"
     f"{'?ssl_ca=' + db_config['ssl_ca'] if db_config['ssl_ca'] else ''}"
@@ -135,6 +166,7 @@ class User(db.Model, UserMixin):
     # Relationships with cascade deletion
     materials = db.relationship('Material', backref='owner', lazy=True, cascade="all, delete-orphan")
     sessions = db.relationship('Session', backref='user', lazy=True, cascade="all, delete-orphan")
+    recurrence_rules = db.relationship('RecurrenceRule', backref='user', lazy=True, cascade="all, delete-orphan")
     allocated_materials = db.relationship('MaterialAllocation', backref='student', lazy=True, cascade="all, delete-orphan")
     instrument = db.relationship('Instrument', backref='users')
     
@@ -171,6 +203,9 @@ class Material(db.Model):
     instrument_id = db.Column(db.Integer, db.ForeignKey('instruments.id'))
     date_added = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Europe/London')))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of uploaded files, hex
+    file_name = db.Column(db.String(255))  # Uploaded files' original name and type
+    mime_type = db.Column(db.String(100))
     
     # Relationships
     allocations = db.relationship('MaterialAllocation', backref='material', lazy=True)
@@ -192,6 +227,10 @@ class Material(db.Model):
 
 class Attendance(db.Model):
     __tablename__ = 'attendances'
+    __table_args__ = (
+        # One record per student per session; upsert_attendance() relies on it
+        db.Index('ix_attendances_session_student', 'session_id', 'student_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('sessions.id'), nullable=False)
@@ -222,11 +261,18 @@ class Attendance(db.Model):
 
 class Session(db.Model):
     __tablename__ = 'sessions'
+    __table_args__ = (
+        db.Index('ix_sessions_date_room', 'date', 'room_id'),
+        db.Index('ix_sessions_date_instrument', 'date', 'instrument_id'),
+        db.Index('ix_sessions_group_date', 'group_id', 'date'),
+        db.Index('ix_sessions_user_date', 'user_id', 'date'),
+        db.Index('ix_sessions_rule_occurrence', 'recurrence_rule_id', 'occurrence_date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.String(20), nullable=False)
-    time = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    time = db.Column(db.Time, nullable=False)
     duration = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=True)
@@ -236,6 +282,9 @@ class Session(db.Model):
     recurrence_type = db.Column(db.String(20))
     recurrence_end_date = db.Column(db.String(20))
     parent_session_id = db.Column(db.Integer, db.ForeignKey('sessions.id'), nullable=True)
+    # Set when this row is a materialized occurrence of a RecurrenceRule
+    recurrence_rule_id = db.Column(db.Integer, db.ForeignKey('recurrence_rules.id'), nullable=True)
+    occurrence_date = db.Column(db.Date, nullable=True)  # Date the rule scheduled it on, even if moved
     
     # Add relationship to Room
     room = db.relationship('Room', backref='sessions')
@@ -248,8 +297,8 @@ class Session(db.Model):
         return {
             'id': self.id,
             'title': self.title,
-            'date': self.date,
-            'time': self.time,
+            'date': self.date.strftime('%Y-%m-%d') if self.date else None,
+            'time': self.time.strftime('%H:%M') if self.time else None,
             'duration': self.duration,
             'user_id': self.user_id,
             'group_id': self.group_id,
@@ -261,11 +310,121 @@ class Session(db.Model):
             'recurrence_type': self.recurrence_type,
             'recurrence_end_date': self.recurrence_end_date,
             'parent_session_id': self.parent_session_id,
+            'recurrence_rule_id': self.recurrence_rule_id,
             'notes': getattr(self, 'notes', None)
         }
 
+class RecurrenceRule(db.Model):
+    """
+    A recurring series stored once as a pattern. Occurrences are expanded on
+    demand for the requested window; a Session row is only written for an
+    occurrence once it gets attendance or an override.
+    """
+    __tablename__ = 'recurrence_rules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    time = db.Column(db.Time, nullable=False)
+    duration = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=True)
+    instrument_id = db.Column(db.Integer, db.ForeignKey('instruments.id'), nullable=True)
+    recurrence_type = db.Column(db.String(20), nullable=False)  # 'weekly', 'biweekly', 'monthly'
+    excluded_dates = db.Column(db.JSON, default=list)  # 'YYYY-MM-DD' strings of cancelled occurrences
+    skip_term_breaks = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Europe/London')))
+    
+    # Relationships
+    room = db.relationship('Room')
+    instrument = db.relationship('Instrument')
+    # No delete-orphan: end_series() detaches attended occurrences to keep them
+    sessions = db.relationship('Session', backref='recurrence_rule', lazy=True, cascade="all")
+    
+    def occurrence_dates(self, window_start, window_end, breaks=()):
+        """Dates of this series between window_start and window_end, minus excluded dates"""
+        if self.start_date > window_end or self.end_date < window_start:
+            return []
+        dates = [self.start_date] + expand_recurrence(
+            self.start_date, min(self.end_date, window_end), self.recurrence_type, breaks
+        )
+        excluded = set(self.excluded_dates or [])
+        return [
+            occurrence_date for occurrence_date in dates
+            if window_start <= occurrence_date <= window_end
+            and occurrence_date.strftime('%Y-%m-%d') not in excluded
+        ]
+    
+    def occurrence_row(self, occurrence_date):
+        """An unmaterialized occurrence as a row in SESSION_FEED_FIELDS order"""
+        return (
+            occurrence_id(self.id, occurrence_date),
+            self.title,
+            occurrence_date.strftime('%Y-%m-%d'),
+            self.time.strftime('%H:%M'),
+            self.duration,
+            self.user_id,
+            self.group_id,
+            self.room_id,
+            self.room.name if self.room else None,
+            self.instrument_id,
+            self.instrument.name if self.instrument else None,
+            True,
+            self.recurrence_type,
+            self.end_date.strftime('%Y-%m-%d'),
+            None,
+            self.id
+        )
+    
+    def occurrence_session(self, occurrence_date):
+        """An unsaved Session standing in for an unmaterialized occurrence"""
+        return Session(
+            id=occurrence_id(self.id, occurrence_date),
+            title=self.title,
+            date=occurrence_date,
+            time=self.time,
+            duration=self.duration,
+            user_id=self.user_id,
+            group_id=self.group_id,
+            room_id=self.room_id,
+            instrument_id=self.instrument_id,
+            is_recurring=True,
+            recurrence_type=self.recurrence_type,
+            recurrence_end_date=self.end_date.strftime('%Y-%m-%d'),
+            recurrence_rule_id=self.id,
+            occurrence_date=occurrence_date
+        )
+    
+    def occurrence_dict(self, occurrence_date):
+        occurrence = dict(zip(SESSION_FEED_FIELDS, self.occurrence_row(occurrence_date)))
+        occurrence['notes'] = None
+        return occurrence
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+            'time': self.time.strftime('%H:%M'),
+            'duration': self.duration,
+            'user_id': self.user_id,
+            'group_id': self.group_id,
+            'room_id': self.room_id,
+            'instrument_id': self.instrument_id,
+            'recurrence_type': self.recurrence_type,
+            'excluded_dates': self.excluded_dates or [],
+            'skip_term_breaks': self.skip_term_breaks
+        }
+
 class MaterialAllocation(db.Model):
     __tablename__ = 'material_allocations'
+    __table_args__ = (
+        # One allocation per pair; also covers the student's direct half of visible_material_ids()
+        db.Index('ix_material_allocations_student_material', 'student_id', 'material_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), nullable=False)
@@ -293,6 +452,7 @@ class Group(db.Model):
     members = db.relationship('GroupMember', backref='group', lazy=True, cascade="all, delete-orphan")
     material_allocations = db.relationship('GroupMaterialAllocation', backref='group', lazy=True, cascade="all, delete-orphan")
     sessions = db.relationship('Session', backref='group', lazy=True, cascade="all, delete-orphan")
+    recurrence_rules = db.relationship('RecurrenceRule', backref='group', lazy=True, cascade="all, delete-orphan")
     
     def to_dict(self):
         return {
@@ -301,12 +461,15 @@ class Group(db.Model):
             'description': self.description,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'created_by': self.created_by,
-            'member_count': len(self.members),
-            'material_count': len(self.material_allocations)
+            'member_count': self.member_count,
+            'material_count': self.material_count
         }
 
 class GroupMember(db.Model):
     __tablename__ = 'group_members'
+    __table_args__ = (
+        db.Index('ix_group_members_student_group', 'student_id', 'group_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False)
@@ -323,6 +486,10 @@ class GroupMember(db.Model):
 
 class GroupMaterialAllocation(db.Model):
     __tablename__ = 'group_material_allocations'
+    __table_args__ = (
+        # One allocation per pair; also covers the group half of visible_material_ids()
+        db.Index('ix_group_material_allocations_group_material', 'group_id', 'material_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=False)
@@ -337,6 +504,21 @@ class GroupMaterialAllocation(db.Model):
             'date_allocated': self.date_allocated.isoformat() if self.date_allocated else None
         }
 
+# Counted in SQL as correlated subqueries of every group SELECT, so listing
+# groups never loads their member or allocation collections
+Group.member_count = db.column_property(
+    db.select(func.count(GroupMember.id))
+    .where(GroupMember.group_id == Group.id)
+    .correlate_except(GroupMember)
+    .scalar_subquery()
+)
+Group.material_count = db.column_property(
+    db.select(func.count(GroupMaterialAllocation.id))
+    .where(GroupMaterialAllocation.group_id == Group.id)
+    .correlate_except(GroupMaterialAllocation)
+    .scalar_subquery()
+)
+
 class JamNight(db.Model):
     __tablename__ = 'jam_nights'
     
@@ -531,6 +713,314 @@ class MusicAiJob(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class MaterialUpload(db.Model):
+    """
+    A material file accepted by /api/materials/upload and sent to Drive in the
+    background. The Material row is created once Drive returns the file ID.
+    """
+    __tablename__ = 'material_uploads'
+    
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'uploading', 'complete', 'failed'
+    progress = db.Column(db.Float, nullable=False, default=0)
+    file_name = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100))
+    file_size = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64))
+    deduplicated = db.Column(db.Boolean, nullable=False, default=False)  # Reused an existing Drive file
+    title = db.Column(db.String(100), nullable=False)
+    type = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(50))
+    instrument = db.Column(db.String(50), nullable=False)
+    instrument_id = db.Column(db.Integer, db.ForeignKey('instruments.id'))
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id', ondelete='SET NULL'))
+    error_message = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Europe/London')))
+    # UTC; refreshed by the worker on every chunk, so a stale value means the worker is gone
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc).replace(tzinfo=None))
+    completed_at = db.Column(db.DateTime)
+    
+    material = db.relationship('Material')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'deduplicated': self.deduplicated,
+            'title': self.title,
+            'instrument': self.instrument,
+            'material': self.material.to_dict() if self.material else None,
+            'error_message': self.error_message,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class DriveDeletion(db.Model):
+    """
+    A Drive file still to be deleted after its materials were removed; retried
+    until it succeeds or DRIVE_DELETE_MAX_ATTEMPTS is reached.
+    """
+    __tablename__ = 'drive_deletions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.String(100), nullable=False, unique=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    failed_at = db.Column(db.DateTime)  # Set once retries are exhausted; the row is kept for inspection
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(pytz.utc).replace(tzinfo=None))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc).replace(tzinfo=None))
+
+class ChangeLog(db.Model):
+    """
+    One row per insert, update or delete of a synced table. The auto-increment
+    id doubles as a change version: clients remember the highest id they have
+    seen and ask for everything after it.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('ix_change_log_table_id', 'table_name', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.BigInteger, nullable=False)  # Virtual occurrence IDs exceed 32 bits
+    action = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.utc))
+
+# Models whose changes are written to the change log, keyed by table name
+CHANGE_TRACKED_MODELS = {
+    model.__tablename__: model
+    for model in (Session, RecurrenceRule, Group, GroupMember, Material,
+                  MaterialAllocation, GroupMaterialAllocation, Term, Room, Instrument)
+}
+
+# Change log tables each list endpoint depends on (membership decides what students see).
+# Terms decide which occurrences a series expands to; room and instrument names are serialized.
+SESSION_SYNC_TABLES = ('sessions', 'recurrence_rules', 'group_members', 'terms', 'rooms', 'instruments')
+MATERIAL_SYNC_TABLES = ('materials', 'material_allocations', 'group_material_allocations', 'group_members', 'instruments')
+GROUP_SYNC_TABLES = ('groups',)
+# Tables whose changes alter an unknown number of listed rows; clients reload instead of taking a delta
+RELOAD_SYNC_TABLES = {'terms', 'rooms', 'instruments'}
+
+# Change log rows are kept this long; clients that have not synced since are told to reload
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 30))
+# Seconds between prunes started by one process
+CHANGE_LOG_PRUNE_INTERVAL = 3600
+change_log_pruned_at = None
+
+def record_change(table_name, row_id, action='upsert'):
+    """Log a change the ORM cannot see, e.g. a bulk query delete. The caller commits."""
+    db.session.add(ChangeLog(table_name=table_name, row_id=row_id, action=action))
+
+def insert_ignore(model):
+    """INSERT that skips rows clashing with a unique key (INSERT IGNORE / INSERT OR IGNORE)"""
+    return db.insert(model).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+
+@event.listens_for(SASession, 'after_flush')
+def log_tracked_changes(flush_session, flush_context):
+    """Write a change log row for every tracked object the flush inserted, updated or deleted"""
+    changes = []
+    for obj in flush_session.new:
+        if obj.__tablename__ in CHANGE_TRACKED_MODELS:
+            changes.append((obj.__tablename__, obj.id, 'upsert'))
+            if isinstance(obj, Session) and obj.recurrence_rule_id and obj.occurrence_date:
+                # The occurrence's virtual row is replaced by this one
+                changes.append(('sessions', occurrence_id(obj.recurrence_rule_id, obj.occurrence_date), 'delete'))
+    for obj in flush_session.dirty:
+        if obj.__tablename__ in CHANGE_TRACKED_MODELS and flush_session.is_modified(obj):
+            modified = {attr.key for attr in db.inspect(obj).attrs if attr.history.has_changes()}
+            # Cancelling one occurrence is logged by exclude_occurrence as a session delete
+            if isinstance(obj, RecurrenceRule) and modified == {'excluded_dates'}:
+                continue
+            changes.append((obj.__tablename__, obj.id, 'upsert'))
+    for obj in flush_session.deleted:
+        if obj.__tablename__ in CHANGE_TRACKED_MODELS:
+            changes.append((obj.__tablename__, obj.id, 'delete'))
+    
+    # Member and material counts are part of a group's row
+    touched = flush_session.new | flush_session.dirty | flush_session.deleted
+    changes.extend(
+        ('groups', group_id, 'upsert')
+        for group_id in {
+            obj.group_id for obj in touched
+            if isinstance(obj, (GroupMember, GroupMaterialAllocation)) and obj.group_id
+        }
+    )
+    
+    if changes:
+        now = datetime.now(pytz.utc)
+        flush_session.connection().execute(ChangeLog.__table__.insert(), [
+            {'table_name': table_name, 'row_id': row_id, 'action': action, 'changed_at': now}
+            for table_name, row_id, action in changes
+        ])
+    
+    # Changes logged with record_change() arrive as ChangeLog rows
+    changed_tables = {table_name for table_name, _, _ in changes} | {
+        obj.table_name for obj in flush_session.new if isinstance(obj, ChangeLog)
+    }
+    if changed_tables & set(MATERIAL_SYNC_TABLES):
+        flush_session.info['materials_changed'] = True
+
+@event.listens_for(SASession, 'after_commit')
+def clear_committed_material_caches(committed_session):
+    if committed_session.info.pop('materials_changed', False):
+        allocated_materials_cache.clear()
+
+@event.listens_for(SASession, 'after_rollback')
+def forget_rolled_back_material_changes(rolled_back_session):
+    rolled_back_session.info.pop('materials_changed', None)
+
+# Set once the search index exists; until then material writes leave it alone
+material_search_ready = False
+
+def material_search_rows(conn, materials):
+    """Search index rows for materials, with instrument names looked up in one query"""
+    instrument_ids = {material.instrument_id for material in materials if material.instrument_id}
+    instruments = dict(conn.execute(
+        db.select(Instrument.id, Instrument.name).where(Instrument.id.in_(instrument_ids))
+    ).all()) if instrument_ids else {}
+    return [{
+        'id': material.id,
+        'title': material.title,
+        'description': material.description,
+        'category': material.category,
+        'instrument': instruments.get(material.instrument_id)
+    } for material in materials]
+
+@event.listens_for(SASession, 'after_flush')
+def sync_material_search(flush_session, flush_context):
+    """Keep the material search index in the same transaction as the materials it covers"""
+    if not material_search_ready:
+        return
+    changed = [
+        obj for obj in flush_session.new | flush_session.dirty
+        if isinstance(obj, Material) and flush_session.is_modified(obj)
+    ]
+    deleted = [obj.id for obj in flush_session.deleted if isinstance(obj, Material)]
+    # Materials store their instrument's name in the index, so a rename reindexes them
+    renamed_instruments = [
+        obj.id for obj in flush_session.dirty
+        if isinstance(obj, Instrument) and db.inspect(obj).attrs.name.history.has_changes()
+    ]
+    if not changed and not deleted and not renamed_instruments:
+        return
+    
+    conn = flush_session.connection()
+    if renamed_instruments:
+        changed_ids = {material.id for material in changed}
+        changed.extend(
+            material for material in conn.execute(db.select(
+                Material.id, Material.title, Material.description,
+                Material.category, Material.instrument_id
+            ).where(Material.instrument_id.in_(renamed_instruments))).all()
+            if material.id not in changed_ids
+        )
+    material_search.remove(conn, deleted)
+    material_search.index(conn, material_search_rows(conn, changed))
+
+def ensure_material_search_index():
+    """Create the search index, filling it from existing materials the first time"""
+    global material_search_ready
+    try:
+        with db.engine.begin() as conn:
+            if material_search.create_index(conn):
+                materials = conn.execute(db.select(
+                    Material.id, Material.title, Material.description,
+                    Material.category, Material.instrument_id
+                )).all()
+                material_search.index(conn, material_search_rows(conn, materials))
+                print(f"Indexed {len(materials)} materials for search")
+        material_search_ready = True
+    except Exception as e:
+        print(f"Material search index unavailable: {str(e)}")
+
+def get_change_version(*table_names):
+    """(version, last modified) of the newest change to any of the tables"""
+    # Prune markers count as a change to every table, so versions never go backwards
+    version, changed_at = db.session.query(
+        func.max(ChangeLog.id),
+        func.max(ChangeLog.changed_at)
+    ).filter(ChangeLog.table_name.in_(table_names + (ChangeLog.__tablename__,))).one()
+    if changed_at is not None and changed_at.tzinfo is None:
+        changed_at = pytz.utc.localize(changed_at)
+    return version or 0, changed_at
+
+def get_latest_change_id(*table_names):
+    """Newest change version of the tables alone; one read of ix_change_log_table_id, cheap enough to poll"""
+    return db.session.query(func.max(ChangeLog.id)).filter(
+        ChangeLog.table_name.in_(table_names + (ChangeLog.__tablename__,))
+    ).scalar() or 0
+
+def pruned_change_version():
+    """Highest change version removed by pruning; a delta from before it would be incomplete"""
+    return db.session.query(ChangeLog.row_id).filter(
+        ChangeLog.table_name == ChangeLog.__tablename__
+    ).order_by(ChangeLog.id.desc()).limit(1).scalar() or 0
+
+def prune_change_log():
+    """
+    Delete change log rows older than CHANGE_LOG_RETENTION_DAYS. The cut is
+    recorded as a marker row (table_name 'change_log', row_id = highest
+    removed version). Returns the number of rows removed.
+    """
+    cutoff = datetime.now(pytz.utc).replace(tzinfo=None) - timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+    watermark = db.session.query(func.max(ChangeLog.id)).filter(
+        ChangeLog.changed_at < cutoff,
+        ChangeLog.table_name != ChangeLog.__tablename__
+    ).scalar()
+    if not watermark:
+        return 0
+    removed = ChangeLog.query.filter(ChangeLog.id <= watermark).delete(synchronize_session=False)
+    db.session.add(ChangeLog(table_name=ChangeLog.__tablename__, row_id=watermark, action='prune'))
+    db.session.commit()
+    return removed
+
+def prune_change_log_if_due():
+    """Prune the change log at most once per CHANGE_LOG_PRUNE_INTERVAL in this process"""
+    global change_log_pruned_at
+    if change_log_pruned_at is not None and time.monotonic() - change_log_pruned_at < CHANGE_LOG_PRUNE_INTERVAL:
+        return
+    change_log_pruned_at = time.monotonic()
+    try:
+        removed = prune_change_log()
+        if removed:
+            print(f"Pruned {removed} change log rows")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error pruning change log: {str(e)}")
+
+def versioned_response(table_names, build_response):
+    """
+    Serve a list endpoint with ETag and Last-Modified taken from the change log.
+    build_response is only called when the client's copy is stale; an unchanged
+    reload gets a 304 without touching the listed tables.
+    """
+    version, changed_at = get_change_version(*table_names)
+    # The same URL can list different rows per user, so the user is part of the tag
+    user_id = current_user.id if current_user.is_authenticated else 0
+    etag = f"{version}-{user_id}-{hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()[:12]}"
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(build_response())
+        if response.status_code != 200:
+            return response
+    
+    response.set_etag(etag)
+    if changed_at:
+        response.last_modified = changed_at
+    # Let the browser keep the body but revalidate on every request
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['X-Change-Version'] = str(version)
+    return response
+
 def get_price(service_type):
     """Get the current price for a service type"""
     price = Price.query.filter_by(service_type=service_type).first()
@@ -621,6 +1111,23 @@ def generate_verification_token():
     """Generate a secure token for email verification"""
     return secrets.token_urlsafe(32)
 
+def parse_session_date(value):
+    """Convert a YYYY-MM-DD string to a date for the sessions.date column"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def parse_session_time(value):
+    """Convert an HH:MM (or HH:MM:SS) string to a time for the sessions.time column"""
+    if isinstance(value, str):
+        time_format = '%H:%M:%S' if value.count(':') == 2 else '%H:%M'
+        return datetime.strptime(value, time_format).time()
+    if isinstance(value, datetime):
+        return value.time()
+    return value
+
 # Database setup
 def migrate_passwords_to_bcrypt():
     """Migrate existing plain text passwords to bcrypt hashed passwords"""
@@ -796,7 +1303,10 @@ def delete_material(material_id, user_id=None):
     
     if material:
         # First delete any allocations associated with this material
-        MaterialAllocation.query.filter_by(material_id=material_id).delete()
+        allocations = MaterialAllocation.query.filter_by(material_id=material_id)
+        for (allocation_id,) in allocations.with_entities(MaterialAllocation.id).all():
+            record_change('material_allocations', allocation_id, 'delete')
+        allocations.delete()
         
         # Then delete the material
         db.session.delete(material)
@@ -805,12 +1315,23 @@ def delete_material(material_id, user_id=None):
     
     return False
 
+def session_list_query():
+    """
+    Session query for lists that are serialized with Session.to_dict().
+    Rooms and instruments are joined in up front, so the number of SQL
+    statements stays the same however many sessions are returned.
+    """
+    return Session.query.options(
+        db.joinedload(Session.room),
+        db.joinedload(Session.instrument)
+    )
+
 def load_sessions():
     """Load sessions from SQLite database"""
     if 'user' in session:
         # If user is admin, load all sessions
         if session['user']['role'] == 'admin':
-            sessions = Session.query.all()
+            sessions = session_list_query().all()
         else:
             # If user is student, load their individual sessions and group sessions
             user_id = session['user']['id']
@@ -820,7 +1341,7 @@ def load_sessions():
             group_ids = [member.group_id for member in user_groups]
             
             # Query for sessions where user_id matches or group_id is in user's groups
-            sessions = Session.query.filter(
+            sessions = session_list_query().filter(
                 db.or_(
                     Session.user_id == user_id,
                     Session.group_id.in_(group_ids)
@@ -828,10 +1349,233 @@ def load_sessions():
             ).all()
     else:
         # Load all sessions if no user is logged in (for admin)
-        sessions = Session.query.all()
+        sessions = session_list_query().all()
     
     return [session.to_dict() for session in sessions]
 
+def expand_recurrence(start_date, end_date, recurrence_type, breaks=()):
+    """
+    Compute the occurrence dates of a recurring series after start_date up to end_date.
+    recurrence_type is 'weekly', 'biweekly' or 'monthly' (anything else is treated as weekly).
+    Dates falling inside any (break_start, break_end) range in breaks are skipped.
+    """
+    occurrences = []
+    step = 1
+    while True:
+        if recurrence_type == 'monthly':
+            # Keep the original day of month, clamped to shorter months
+            month_index = start_date.month - 1 + step
+            year = start_date.year + month_index // 12
+            month = month_index % 12 + 1
+            day = min(start_date.day, calendar.monthrange(year, month)[1])
+            current_date = start_date.replace(year=year, month=month, day=day)
+        elif recurrence_type == 'biweekly':
+            current_date = start_date + timedelta(days=14 * step)
+        else:
+            current_date = start_date + timedelta(days=7 * step)
+        
+        if current_date > end_date:
+            break
+        
+        if not any(break_start <= current_date <= break_end for break_start, break_end in breaks):
+            occurrences.append(current_date)
+        step += 1
+    
+    return occurrences
+
+def load_terms():
+    """Plain snapshots of every term for building the term calendar cache"""
+    return [
+        {
+            'id': term.id,
+            'name': term.name,
+            'start_date': term.start_date,
+            'end_date': term.end_date,
+            'has_break': term.has_break,
+            'break_start_date': term.break_start_date,
+            'break_end_date': term.break_end_date,
+            'display_order': term.display_order,
+            'dict': term.to_dict()
+        }
+        for term in Term.query.all()
+    ]
+
+def get_term_schedule():
+    """The cached TermSchedule (teaching dates, week numbers and breaks of every term)"""
+    return term_calendars.get(get_latest_change_id('terms'), load_terms)
+
+def get_term_breaks(start_date, end_date):
+    """Break ranges of all terms overlapping start_date..end_date"""
+    return get_term_schedule().breaks_between(start_date, end_date)
+
+# Unmaterialized occurrences get negative IDs that encode (rule ID, date)
+OCCURRENCE_ID_BASE = 100000
+OCCURRENCE_EPOCH = datetime(2000, 1, 1).date()
+
+def occurrence_id(rule_id, occurrence_date):
+    """Virtual session ID for the occurrence of a rule on a date"""
+    return -(rule_id * OCCURRENCE_ID_BASE + (occurrence_date - OCCURRENCE_EPOCH).days)
+
+def parse_occurrence_id(session_id):
+    """Split a virtual session ID back into (rule ID, date)"""
+    value = -session_id
+    return value // OCCURRENCE_ID_BASE, OCCURRENCE_EPOCH + timedelta(days=value % OCCURRENCE_ID_BASE)
+
+def expand_occurrences(window_start, window_end, rule_filter=None):
+    """
+    Expand recurrence rules into (rule, date) occurrences between window_start and
+    window_end, sorted by (date, time, virtual id). Occurrences that already have a
+    materialized Session row are left out, since that row is returned instead.
+    rule_filter is an optional SQL condition on RecurrenceRule.
+    """
+    query = RecurrenceRule.query.options(
+        db.joinedload(RecurrenceRule.room),
+        db.joinedload(RecurrenceRule.instrument)
+    ).filter(
+        RecurrenceRule.start_date <= window_end,
+        RecurrenceRule.end_date >= window_start
+    )
+    if rule_filter is not None:
+        query = query.filter(rule_filter)
+    rules = query.all()
+    if not rules:
+        return []
+
+    breaks = []
+    if any(rule.skip_term_breaks for rule in rules):
+        breaks = get_term_breaks(window_start, window_end)
+
+    materialized = set(db.session.query(
+        Session.recurrence_rule_id,
+        Session.occurrence_date
+    ).filter(
+        Session.recurrence_rule_id.in_([rule.id for rule in rules]),
+        Session.occurrence_date >= window_start,
+        Session.occurrence_date <= window_end
+    ).all())
+
+    occurrences = []
+    for rule in rules:
+        rule_breaks = breaks if rule.skip_term_breaks else ()
+        for occurrence_date in rule.occurrence_dates(window_start, window_end, rule_breaks):
+            if (rule.id, occurrence_date) not in materialized:
+                occurrences.append((rule, occurrence_date))
+
+    occurrences.sort(key=lambda item: (item[1], item[0].time, occurrence_id(item[0].id, item[1])))
+    return occurrences
+
+def all_occurrence_dicts(rule_filter=None):
+    """Every unmaterialized occurrence of the matching rules, as session dicts"""
+    window = db.session.query(
+        db.func.min(RecurrenceRule.start_date),
+        db.func.max(RecurrenceRule.end_date)
+    )
+    if rule_filter is not None:
+        window = window.filter(rule_filter)
+    window_start, window_end = window.one()
+    if not window_start:
+        return []
+    return [
+        rule.occurrence_dict(occurrence_date)
+        for rule, occurrence_date in expand_occurrences(window_start, window_end, rule_filter)
+    ]
+
+def get_occurrence(session_id):
+    """Return (rule, date) for a virtual session ID, or None if it is not a live occurrence"""
+    rule_id, occurrence_date = parse_occurrence_id(session_id)
+    rule = db.session.get(RecurrenceRule, rule_id)
+    if not rule:
+        return None
+    breaks = get_term_breaks(occurrence_date, occurrence_date) if rule.skip_term_breaks else ()
+    if occurrence_date not in rule.occurrence_dates(occurrence_date, occurrence_date, breaks):
+        return None
+    return rule, occurrence_date
+
+def exclude_occurrence(rule, occurrence_date):
+    """Cancel one occurrence of a rule so it is no longer expanded. The caller commits."""
+    # Reassign rather than append so the JSON column is marked as changed
+    rule.excluded_dates = (rule.excluded_dates or []) + [occurrence_date.strftime('%Y-%m-%d')]
+    record_change('sessions', occurrence_id(rule.id, occurrence_date), 'delete')
+
+def end_series(rule):
+    """
+    Delete a series from today on. Occurrences before today stay as its
+    history, and later ones with attendance are kept as one-off sessions so
+    the attendance is not lost. The caller commits.
+    """
+    today = datetime.now(pytz.timezone('Europe/London')).date()
+    upcoming = [session for session in rule.sessions if session.occurrence_date >= today]
+    attended = {
+        session_id for (session_id,) in db.session.query(Attendance.session_id).filter(
+            Attendance.session_id.in_([session.id for session in upcoming])
+        ).distinct()
+    } if upcoming else set()
+    
+    for session in upcoming:
+        if session.id in attended:
+            session.recurrence_rule = None
+            session.occurrence_date = None
+            session.is_recurring = False
+        else:
+            db.session.delete(session)
+    
+    if rule.start_date < today:
+        rule.end_date = min(rule.end_date, today - timedelta(days=1))
+    else:
+        db.session.delete(rule)
+
+def materialized_session(session_id):
+    """The stored Session row for a real or virtual session ID, or None if there is none"""
+    if session_id >= 0:
+        return db.session.get(Session, session_id)
+    rule_id, occurrence_date = parse_occurrence_id(session_id)
+    return Session.query.filter_by(
+        recurrence_rule_id=rule_id,
+        occurrence_date=occurrence_date
+    ).first()
+
+def materialize_session(session_id):
+    """
+    Return the Session row for a session ID, writing one first if the ID is an
+    unmaterialized occurrence. The caller commits.
+    """
+    existing = materialized_session(session_id)
+    if existing or session_id >= 0:
+        return existing
+
+    occurrence = get_occurrence(session_id)
+    if not occurrence:
+        return None
+    rule, occurrence_date = occurrence
+
+    materialized = Session(
+        title=rule.title,
+        date=occurrence_date,
+        time=rule.time,
+        duration=rule.duration,
+        user_id=rule.user_id,
+        group_id=rule.group_id,
+        room_id=rule.room_id,
+        instrument_id=rule.instrument_id,
+        is_recurring=True,
+        recurrence_type=rule.recurrence_type,
+        recurrence_end_date=rule.end_date.strftime('%Y-%m-%d'),
+        recurrence_rule_id=rule.id,
+        occurrence_date=occurrence_date
+    )
+    try:
+        # A savepoint, so losing a race undoes only this insert
+        with db.session.begin_nested():
+            db.session.add(materialized)
+    except IntegrityError:
+        # Another request materialized the occurrence first; use its row. A
+        # locking read, since this transaction's snapshot may predate the row.
+        return Session.query.filter_by(
+            recurrence_rule_id=rule.id,
+            occurrence_date=occurrence_date
+        ).with_for_update().one()
+    return materialized
+
 def save_session(session_data, user_id=None):
     """Save a session to the SQLite database"""
     # Use the user_id from the session data if it's provided, otherwise use the logged-in user's ID
@@ -905,89 +1649,32 @@ def save_session(session_data, user_id=None):
     recurrence_end_date = session_data.get('recurrence_end_date')
     
     if is_recurring and recurrence_type and recurrence_end_date:
-        # Create the parent session first
-        parent_session = Session(
+        # Store the series once as a rule; occurrences are expanded when read
+        rule = RecurrenceRule(
             title=session_data['title'],
-            date=session_data['date'],
-            time=session_data['time'],
+            start_date=parse_session_date(session_data['date']),
+            end_date=parse_session_date(recurrence_end_date),
+            time=parse_session_time(session_data['time']),
             duration=session_data['duration'],
             user_id=user_id,
             group_id=group_id,
             room_id=room_id,
             instrument_id=instrument_id,
-            is_recurring=True,
             recurrence_type=recurrence_type,
-            recurrence_end_date=recurrence_end_date
+            excluded_dates=[],
+            # Group series skip the breaks of any term they run through
+            skip_term_breaks=bool(group_id)
         )
-        db.session.add(parent_session)
+        db.session.add(rule)
         db.session.commit()
         
-        # Calculate recurring sessions
-        start_date = datetime.strptime(session_data['date'], '%Y-%m-%d')
-        end_date = datetime.strptime(recurrence_end_date, '%Y-%m-%d')
-        current_date = start_date
-        
-        # Get the term for this session to check for breaks
-        term = None
-        if group_id:
-            group = db.session.get(Group, group_id)
-            if group and group.name:
-                # Extract term name from group name (format: "{term_name} - {instrument}")
-                term_name = group.name.split(' - ')[0]
-                term = Term.query.filter_by(name=term_name).first()
-        
-        # Create child sessions based on recurrence type
-        while current_date <= end_date:
-            if current_date != start_date:  # Skip the first date as it's already created
-                # Check if this date falls within a term break
-                skip_date = False
-                if term and term.has_break:
-                    break_start = term.break_start_date
-                    break_end = term.break_end_date
-                    if break_start <= current_date.date() <= break_end:
-                        skip_date = True
-                        print(f"Skipping session on {current_date.date()} due to term break")
-                
-                if not skip_date:
-                    child_session = Session(
-                        title=session_data['title'],
-                        date=current_date.strftime('%Y-%m-%d'),
-                        time=session_data['time'],
-                        duration=session_data['duration'],
-                        user_id=user_id,
-                        group_id=group_id,
-                        room_id=room_id,
-                        instrument_id=instrument_id,
-                        is_recurring=True,
-                        recurrence_type=recurrence_type,
-                        recurrence_end_date=recurrence_end_date,
-                        parent_session_id=parent_session.id
-                    )
-                    db.session.add(child_session)
-            
-            # Increment date based on recurrence type
-            if recurrence_type == 'weekly':
-                current_date += timedelta(days=7)
-            elif recurrence_type == 'biweekly':
-                current_date += timedelta(days=14)
-            elif recurrence_type == 'monthly':
-                # Add one month
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
-            else:
-                # Default to weekly if recurrence type is not recognized
-                current_date += timedelta(days=7)
-        
-        db.session.commit()
-        return parent_session.to_dict()
+        return rule.occurrence_dict(rule.start_date)
     else:
         # Create a single non-recurring session
         new_session = Session(
             title=session_data['title'],
-            date=session_data['date'],
-            time=session_data['time'],
+            date=parse_session_date(session_data['date']),
+            time=parse_session_time(session_data['time']),
             duration=session_data['duration'],
             user_id=user_id,
             group_id=group_id,
@@ -1002,15 +1689,48 @@ def save_session(session_data, user_id=None):
 
 def delete_session(session_id, user_id=None, delete_all=False):
     """Delete a session from the SQLite database"""
+    if session_id < 0:
+        # Unmaterialized occurrence of a recurrence rule
+        occurrence = get_occurrence(session_id)
+        if not occurrence:
+            return False
+        rule, occurrence_date = occurrence
+        if delete_all:
+            end_series(rule)
+        else:
+            exclude_occurrence(rule, occurrence_date)
+            session = materialized_session(session_id)
+            if session:
+                db.session.delete(session)
+        db.session.commit()
+        return True
+    
     # Get the session
     session = db.session.get(Session, session_id)
     
     if not session:
         return False
     
+    if session.recurrence_rule_id:
+        # Materialized occurrence: cancel it in the rule, or end the whole series
+        if delete_all:
+            end_series(session.recurrence_rule)
+        else:
+            exclude_occurrence(session.recurrence_rule, session.occurrence_date)
+            db.session.delete(session)
     # If this is a recurring session
-    if session.is_recurring:
+    elif session.is_recurring:
         if delete_all:
+            # Bulk deletes bypass the ORM, so log the removed rows for delta sync
+            parent_id = session.parent_session_id or session_id
+            series_ids = db.session.query(Session.id).filter(
+                db.or_(Session.parent_session_id == parent_id, Session.id == parent_id)
+            ).all()
+            for (series_id,) in series_ids:
+                # A parent deleted through db.session.delete is logged by the flush
+                if session.parent_session_id or series_id != session_id:
+                    record_change('sessions', series_id, 'delete')
+            
             # If this is a child session, find and delete all siblings
             if session.parent_session_id:
                 # Delete all sessions with the same parent
@@ -1284,8 +2004,7 @@ def dashboard():
     if current_user.role not in ['admin', 'staff']:
         return redirect(url_for('student_dashboard'))
     
-    # Get all sessions
-    sessions = Session.query.order_by(Session.date).all()
+    # Sessions are loaded by the calendar per visible date range via /api/sessions
     
     # Get all materials
     materials = Material.query.all()
@@ -1304,12 +2023,12 @@ def dashboard():
         term_dates = Term.query.order_by(Term.start_date).all()
     
     return render_template('dashboard.html',
-                         sessions=sessions,
                          materials=materials,
                          users=users,
                          rooms=rooms,
                          jam_nights=jam_nights,
-                         term_dates=term_dates)
+                         term_dates=term_dates,
+                         booking_stream=BOOKING_STREAM_SECONDS > 0)
 
 @app.route('/settings')
 @login_required
@@ -1342,36 +2061,224 @@ def settings():
                          admin_users=admin_users,
                          current_user=current_user)
 
+# Session feed settings for windowed calendar requests
+SESSION_FEED_DEFAULT_LIMIT = 500
+SESSION_FEED_MAX_LIMIT = 2000
+SESSION_FEED_FIELDS = [
+    'id', 'title', 'date', 'time', 'duration', 'user_id', 'group_id',
+    'room_id', 'room_name', 'instrument_id', 'instrument', 'is_recurring',
+    'recurrence_type', 'recurrence_end_date', 'parent_session_id', 'recurrence_rule_id'
+]
+
+def encode_session_cursor(date, time, session_id):
+    """Encode the (date, time, id) position of the last returned row as an opaque token"""
+    raw = json.dumps([date, time, session_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_session_cursor(cursor):
+    """Decode a cursor produced by encode_session_cursor, raising ValueError if it is malformed"""
+    try:
+        date, time, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(date), str(time), int(session_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def load_session_feed(start, end, student_id=None, cursor=None, limit=SESSION_FEED_DEFAULT_LIMIT):
+    """
+    Load one page of sessions between start and end (inclusive, YYYY-MM-DD).
+    Rows are ordered by (date, time, id) and paged with a keyset cursor, so the
+    cost of a request depends on the visible range rather than the whole history.
+    Unmaterialized occurrences of recurrence rules are expanded for the window and
+    merged in with their virtual (negative) IDs.
+    If student_id is given only that student's own and group sessions are returned.
+    Returns (rows, next_cursor) where rows are tuples in SESSION_FEED_FIELDS order.
+    """
+    start_date = parse_session_date(start)
+    end_date = parse_session_date(end)
+
+    query = db.session.query(
+        Session.id,
+        Session.title,
+        Session.date,
+        Session.time,
+        Session.duration,
+        Session.user_id,
+        Session.group_id,
+        Session.room_id,
+        Room.name,
+        Session.instrument_id,
+        Instrument.name,
+        Session.is_recurring,
+        Session.recurrence_type,
+        Session.recurrence_end_date,
+        Session.parent_session_id,
+        Session.recurrence_rule_id
+    ).outerjoin(
+        Room, Session.room_id == Room.id
+    ).outerjoin(
+        Instrument, Session.instrument_id == Instrument.id
+    ).filter(
+        Session.date >= start_date,
+        Session.date <= end_date
+    )
+
+    rule_filter = None
+    if student_id is not None:
+        student_group_ids = (
+            db.session.query(GroupMember.group_id)
+            .filter(GroupMember.student_id == student_id)
+        )
+        query = query.filter(
+            db.or_(
+                Session.user_id == student_id,
+                Session.group_id.in_(student_group_ids)
+            )
+        )
+        rule_filter = db.or_(
+            RecurrenceRule.user_id == student_id,
+            RecurrenceRule.group_id.in_(student_group_ids)
+        )
+
+    last_position = None
+    if cursor:
+        last_date, last_time, last_id = decode_session_cursor(cursor)
+        last_date = parse_session_date(last_date)
+        last_time = parse_session_time(last_time)
+        last_position = (last_date, last_time, last_id)
+        query = query.filter(
+            db.or_(
+                Session.date > last_date,
+                db.and_(Session.date == last_date, Session.time > last_time),
+                db.and_(Session.date == last_date, Session.time == last_time, Session.id > last_id)
+            )
+        )
+
+    # Fetch one extra row to know whether another page exists
+    stored = query.order_by(Session.date, Session.time, Session.id).limit(limit + 1).all()
+
+    # Dates and times go out in the same string format as Session.to_dict()
+    positioned = [
+        (
+            (row[2], row[3], row[0]),
+            tuple(row[:2]) + (row[2].strftime('%Y-%m-%d'), row[3].strftime('%H:%M')) + tuple(row[4:])
+        )
+        for row in stored
+    ]
+    for rule, occurrence_date in expand_occurrences(start_date, end_date, rule_filter):
+        position = (occurrence_date, rule.time, occurrence_id(rule.id, occurrence_date))
+        if last_position is None or position > last_position:
+            positioned.append((position, rule.occurrence_row(occurrence_date)))
+    positioned.sort(key=lambda item: item[0])
+
+    next_cursor = None
+    if len(positioned) > limit:
+        positioned = positioned[:limit]
+        last_date, last_time, last_id = positioned[-1][0]
+        next_cursor = encode_session_cursor(last_date.strftime('%Y-%m-%d'), last_time.strftime('%H:%M:%S'), last_id)
+
+    return [row for position, row in positioned], next_cursor
+
+def session_feed_response(student_id=None):
+    """Build the JSON response for a windowed /api/sessions request"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if not start or not end:
+        return jsonify({'error': 'Both start and end dates are required'}), 400
+
+    try:
+        start = datetime.strptime(start, '%Y-%m-%d').strftime('%Y-%m-%d')
+        end = datetime.strptime(end, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if start > end:
+        return jsonify({'error': 'Start date must be before end date'}), 400
+
+    try:
+        limit = int(request.args.get('limit', SESSION_FEED_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, SESSION_FEED_MAX_LIMIT))
+
+    try:
+        rows, next_cursor = load_session_feed(start, end, student_id, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'compact':
+        # Column names once, then one positional array per session
+        return jsonify({
+            'start': start,
+            'end': end,
+            'fields': SESSION_FEED_FIELDS,
+            'rows': [list(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+
+    sessions = []
+    for row in rows:
+        session_dict = dict(zip(SESSION_FEED_FIELDS, row))
+        session_dict['notes'] = None
+        sessions.append(session_dict)
+
+    return jsonify({
+        'start': start,
+        'end': end,
+        'sessions': sessions,
+        'next_cursor': next_cursor
+    })
+
+def list_sessions_response():
+    """Build the GET /api/sessions response for the current user"""
+    # Check if a specific group_id is requested
+    group_id = request.args.get('group_id')
+    
+    if group_id:
+        # Filter sessions by group_id
+        try:
+            group_id = int(group_id)
+            sessions = session_list_query().filter_by(group_id=group_id).order_by(Session.date).all()
+            session_dicts = [session.to_dict() for session in sessions]
+            session_dicts.extend(all_occurrence_dicts(RecurrenceRule.group_id == group_id))
+            session_dicts.sort(key=lambda s: s['date'])
+            return jsonify({'sessions': session_dicts})
+        except ValueError:
+            return jsonify({'error': 'Invalid group ID'}), 400
+    
+    # Windowed feed used by the calendars: only the visible date range is loaded
+    if request.args.get('start') or request.args.get('end'):
+        if current_user.role == 'student':
+            return session_feed_response(student_id=current_user.id)
+        return session_feed_response()
+    
+    # Original logic for all sessions
+    if current_user.role == 'student':
+        # Students can see their own sessions and group sessions
+        group_ids = [gm.group_id for gm in GroupMember.query.filter_by(student_id=current_user.id).all()]
+        sessions = session_list_query().filter(
+            db.or_(
+                Session.user_id == current_user.id,
+                Session.group_id.in_(group_ids)
+            )
+        ).order_by(Session.date).all()
+        rule_filter = db.or_(
+            RecurrenceRule.user_id == current_user.id,
+            RecurrenceRule.group_id.in_(group_ids)
+        )
+    else:
+        # Admin and staff can see all sessions
+        sessions = session_list_query().order_by(Session.date).all()
+        rule_filter = None
+    session_dicts = [session.to_dict() for session in sessions]
+    session_dicts.extend(all_occurrence_dicts(rule_filter))
+    session_dicts.sort(key=lambda s: s['date'])
+    return jsonify(session_dicts)
+
 @app.route('/api/sessions', methods=['GET', 'POST', 'DELETE'])
 @login_required
 def api_sessions():
     if request.method == 'GET':
-        # Check if a specific group_id is requested
-        group_id = request.args.get('group_id')
-        
-        if group_id:
-            # Filter sessions by group_id
-            try:
-                group_id = int(group_id)
-                sessions = Session.query.filter_by(group_id=group_id).order_by(Session.date).all()
-                return jsonify({'sessions': [session.to_dict() for session in sessions]})
-            except ValueError:
-                return jsonify({'error': 'Invalid group ID'}), 400
-        
-        # Original logic for all sessions
-        if current_user.role == 'student':
-            # Students can see their own sessions and group sessions
-            group_ids = [gm.group_id for gm in GroupMember.query.filter_by(student_id=current_user.id).all()]
-            sessions = Session.query.filter(
-                db.or_(
-                    Session.user_id == current_user.id,
-                    Session.group_id.in_(group_ids)
-                )
-            ).order_by(Session.date).all()
-        else:
-            # Admin and staff can see all sessions
-            sessions = Session.query.order_by(Session.date).all()
-        return jsonify([session.to_dict() for session in sessions])
+        return versioned_response(SESSION_SYNC_TABLES, list_sessions_response)
     
     if request.method == 'POST':
         # Only admin and staff can create sessions
@@ -1425,10 +2332,30 @@ def api_sessions():
         except ValueError:
             return jsonify({'error': 'Invalid session ID'}), 400
 
-@app.route('/api/sessions/<int:session_id>')
+@app.route('/api/sessions/<int(signed=True):session_id>')
 @login_required
 def get_session(session_id):
-    session = db.session.get(Session, session_id)
+    session = materialized_session(session_id)
+    if session_id < 0 and not session:
+        occurrence = get_occurrence(session_id)
+        if not occurrence:
+            return jsonify({'error': 'Session not found'}), 404
+        rule, occurrence_date = occurrence
+        if current_user.role == 'student':
+            group_ids = [gm.group_id for gm in GroupMember.query.filter_by(student_id=current_user.id).all()]
+            if rule.user_id != current_user.id and rule.group_id not in group_ids:
+                return jsonify({'error': 'Unauthorized access'}), 403
+        return jsonify({
+            'id': session_id,
+            'title': rule.title,
+            'start_time': f"{occurrence_date.strftime('%Y-%m-%d')} {rule.time.strftime('%H:%M')}",
+            'duration': rule.duration,
+            'notes': None,
+            'type': 'group' if rule.group_id else 'individual',
+            'instrument': rule.instrument.name if rule.instrument else None,
+            'room_name': rule.room.name if rule.room else None
+        })
+    
     if not session:
         return jsonify({'error': 'Session not found'}), 404
     
@@ -1448,7 +2375,7 @@ def get_session(session_id):
     return jsonify({
         'id': session.id,
         'title': session.title,
-        'start_time': f"{session.date} {session.time}",
+        'start_time': f"{session.date.strftime('%Y-%m-%d')} {session.time.strftime('%H:%M')}",
         'duration': session.duration,
         'notes': session.notes if hasattr(session, 'notes') else None,
         'type': 'group' if session.group_id else 'individual',
@@ -1456,25 +2383,185 @@ def get_session(session_id):
         'room_name': room_name
     })
 
+# Largest delta served before the client is told to reload instead
+CHANGES_MAX_ROWS = 1000
+
+def visible_session_filter(model, student_id):
+    """Rows of Session or RecurrenceRule a student can see: their own and their groups'"""
+    return db.or_(
+        model.user_id == student_id,
+        model.group_id.in_(
+            db.session.query(GroupMember.group_id)
+            .filter(GroupMember.student_id == student_id)
+        )
+    )
+
+def visible_material_ids(student_id):
+    """
+    SELECT of the IDs of materials allocated to a student directly or through
+    a group, as one UNION. Both halves are answered from the covering indexes
+    on material_allocations, group_members and group_material_allocations.
+    """
+    direct = db.select(MaterialAllocation.material_id).where(
+        MaterialAllocation.student_id == student_id
+    )
+    via_groups = db.select(GroupMaterialAllocation.material_id).join(
+        GroupMember, GroupMember.group_id == GroupMaterialAllocation.group_id
+    ).where(GroupMember.student_id == student_id)
+    return db.union(direct, via_groups)
+
+@app.route('/api/changes')
+@login_required
+def api_changes():
+    """
+    Rows changed or deleted since a change version, for clients that already
+    hold a full list. Returns {'version', 'reset', 'changes': {table: {'changed', 'deleted'}}}.
+    When 'reset' is true the client must reload the table(s) from the list endpoints.
+    """
+    try:
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({'error': 'since must be a change version'}), 400
+    
+    tables = [t for t in request.args.get('tables', 'sessions,groups,materials').split(',') if t]
+    sync_tables = {
+        'sessions': SESSION_SYNC_TABLES,
+        'materials': MATERIAL_SYNC_TABLES,
+        'groups': GROUP_SYNC_TABLES
+    }
+    if any(table not in sync_tables for table in tables):
+        return jsonify({'error': 'Unknown table'}), 400
+    
+    logged = set()
+    for table in tables:
+        logged.update(sync_tables[table])
+    prune_change_log_if_due()
+    if since < pruned_change_version():
+        # Changes after since have been pruned
+        return jsonify({'version': get_change_version(*logged)[0], 'reset': True, 'changes': {}})
+    
+    entries = ChangeLog.query.filter(
+        ChangeLog.id > since,
+        ChangeLog.table_name.in_(logged)
+    ).order_by(ChangeLog.id).limit(CHANGES_MAX_ROWS + 1).all()
+    
+    version = entries[-1].id if entries else max(since, get_change_version(*logged)[0])
+    is_student = current_user.role == 'student'
+    # Membership and allocation changes alter which rows a student sees at all
+    visibility_tables = {'group_members', 'material_allocations', 'group_material_allocations'}
+    if len(entries) > CHANGES_MAX_ROWS or any(entry.table_name in RELOAD_SYNC_TABLES for entry in entries) or (
+        is_student and any(entry.table_name in visibility_tables for entry in entries)
+    ):
+        return jsonify({'version': get_change_version(*logged)[0], 'reset': True, 'changes': {}})
+    
+    # Keep only the last action per row
+    latest = {}
+    for entry in entries:
+        latest[(entry.table_name, entry.row_id)] = entry.action
+    
+    def split(table_name):
+        upserted = [row_id for (name, row_id), action in latest.items() if name == table_name and action == 'upsert']
+        deleted = [row_id for (name, row_id), action in latest.items() if name == table_name and action == 'delete']
+        return upserted, deleted
+    
+    changes = {}
+    if 'sessions' in tables:
+        upserted, deleted = split('sessions')
+        query = session_list_query().filter(Session.id.in_(upserted))
+        if is_student:
+            query = query.filter(visible_session_filter(Session, current_user.id))
+        changed = [session.to_dict() for session in query.all()]
+        found = {session['id'] for session in changed}
+        # Rows that vanished or are no longer visible are reported as deleted
+        deleted.extend(row_id for row_id in upserted if row_id not in found)
+        changes['sessions'] = {'changed': changed, 'deleted': deleted}
+        
+        # A changed rule alters an unknown set of occurrences; clients reload their windows
+        upserted, deleted = split('recurrence_rules')
+        query = RecurrenceRule.query.filter(RecurrenceRule.id.in_(upserted))
+        if is_student:
+            query = query.filter(visible_session_filter(RecurrenceRule, current_user.id))
+        changes['recurrence_rules'] = {
+            'changed': [rule.to_dict() for rule in query.all()],
+            'deleted': deleted
+        }
+    
+    if 'materials' in tables:
+        upserted, deleted = split('materials')
+        query = Material.query.filter(Material.id.in_(upserted))
+        if is_student:
+            query = query.filter(Material.id.in_(visible_material_ids(current_user.id)))
+        changed = [material.to_dict() for material in query.all()]
+        found = {material['id'] for material in changed}
+        deleted.extend(row_id for row_id in upserted if row_id not in found)
+        changes['materials'] = {'changed': changed, 'deleted': deleted}
+    
+    if 'groups' in tables:
+        upserted, deleted = split('groups')
+        changed = [group.to_dict() for group in Group.query.filter(Group.id.in_(upserted)).all()]
+        found = {group['id'] for group in changed}
+        deleted.extend(row_id for row_id in upserted if row_id not in found)
+        changes['groups'] = {'changed': changed, 'deleted': deleted}
+    
+    return jsonify({'version': version, 'reset': False, 'changes': changes})
+
+def list_materials_response():
+    """Build the GET /api/materials response for the current user"""
+    # Allow all logged-in users to view materials
+    materials = Material.query.options(db.joinedload(Material.instrument))
+    if current_user.role == 'student':
+        # Materials allocated directly or through the student's groups, in one query
+        materials = materials.filter(Material.id.in_(visible_material_ids(current_user.id))).all()
+    else:
+        # Admin and staff can see all materials
+        materials = materials.all()
+    return jsonify([material.to_dict() for material in materials])
+
+@app.route('/api/materials/search', methods=['GET'])
+@login_required
+def search_materials():
+    """Ranked full-text search over material titles, descriptions, categories and instruments"""
+    if current_user.role not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    if not material_search_ready:
+        return jsonify({'error': 'Search is not available'}), 503
+    
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    
+    total, ranked = material_search.search(
+        db.session.connection(), query,
+        limit=per_page,
+        offset=(page - 1) * per_page,
+        category=request.args.get('category') or None,
+        material_type=request.args.get('type') or None,
+        instrument=request.args.get('instrument') or None
+    )
+    
+    materials = {
+        material.id: material
+        for material in Material.query.options(db.joinedload(Material.instrument))
+        .filter(Material.id.in_([material_id for material_id, _ in ranked])).all()
+    } if ranked else {}
+    results = []
+    for material_id, score in ranked:
+        if material_id in materials:
+            results.append({**materials[material_id].to_dict(), 'score': score})
+    
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'results': results
+    })
+
 @app.route('/api/materials', methods=['GET', 'POST', 'DELETE'])
 @login_required
 def api_materials():
     if request.method == 'GET':
-        # Allow all logged-in users to view materials
-        if current_user.role == 'student':
-            # Get group IDs where the student is a member
-            group_ids = [gm.group_id for gm in GroupMember.query.filter_by(student_id=current_user.id).all()]
-            # Get material IDs allocated directly to the student
-            direct_material_ids = [ma.material_id for ma in MaterialAllocation.query.filter_by(student_id=current_user.id).all()]
-            # Get material IDs allocated to the student's groups
-            group_material_ids = [gma.material_id for gma in GroupMaterialAllocation.query.filter(GroupMaterialAllocation.group_id.in_(group_ids)).all()]
-            # Combine and deduplicate material IDs
-            all_material_ids = set(direct_material_ids + group_material_ids)
-            materials = Material.query.filter(Material.id.in_(all_material_ids)).all()
-        else:
-            # Admin and staff can see all materials
-            materials = Material.query.all()
-        return jsonify([material.to_dict() for material in materials])
+        return versioned_response(MATERIAL_SYNC_TABLES, list_materials_response)
     
     if request.method == 'POST':
         # Only admin and staff can create materials
@@ -1510,12 +2597,17 @@ def api_materials():
         
         try:
             # Get the file ID from the material's URL
-            file_id = material.url.split('id=')[-1] if 'id=' in material.url else None
+            file_id = drive_file_id(material.url)
+            # Deduplicated uploads share one Drive file; keep it while others use it
+            shared = file_id and Material.query.filter(
+                Material.url == material.url, Material.id != material.id
+            ).first() is not None
             
-            if file_id:
+            if file_id and not shared:
                 # Delete from Google Drive
                 service = get_google_drive_service()
                 delete_file(service, file_id)
+                file_cache.discard(file_id)
                 print(f"Deleted file from Google Drive with ID: {file_id}")
             
             # Delete from database
@@ -1527,6 +2619,144 @@ def api_materials():
             print(f"Error deleting material: {str(e)}")
             return jsonify({'error': f'Failed to delete material: {str(e)}'}), 500
 
+# Seconds between retries of failed Drive deletions; a failure waits this long times 2**attempts
+DRIVE_DELETE_RETRY_SECONDS = 60
+DRIVE_DELETE_MAX_DELAY = timedelta(days=1)
+# Failed deletions of a file before it is given up on
+DRIVE_DELETE_MAX_ATTEMPTS = 10
+
+# Set when deletions are queued so the worker does not wait for its next retry round
+drive_deletions_queued = threading.Event()
+drive_deletion_worker = None
+drive_deletion_worker_lock = threading.Lock()
+
+def process_drive_deletions():
+    """Delete every due file in the drive_deletions queue, in Drive batch requests"""
+    with app.app_context():
+        service = None
+        while True:
+            now = datetime.now(pytz.utc).replace(tzinfo=None)
+            due = DriveDeletion.query.filter(
+                DriveDeletion.failed_at.is_(None),
+                DriveDeletion.next_attempt_at <= now
+            ).order_by(DriveDeletion.id).limit(DRIVE_BATCH_SIZE).all()
+            if not due:
+                return
+            
+            service = service or get_google_drive_service()
+            errors = batch_delete_files(service, [deletion.file_id for deletion in due])
+            for deletion in due:
+                error = errors.get(deletion.file_id)
+                if error is None:
+                    db.session.delete(deletion)
+                    file_cache.discard(deletion.file_id)
+                else:
+                    deletion.attempts += 1
+                    deletion.last_error = str(error)
+                    if deletion.attempts >= DRIVE_DELETE_MAX_ATTEMPTS:
+                        deletion.failed_at = now
+                        app.logger.error(f"Giving up deleting Google Drive file {deletion.file_id}: {str(error)}")
+                        continue
+                    deletion.next_attempt_at = now + min(
+                        timedelta(seconds=DRIVE_DELETE_RETRY_SECONDS * 2 ** deletion.attempts),
+                        DRIVE_DELETE_MAX_DELAY
+                    )
+            db.session.commit()
+            print(f"Deleted {len(due) - len(errors)} files from Google Drive, {len(errors)} to retry")
+
+def run_drive_deletions():
+    while True:
+        # The first pass runs straight away, draining deletions queued before a restart
+        drive_deletions_queued.clear()
+        try:
+            process_drive_deletions()
+        except Exception as e:
+            app.logger.error(f"Error deleting files from Google Drive: {str(e)}")
+        drive_deletions_queued.wait(DRIVE_DELETE_RETRY_SECONDS)
+
+def start_drive_deletion_worker():
+    """Start this process's Drive deletion thread if it is not running yet"""
+    global drive_deletion_worker
+    with drive_deletion_worker_lock:
+        if drive_deletion_worker is None or not drive_deletion_worker.is_alive():
+            drive_deletion_worker = threading.Thread(
+                target=run_drive_deletions, name='drive-deletions', daemon=True
+            )
+            drive_deletion_worker.start()
+
+@app.before_request
+def ensure_drive_deletion_worker():
+    # Queued deletions left by a previous process are drained as soon as this one serves a request
+    if drive_deletion_worker is None:
+        start_drive_deletion_worker()
+
+@app.route('/api/materials/bulk-delete', methods=['POST'])
+@login_required
+def bulk_delete_materials():
+    """
+    Delete many materials at once. The rows go in one transaction; their Drive
+    files are queued and deleted in the background.
+    """
+    if current_user.role not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    data = request.get_json() or {}
+    try:
+        material_ids = {int(material_id) for material_id in data.get('ids', [])}
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Material IDs must be integers'}), 400
+    if not material_ids:
+        return jsonify({'error': 'No material IDs provided'}), 400
+    
+    try:
+        materials = Material.query.filter(Material.id.in_(material_ids)).all()
+        found_ids = [material.id for material in materials]
+        
+        if found_ids:
+            # Allocations of the deleted materials go with them
+            allocations = MaterialAllocation.query.filter(MaterialAllocation.material_id.in_(found_ids))
+            for (allocation_id,) in allocations.with_entities(MaterialAllocation.id).all():
+                record_change('material_allocations', allocation_id, 'delete')
+            allocations.delete(synchronize_session=False)
+            
+            group_allocations = GroupMaterialAllocation.query.filter(GroupMaterialAllocation.material_id.in_(found_ids))
+            for allocation_id, group_id in group_allocations.with_entities(
+                GroupMaterialAllocation.id, GroupMaterialAllocation.group_id
+            ).all():
+                record_change('group_material_allocations', allocation_id, 'delete')
+                record_change('groups', group_id)
+            group_allocations.delete(synchronize_session=False)
+            
+            # Drive files still linked from other (deduplicated) materials are kept
+            urls = {material.url for material in materials if drive_file_id(material.url)}
+            shared = {
+                url for (url,) in db.session.query(Material.url).filter(
+                    Material.url.in_(urls), Material.id.notin_(found_ids)
+                ).distinct()
+            } if urls else set()
+            file_ids = {drive_file_id(url) for url in urls - shared}
+            queued = {
+                file_id for (file_id,) in db.session.query(DriveDeletion.file_id)
+                .filter(DriveDeletion.file_id.in_(file_ids))
+            } if file_ids else set()
+            db.session.add_all(DriveDeletion(file_id=file_id) for file_id in file_ids - queued)
+            
+            for material in materials:
+                db.session.delete(material)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error deleting materials: {str(e)}")
+        return jsonify({'error': f'Failed to delete materials: {str(e)}'}), 500
+    
+    start_drive_deletion_worker()
+    drive_deletions_queued.set()
+    
+    return jsonify({
+        'deleted': sorted(found_ids),
+        'not_found': sorted(material_ids - set(found_ids))
+    }), 200
+
 @app.route('/api/allocations', methods=['GET', 'POST', 'DELETE'])
 def api_allocations():
     """API endpoint for material allocations"""
@@ -1564,8 +2794,22 @@ def api_allocations():
         if 'student_id' not in data:
             return jsonify({'error': 'Student ID is required'}), 400
         
+        try:
+            material_id = int(data['material_id'])
+            student_id = int(data['student_id'])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Material and student IDs must be integers'}), 400
+        
+        unknown_materials, unknown_students = unknown_allocation_ids({material_id}, {student_id})
+        if unknown_materials or unknown_students:
+            return jsonify({
+                'error': 'Material or student not found',
+                'unknown_material_ids': unknown_materials,
+                'unknown_student_ids': unknown_students
+            }), 404
+        
         # Create new allocation
-        new_allocation = save_allocation(data)
+        new_allocation = save_allocation({'material_id': material_id, 'student_id': student_id})
         return jsonify(new_allocation), 201
     
     elif request.method == 'DELETE':
@@ -1582,20 +2826,101 @@ def api_allocations():
         delete_allocation(allocation_id)
         return jsonify({'success': True}), 200
 
+@app.route('/api/allocations/bulk', methods=['POST'])
+def bulk_allocate_materials():
+    """Allocate a list of materials to a list of students"""
+    if 'user' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # Admin and staff can manage allocations
+    if session['user']['role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    data = request.get_json() or {}
+    try:
+        material_ids = {int(material_id) for material_id in data.get('material_ids', [])}
+        student_ids = {int(student_id) for student_id in data.get('student_ids', [])}
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Material and student IDs must be integers'}), 400
+    if not material_ids or not student_ids:
+        return jsonify({'error': 'Material IDs and student IDs are required'}), 400
+    
+    unknown_materials, unknown_students = unknown_allocation_ids(material_ids, student_ids)
+    if unknown_materials or unknown_students:
+        return jsonify({
+            'error': 'Unknown materials or students',
+            'unknown_material_ids': unknown_materials,
+            'unknown_student_ids': unknown_students
+        }), 400
+    
+    created = allocate_materials(material_ids, student_ids)
+    return jsonify({
+        'created': [allocation.to_dict() for allocation in created],
+        'already_allocated': len(material_ids) * len(student_ids) - len(created)
+    }), 201
+
+# Seconds a student's allocated materials are reused; any committed allocation change clears them sooner
+ALLOCATED_MATERIALS_MAX_AGE = 60
+
+class AllocatedMaterialsCache:
+    """Per-student get_allocated_materials() results, kept for ALLOCATED_MATERIALS_MAX_AGE"""
+    
+    def __init__(self, max_age=ALLOCATED_MATERIALS_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._materials = {}
+    
+    def get(self, student_id, load):
+        with self._lock:
+            cached = self._materials.get(student_id)
+        if cached and time.monotonic() - cached[0] < self.max_age:
+            return cached[1]
+        materials = load(student_id)
+        with self._lock:
+            self._materials[student_id] = (time.monotonic(), materials)
+        return materials
+    
+    def clear(self):
+        with self._lock:
+            self._materials.clear()
+
+allocated_materials_cache = AllocatedMaterialsCache()
+
+def load_allocated_materials(student_id):
+    """
+    Materials allocated to a student directly or through a group, newest
+    allocation first, with instruments joined in: one query however many
+    materials the student has.
+    """
+    direct = db.select(MaterialAllocation.material_id, MaterialAllocation.date_allocated).where(
+        MaterialAllocation.student_id == student_id
+    )
+    via_groups = db.select(GroupMaterialAllocation.material_id, GroupMaterialAllocation.date_allocated).join(
+        GroupMember, GroupMember.group_id == GroupMaterialAllocation.group_id
+    ).where(GroupMember.student_id == student_id)
+    allocations = db.union_all(direct, via_groups).subquery()
+    # A material allocated more than once counts from its first allocation
+    first_allocated = db.select(
+        allocations.c.material_id,
+        func.min(allocations.c.date_allocated).label('date_allocated')
+    ).group_by(allocations.c.material_id).subquery()
+    
+    rows = db.session.query(Material, first_allocated.c.date_allocated).join(
+        first_allocated, first_allocated.c.material_id == Material.id
+    ).options(db.joinedload(Material.instrument)).order_by(
+        first_allocated.c.date_allocated.desc(), Material.id
+    ).all()
+    
+    materials = []
+    for material, date_allocated in rows:
+        material_dict = material.to_dict()
+        material_dict['date_allocated'] = date_allocated.strftime('%Y-%m-%d %H:%M:%S') if date_allocated else None
+        materials.append(material_dict)
+    return materials
+
 def get_allocated_materials(student_id):
     """Get materials allocated to a specific student"""
-    with app.app_context():
-        allocations = MaterialAllocation.query.filter_by(student_id=student_id).all()
-        materials = []
-        
-        for allocation in allocations:
-            material = db.session.get(Material, allocation.material_id)
-            if material:
-                material_dict = material.to_dict()
-                material_dict['date_allocated'] = allocation.date_allocated.strftime('%Y-%m-%d %H:%M:%S')
-                materials.append(material_dict)
-        
-        return materials
+    return allocated_materials_cache.get(student_id, load_allocated_materials)
 
 def get_allocations_by_student(student_id):
     """Get all allocations for a specific student"""
@@ -1609,44 +2934,261 @@ def get_all_allocations():
         allocations = MaterialAllocation.query.all()
         return [allocation.to_dict() for allocation in allocations]
 
+def unknown_allocation_ids(material_ids, student_ids):
+    """
+    (material IDs, student IDs) from the given sets that do not exist, each
+    checked with one IN query. Only users with the student role count as students.
+    """
+    found_materials = {
+        material_id for (material_id,) in
+        db.session.query(Material.id).filter(Material.id.in_(material_ids))
+    }
+    found_students = {
+        student_id for (student_id,) in
+        db.session.query(User.id).filter(User.id.in_(student_ids), User.role == 'student')
+    }
+    return sorted(set(material_ids) - found_materials), sorted(set(student_ids) - found_students)
+
 def save_allocation(allocation_data):
-    """Save a material allocation to the database"""
+    """Save a material allocation to the database. The material and student must exist."""
+    allocate_materials([allocation_data['material_id']], [allocation_data['student_id']])
+    allocation = MaterialAllocation.query.filter_by(
+        material_id=allocation_data['material_id'],
+        student_id=allocation_data['student_id']
+    ).first()
+    return allocation.to_dict()
+
+def allocate_materials(material_ids, student_ids):
+    """
+    Allocate every material to every student in one statement; pairs that are
+    already allocated are skipped. Returns the new allocations. The IDs must
+    exist; check them with unknown_allocation_ids() first. Commits.
+    """
+    pairs = {(material_id, student_id) for material_id in material_ids for student_id in student_ids}
+    existing = set(db.session.query(MaterialAllocation.material_id, MaterialAllocation.student_id).filter(
+        MaterialAllocation.material_id.in_(material_ids),
+        MaterialAllocation.student_id.in_(student_ids)
+    ).all())
+    missing = pairs - existing
+    if not missing:
+        return []
+    
+    # Rows allocated concurrently since the query above are ignored by the unique index
+    db.session.execute(insert_ignore(MaterialAllocation), [
+        {'material_id': material_id, 'student_id': student_id} for material_id, student_id in missing
+    ])
+    created = [
+        allocation for allocation in MaterialAllocation.query.filter(
+            MaterialAllocation.material_id.in_(material_ids),
+            MaterialAllocation.student_id.in_(student_ids)
+        ).all()
+        if (allocation.material_id, allocation.student_id) in missing
+    ]
+    for allocation in created:
+        record_change('material_allocations', allocation.id)
+    db.session.commit()
+    return created
+
+def delete_allocation(allocation_id):
+    """Delete a material allocation from the database"""
     with app.app_context():
-        # Check if allocation already exists
-        existing = MaterialAllocation.query.filter_by(
-            material_id=allocation_data['material_id'],
-            student_id=allocation_data['student_id']
-        ).first()
-        
-        if existing:
-            return existing.to_dict()
+        allocation = db.session.get(MaterialAllocation, allocation_id)
+        if allocation:
+            db.session.delete(allocation)
+            db.session.commit()
+            return True
+        return False
+
+# Accepted uploads wait here, one file per upload ID, until a worker has sent them to Drive
+UPLOAD_SPOOL_DIR = os.path.join(app.root_path, 'temp', 'uploads')
+
+def upload_spool_path(upload_id):
+    return os.path.join(UPLOAD_SPOOL_DIR, upload_id)
+
+# Bytes read from the request per write to the spool file
+UPLOAD_READ_SIZE = 1024 * 1024
+# An upload not heard from for this long lost its worker (e.g. the process restarted) and is queued again
+UPLOAD_STALE_SECONDS = 10 * 60
+# Attempts before an upload is failed for good and its spool file removed
+UPLOAD_MAX_ATTEMPTS = 3
+# Seconds between sweeps for stale uploads in one process
+UPLOAD_SWEEP_INTERVAL = 60
+upload_swept_at = None
+
+def drive_file_id(url):
+    """Google Drive file ID of a material URL, or None for other links"""
+    return url.split('id=')[-1] if url and 'id=' in url else None
+
+def find_drive_duplicate(service, content_hash):
+    """Drive file ID of an earlier upload with the same content, if that file still exists"""
+    urls = db.session.query(Material.url).filter(
+        Material.content_hash == content_hash
+    ).order_by(Material.id.desc()).all()
+    checked = set()
+    for (url,) in urls:
+        file_id = drive_file_id(url)
+        if file_id and file_id not in checked:
+            if file_exists(service, file_id):
+                return file_id
+            checked.add(file_id)
+    return None
+
+def set_upload_progress(upload_id, fraction):
+    MaterialUpload.query.filter_by(id=upload_id).update({
+        'progress': round(fraction, 3),
+        'updated_at': datetime.now(pytz.utc).replace(tzinfo=None)
+    })
+    db.session.commit()
+
+def claim_material_upload(upload_id):
+    """
+    Take an upload for this worker in one UPDATE: a queued one, or one whose
+    worker went stale. False if another worker holds it, it is finished or it
+    has no attempts left.
+    """
+    now = datetime.now(pytz.utc).replace(tzinfo=None)
+    claimed = MaterialUpload.query.filter(
+        MaterialUpload.id == upload_id,
+        MaterialUpload.attempts < UPLOAD_MAX_ATTEMPTS,
+        db.or_(
+            MaterialUpload.status == 'queued',
+            db.and_(
+                MaterialUpload.status == 'uploading',
+                MaterialUpload.updated_at < now - timedelta(seconds=UPLOAD_STALE_SECONDS)
+            )
+        )
+    ).update({
+        'status': 'uploading',
+        'attempts': MaterialUpload.attempts + 1,
+        'updated_at': now
+    }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+def process_material_upload(upload_id):
+    """
+    Send a spooled upload to Drive and create its Material (runs on
+    upload_executor). A failed attempt leaves the spool file and the upload
+    queued for resume_stale_uploads() until UPLOAD_MAX_ATTEMPTS is reached.
+    """
+    with app.app_context():
+        if not claim_material_upload(upload_id):
+            return
+        upload = db.session.get(MaterialUpload, upload_id)
+        spool_path = upload_spool_path(upload_id)
+        finished = False
+        try:
+            service = get_google_drive_service()
+            # Identical content already in Drive is linked to instead of sent again
+            file_id = find_drive_duplicate(service, upload.content_hash)
+            if file_id:
+                upload.deduplicated = True
+                print(f"Upload {upload_id} reuses Google Drive file ID: {file_id}")
+            else:
+                with open(spool_path, 'rb') as stream:
+                    file_id = upload_file_to_folder(
+                        service,
+                        stream,
+                        upload.file_name,
+                        upload.mime_type,
+                        "MPA Materials", upload.instrument,
+                        progress=lambda fraction: set_upload_progress(upload_id, fraction)
+                    )
+                print(f"Upload {upload_id} sent to Google Drive with ID: {file_id}")
+            
+            material = Material(
+                title=upload.title,
+                type=upload.type,
+                url=f'https://drive.google.com/uc?id={file_id}',
+                category=upload.category,
+                instrument_id=upload.instrument_id,
+                user_id=upload.created_by,
+                content_hash=upload.content_hash,
+                file_name=upload.file_name,
+                mime_type=upload.mime_type
+            )
+            db.session.add(material)
+            db.session.flush()
+            upload.material_id = material.id
+            upload.status = 'complete'
+            upload.progress = 1
+            upload.completed_at = datetime.now(pytz.timezone('Europe/London'))
+            db.session.commit()
+            finished = True
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error uploading file to Google Drive: {str(e)}")
+            upload = db.session.get(MaterialUpload, upload_id)
+            upload.error_message = str(e)
+            if upload.attempts < UPLOAD_MAX_ATTEMPTS and os.path.exists(spool_path):
+                # Retried by the sweep once UPLOAD_STALE_SECONDS have passed
+                upload.status = 'queued'
+                upload.progress = 0
+            else:
+                upload.status = 'failed'
+                upload.completed_at = datetime.now(pytz.timezone('Europe/London'))
+                finished = True
+            upload.updated_at = datetime.now(pytz.utc).replace(tzinfo=None)
+            db.session.commit()
         
-        new_allocation = MaterialAllocation(
-            material_id=allocation_data['material_id'],
-            student_id=allocation_data['student_id']
+        if finished and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+def stale_upload_ids(include_queued=False):
+    """
+    IDs of queued or uploading uploads not heard from for UPLOAD_STALE_SECONDS,
+    plus every queued one with include_queued. Those out of attempts are
+    failed and their spool files removed.
+    """
+    stale = datetime.now(pytz.utc).replace(tzinfo=None) - timedelta(seconds=UPLOAD_STALE_SECONDS)
+    uploads = MaterialUpload.query.filter(
+        MaterialUpload.status.in_(['queued', 'uploading']),
+        db.or_(
+            MaterialUpload.updated_at < stale,
+            MaterialUpload.status == 'queued' if include_queued else db.false()
         )
-        
-        db.session.add(new_allocation)
-        db.session.commit()
-        
-        return new_allocation.to_dict()
+    ).all()
+    due = []
+    for upload in uploads:
+        if upload.attempts < UPLOAD_MAX_ATTEMPTS and os.path.exists(upload_spool_path(upload.id)):
+            due.append(upload.id)
+            continue
+        upload.status = 'failed'
+        upload.error_message = upload.error_message or 'Upload was interrupted'
+        upload.completed_at = datetime.now(pytz.timezone('Europe/London'))
+        if os.path.exists(upload_spool_path(upload.id)):
+            os.remove(upload_spool_path(upload.id))
+    db.session.commit()
+    return due
 
-def delete_allocation(allocation_id):
-    """Delete a material allocation from the database"""
-    with app.app_context():
-        allocation = db.session.get(MaterialAllocation, allocation_id)
-        if allocation:
-            db.session.delete(allocation)
-            db.session.commit()
-            return True
-        return False
+@app.before_request
+def resume_stale_uploads():
+    """Hand uploads lost by a restarted worker to this process's upload workers, at most once per UPLOAD_SWEEP_INTERVAL"""
+    global upload_swept_at
+    if upload_swept_at is not None and time.monotonic() - upload_swept_at < UPLOAD_SWEEP_INTERVAL:
+        return
+    upload_swept_at = time.monotonic()
+    try:
+        for upload_id in stale_upload_ids():
+            upload_executor.submit(process_material_upload, upload_id)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error resuming material uploads: {str(e)}")
 
 @app.route('/api/materials/upload', methods=['POST'])
 def upload_material():
-    """Handle file uploads for materials using Google Drive"""
+    """
+    Accept a material file for upload to Google Drive. The file is spooled and
+    sent by a background worker; the response is 202 with an upload ID whose
+    status can be polled at /api/materials/uploads/<upload_id>.
+    """
     if 'user' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
+    # Only admin and staff can create materials
+    if session['user']['role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     
@@ -1667,92 +3209,199 @@ def upload_material():
         except (ValueError, TypeError):
             instrument_id = None
     
-    temp_path = None
+    upload_id = str(uuid.uuid4())
+    spool_path = upload_spool_path(upload_id)
     try:
-        print(f"Starting file upload for instrument: {instrument}")
-        
-        # Get Google Drive service
-        print("Getting Google Drive service...")
-        service = get_google_drive_service()
-        print("Successfully got Google Drive service")
-        
-        # Create a temporary file to store the upload
-        temp_path = os.path.join(app.root_path, 'temp', secure_filename(file.filename))
-        print(f"Creating temporary file at: {temp_path}")
-        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-        file.save(temp_path)
-        print("Temporary file created successfully")
-        
-        # Get file mime type
-        mime_type = file.content_type or 'application/octet-stream'
-        print(f"File mime type: {mime_type}")
-        
-        # Get or create the main MPA Materials folder
-        print("Looking for main MPA Materials folder...")
-        main_folder = service.files().list(
-            q="name='MPA Materials' and mimeType='application/vnd.google-apps.folder' and trashed=false",
-            fields="files(id, name)"
-        ).execute()
-        
-        if not main_folder.get('files'):
-            print("Main folder not found, creating it...")
-            main_folder_id = create_folder(service, "MPA Materials")
-            print(f"Created main folder with ID: {main_folder_id}")
-        else:
-            main_folder_id = main_folder['files'][0]['id']
-            print(f"Found main folder with ID: {main_folder_id}")
-        
-        # Get or create the instrument subfolder
-        print(f"Looking for instrument subfolder: {instrument}")
-        instrument_folder = service.files().list(
-            q=f"name='{instrument}' and '{main_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
-            fields="files(id, name)"
-        ).execute()
-        
-        if not instrument_folder.get('files'):
-            print(f"Instrument folder not found, creating it...")
-            folder_id = create_folder(service, instrument, main_folder_id)
-            print(f"Created instrument folder with ID: {folder_id}")
-        else:
-            folder_id = instrument_folder['files'][0]['id']
-            print(f"Found instrument folder with ID: {folder_id}")
-        
-        # Upload to Google Drive
-        print(f"Uploading file to folder ID: {folder_id}")
-        file_id = upload_file(
-            service=service,
-            file_path=temp_path,
-            file_name=secure_filename(file.filename),
-            mime_type=mime_type,
-            folder_id=folder_id
+        # Spool the file, hashing it on the way
+        os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+        digest = hashlib.sha256()
+        with open(spool_path, 'wb') as spool:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_READ_SIZE), b''):
+                digest.update(chunk)
+                spool.write(chunk)
+        
+        file_name = secure_filename(file.filename)
+        upload = MaterialUpload(
+            id=upload_id,
+            file_name=file_name,
+            mime_type=file.content_type or 'application/octet-stream',
+            file_size=os.path.getsize(spool_path),
+            content_hash=digest.hexdigest(),
+            title=(request.form.get('title') or file.filename)[:100],
+            type=request.form.get('type') or 'file',
+            category=request.form.get('category', 'reference'),
+            instrument=instrument,
+            instrument_id=instrument_id,
+            created_by=session['user']['id']
         )
-        print(f"File uploaded successfully with ID: {file_id}")
-        
-        # Clean up temporary file
-        print("Cleaning up temporary file...")
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            print("Temporary file removed")
-        
-        # Return the file ID and a direct download URL
-        file_url = f'https://drive.google.com/uc?id={file_id}'
-        print(f"Returning success response with file URL: {file_url}")
-        return jsonify({
-            'url': file_url,
-            'file_id': file_id,
-            'instrument': instrument
-        }), 200
-        
+        db.session.add(upload)
+        db.session.commit()
     except Exception as e:
-        print(f"Error in upload_material: {str(e)}")
-        app.logger.error(f"Error uploading file to Google Drive: {str(e)}")
-        # Clean up temporary file if it exists
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+        db.session.rollback()
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        app.logger.error(f"Error accepting material upload: {str(e)}")
         return jsonify({'error': f'Failed to upload file: {str(e)}'}), 500
+    
+    upload_executor.submit(process_material_upload, upload_id)
+    
+    response = jsonify(upload.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('get_material_upload', upload_id=upload_id)
+    return response
+
+@app.route('/api/materials/uploads/stats', methods=['GET'])
+def material_upload_stats():
+    """How many finished uploads reused an existing Drive file instead of sending it again"""
+    if 'user' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if session['user']['role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    completed, deduplicated, bytes_saved = db.session.query(
+        func.count(MaterialUpload.id),
+        func.coalesce(func.sum(db.case((MaterialUpload.deduplicated == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(db.case((MaterialUpload.deduplicated == True, MaterialUpload.file_size), else_=0)), 0)
+    ).filter(MaterialUpload.status == 'complete').one()
+    
+    return jsonify({
+        'completed': completed,
+        'deduplicated': int(deduplicated),
+        'dedup_hit_rate': round(int(deduplicated) / completed, 3) if completed else 0,
+        'bytes_saved': int(bytes_saved)
+    })
+
+@app.route('/api/materials/drive-metrics', methods=['GET'])
+def drive_connection_metrics():
+    """Drive service builds and token refreshes in this worker process, with their total time"""
+    if 'user' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if session['user']['role'] != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    metrics = get_drive_metrics()
+    metrics['pid'] = os.getpid()
+    return jsonify(metrics)
+
+@app.route('/api/materials/uploads/<upload_id>', methods=['GET'])
+def get_material_upload(upload_id):
+    """Status and progress of a background material upload"""
+    if 'user' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    upload = db.session.get(MaterialUpload, upload_id)
+    if not upload or (upload.created_by != session['user']['id'] and session['user']['role'] != 'admin'):
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(upload.to_dict())
+
+# Drive files served through /files/..., kept on local disk with the least recently used evicted first
+FILE_CACHE_DIR = os.getenv('FILE_CACHE_DIR', os.path.join(app.root_path, 'cache', 'files'))
+file_cache = FileCache(
+    LocalFileStorage(FILE_CACHE_DIR),
+    max_bytes=int(os.getenv('FILE_CACHE_MAX_BYTES', FILE_CACHE_MAX_BYTES))
+)
+# Browsers may reuse a served file this long; a file ID's content never changes
+FILE_MAX_AGE = 24 * 60 * 60
+# 'x-sendfile' (Apache, lighttpd) or 'x-accel' (nginx) lets the web server send cached files
+FILE_OFFLOAD = os.getenv('FILE_OFFLOAD', '')
+# nginx internal location that maps to FILE_CACHE_DIR
+FILE_ACCEL_PREFIX = os.getenv('FILE_ACCEL_PREFIX', '/protected-files/')
+
+DRIVE_FILE_ID_PATTERN = re.compile(r'[\w-]+')
+
+def cached_drive_file(file_id, file_name=None, mime_type=None, download=False):
+    """
+    Serve a Drive file from the local file cache, fetching it on a miss. The
+    Drive file ID is the ETag; Range and conditional requests are answered
+    here unless the web server takes over through FILE_OFFLOAD. A name or
+    type not given is read from Drive once and cached beside the file.
+    """
+    if not file_id or not DRIVE_FILE_ID_PATTERN.fullmatch(file_id):
+        abort(404)
+    
+    try:
+        file_cache.get(file_id, lambda stream: download_to(get_google_drive_service(), file_id, stream))
+    except Exception as e:
+        if is_not_found(e):
+            abort(404)
+        app.logger.error(f"Error fetching file {file_id} from Google Drive: {str(e)}")
+        abort(502)
+    
+    if not file_name or not mime_type:
+        try:
+            metadata = file_cache.metadata(file_id, lambda: get_file_metadata(get_google_drive_service(), file_id))
+        except Exception as e:
+            app.logger.error(f"Error fetching details of file {file_id} from Google Drive: {str(e)}")
+            metadata = {}
+        file_name = file_name or metadata.get('name') or file_id
+        mime_type = mime_type or metadata.get('mimeType')
+    mimetype = mime_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    path = file_cache.storage.path(file_id)
+    if FILE_OFFLOAD in ('x-sendfile', 'x-accel') and path:
+        if request.if_none_match.contains(file_id):
+            response = make_response('', 304)
+        else:
+            response = Response(mimetype=mimetype)
+            if FILE_OFFLOAD == 'x-accel':
+                response.headers['X-Accel-Redirect'] = FILE_ACCEL_PREFIX + file_id
+            else:
+                response.headers['X-Sendfile'] = path
+            disposition = 'attachment' if download else 'inline'
+            response.headers.set('Content-Disposition', disposition, filename=file_name)
+        response.set_etag(file_id)
+    else:
+        response = send_file(
+            path or file_cache.storage.open(file_id),
+            mimetype=mimetype,
+            as_attachment=download,
+            download_name=file_name,
+            conditional=True,
+            etag=file_id
+        )
+    
+    # Files can be user-specific, so only the browser may keep them
+    response.cache_control.no_cache = None
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = FILE_MAX_AGE
+    return response
+
+@app.route('/files/<int:material_id>')
+@login_required
+def material_file(material_id):
+    """A material's Drive file, served from the local cache"""
+    material = db.session.get(Material, material_id)
+    if not material:
+        abort(404)
+    if current_user.role == 'student':
+        visible = db.session.query(Material.id).filter(
+            Material.id == material_id,
+            Material.id.in_(visible_material_ids(current_user.id))
+        ).first()
+        if not visible:
+            abort(404)
+    
+    file_id = drive_file_id(material.url)
+    if not file_id:
+        # Links are not proxied
+        return redirect(material.url)
+    return cached_drive_file(
+        file_id,
+        material.file_name,
+        material.mime_type,
+        download=request.args.get('download') == '1'
+    )
+
+@app.route('/files/events/<int:event_id>')
+def event_image(event_id):
+    """An event's image from the local cache; events are public"""
+    event = Event.query.get_or_404(event_id)
+    file_id = drive_file_id(event.image_url)
+    if not file_id:
+        if event.image_url:
+            return redirect(event.image_url)
+        abort(404)
+    return cached_drive_file(file_id)
 
 @app.route('/api/users', methods=['GET', 'POST', 'DELETE'])
 @login_required
@@ -1768,6 +3417,17 @@ def api_users():
                 return jsonify([user.to_dict()])
             else:
                 return jsonify([])
+        user_ids = request.args.get('ids')
+        if user_ids:
+            # Batch lookup: /api/users?ids=1,2,3 returns the users that exist, in one query
+            try:
+                user_ids = {int(user_id) for user_id in user_ids.split(',') if user_id.strip()}
+            except ValueError:
+                return jsonify({'error': 'User IDs must be integers'}), 400
+            users = User.query.options(db.joinedload(User.instrument)).filter(User.id.in_(user_ids))
+            if current_user.role == 'staff':
+                users = users.filter(User.role == 'student')
+            return jsonify([user.to_dict() for user in users.order_by(User.id).all()])
         if current_user.role == 'staff':
             # Staff can only see students
             users = User.query.filter_by(role='student').all()
@@ -1838,14 +3498,26 @@ def student_dashboard():
     
     user_id = current_user.id
     
-    # Get all sessions for this student
-    sessions = Session.query.filter(
+    # Count upcoming sessions for this student; the calendar loads sessions per visible month
+    today = datetime.now(pytz.timezone('Europe/London')).date()
+    upcoming_sessions_count = Session.query.filter(
         (Session.user_id == user_id) | 
         (Session.group_id.in_(
             db.session.query(GroupMember.group_id)
             .filter(GroupMember.student_id == user_id)
-        ))
-    ).order_by(Session.date.desc()).all()
+        )),
+        Session.date >= today
+    ).count()
+    student_rules = db.or_(
+        RecurrenceRule.user_id == user_id,
+        RecurrenceRule.group_id.in_(
+            db.session.query(GroupMember.group_id)
+            .filter(GroupMember.student_id == user_id)
+        )
+    )
+    last_rule_date = db.session.query(db.func.max(RecurrenceRule.end_date)).filter(student_rules).scalar()
+    if last_rule_date and last_rule_date >= today:
+        upcoming_sessions_count += len(expand_occurrences(today, last_rule_date, student_rules))
     
     # Get all materials allocated to this student
     materials = get_allocated_materials(user_id)
@@ -1862,7 +3534,7 @@ def student_dashboard():
     ).order_by(Feedback.created_at.desc()).all()
     
     return render_template('student_dashboard.html', 
-                         sessions=sessions, 
+                         upcoming_sessions_count=upcoming_sessions_count, 
                          materials=materials, 
                          individual_feedbacks=individual_feedbacks,
                          group_feedbacks=group_feedbacks)
@@ -2190,8 +3862,10 @@ def manage_groups():
     if request.method == 'GET':
         try:
             # Get all groups
-            groups = Group.query.all()
-            return jsonify([group.to_dict() for group in groups])
+            return versioned_response(
+                GROUP_SYNC_TABLES,
+                lambda: jsonify([group.to_dict() for group in Group.query.all()])
+            )
         except Exception as e:
             print(f"Error loading groups: {str(e)}")
             return jsonify({'error': 'Failed to load groups. Please try again later.'}), 500
@@ -2274,20 +3948,22 @@ def manage_group_members(group_id):
         group = Group.query.get_or_404(group_id)
         
         if request.method == 'GET':
-            # Get all members of the group with student information
-            members = GroupMember.query.filter_by(group_id=group_id).all()
+            # Get all members of the group with student information, joined in one query
+            members = db.session.query(GroupMember, User).join(
+                User, User.id == GroupMember.student_id
+            ).options(db.joinedload(User.instrument)).filter(
+                GroupMember.group_id == group_id
+            ).order_by(GroupMember.id).all()
             result = []
-            for member in members:
-                # Get the student information
-                student = db.session.get(User, member.student_id)
-                if student:
-                    member_data = member.to_dict()
-                    member_data.update({
-                        'username': student.username,
-                        'email': student.email,
-                        'role': student.role
-                    })
-                    result.append(member_data)
+            for member, student in members:
+                member_data = member.to_dict()
+                member_data.update({
+                    'username': student.username,
+                    'email': student.email,
+                    'role': student.role,
+                    'student': student.to_dict()
+                })
+                result.append(member_data)
             return jsonify(result)
         
         elif request.method == 'POST':
@@ -2362,22 +4038,21 @@ def manage_group_materials(group_id):
         group = Group.query.get_or_404(group_id)
         
         if request.method == 'GET':
-            # Get all materials allocated to the group with material information
-            allocations = GroupMaterialAllocation.query.filter_by(group_id=group_id).all()
+            # Get all materials allocated to the group with material information, joined in one query
+            allocations = db.session.query(GroupMaterialAllocation, Material).join(
+                Material, Material.id == GroupMaterialAllocation.material_id
+            ).filter(GroupMaterialAllocation.group_id == group_id).order_by(GroupMaterialAllocation.id).all()
             result = []
-            for allocation in allocations:
-                # Get the material information
-                material = db.session.get(Material, allocation.material_id)
-                if material:
-                    allocation_data = allocation.to_dict()
-                    allocation_data.update({
-                        'title': material.title,
-                        'category': material.category,
-                        'type': material.type,
-                        'url': material.url,
-                        'description': material.description
-                    })
-                    result.append(allocation_data)
+            for allocation, material in allocations:
+                allocation_data = allocation.to_dict()
+                allocation_data.update({
+                    'title': material.title,
+                    'category': material.category,
+                    'type': material.type,
+                    'url': material.url,
+                    'description': material.description
+                })
+                result.append(allocation_data)
             return jsonify(result)
         
         elif request.method == 'POST':
@@ -2387,32 +4062,47 @@ def manage_group_materials(group_id):
             if not data or 'material_ids' not in data or not isinstance(data['material_ids'], list):
                 return jsonify({'error': 'Material IDs list is required'}), 400
             
-            material_ids = data['material_ids']
-            
-            # Check if materials exist
-            for material_id in material_ids:
-                material = db.session.get(Material, material_id)
-                if not material:
-                    return jsonify({'error': f'Material with ID {material_id} does not exist'}), 400
+            try:
+                material_ids = {int(material_id) for material_id in data['material_ids']}
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Material IDs must be integers'}), 400
             
-            # Add materials to group
-            for material_id in material_ids:
-                # Check if material is already allocated to the group
-                existing_allocation = GroupMaterialAllocation.query.filter_by(
-                    group_id=group_id, 
-                    material_id=material_id
-                ).first()
-                
-                if not existing_allocation:
-                    new_allocation = GroupMaterialAllocation(
-                        group_id=group_id,
-                        material_id=material_id
-                    )
-                    db.session.add(new_allocation)
+            # Check that all materials exist
+            found = {
+                material_id for (material_id,) in
+                db.session.query(Material.id).filter(Material.id.in_(material_ids))
+            }
+            missing = material_ids - found
+            if missing:
+                return jsonify({'error': f'Material with ID {min(missing)} does not exist'}), 400
             
+            already_allocated = {
+                material_id for (material_id,) in db.session.query(GroupMaterialAllocation.material_id).filter(
+                    GroupMaterialAllocation.group_id == group_id,
+                    GroupMaterialAllocation.material_id.in_(material_ids)
+                )
+            }
+            to_add = material_ids - already_allocated
+            added = []
+            if to_add:
+                # Rows allocated concurrently since the query above are ignored by the unique index
+                db.session.execute(insert_ignore(GroupMaterialAllocation), [
+                    {'group_id': group_id, 'material_id': material_id} for material_id in to_add
+                ])
+                added = GroupMaterialAllocation.query.filter(
+                    GroupMaterialAllocation.group_id == group_id,
+                    GroupMaterialAllocation.material_id.in_(to_add)
+                ).all()
+                for allocation in added:
+                    record_change('group_material_allocations', allocation.id)
+                record_change('groups', group_id)
             db.session.commit()
             
-            return jsonify({'message': 'Materials allocated to group successfully'}), 201
+            return jsonify({
+                'message': 'Materials allocated to group successfully',
+                'added': [allocation.to_dict() for allocation in added],
+                'already_allocated': sorted(already_allocated)
+            }), 201
         
         elif request.method == 'DELETE':
             # Remove materials from the group
@@ -2432,19 +4122,25 @@ def manage_group_materials(group_id):
             else:
                 return jsonify({'error': 'Material ID or Material IDs list is required'}), 400
             
-            # Remove materials from group
-            for material_id in material_ids:
-                allocation = GroupMaterialAllocation.query.filter_by(
-                    group_id=group_id, 
-                    material_id=material_id
-                ).first()
-                
-                if allocation:
-                    db.session.delete(allocation)
+            # Remove materials from group in one DELETE
+            allocations = GroupMaterialAllocation.query.filter(
+                GroupMaterialAllocation.group_id == group_id,
+                GroupMaterialAllocation.material_id.in_(material_ids)
+            )
+            removed = allocations.with_entities(GroupMaterialAllocation.id, GroupMaterialAllocation.material_id).all()
+            if removed:
+                allocations.delete(synchronize_session=False)
+                for allocation_id, _ in removed:
+                    record_change('group_material_allocations', allocation_id, 'delete')
+                record_change('groups', group_id)
             db.session.commit()
             # Return the updated list of allocations for the group
             allocations = GroupMaterialAllocation.query.filter_by(group_id=group_id).all()
-            return jsonify({'message': 'Materials removed from group successfully', 'allocations': [a.to_dict() for a in allocations]})
+            return jsonify({
+                'message': 'Materials removed from group successfully',
+                'removed': sorted(material_id for _, material_id in removed),
+                'allocations': [a.to_dict() for a in allocations]
+            })
             
     except Exception as e:
         db.session.rollback()
@@ -2497,8 +4193,12 @@ def update_material(material_id):
         # Update material properties
         if 'title' in data:
             # If this is a Google Drive file, update the file name in Drive
-            if 'id=' in material.url:
-                file_id = material.url.split('id=')[-1]
+            file_id = drive_file_id(material.url)
+            # Deduplicated uploads share one Drive file; its name is left alone while others use it
+            shared = file_id and Material.query.filter(
+                Material.url == material.url, Material.id != material.id
+            ).first() is not None
+            if file_id and not shared:
                 service = get_google_drive_service()
                 
                 # Update file metadata in Google Drive
@@ -2714,6 +4414,64 @@ def get_rooms():
         print(f"Error fetching rooms: {str(e)}")
         return jsonify({'error': 'Error fetching rooms'}), 500
 
+# Longest range the booking UI may request slots for in one call
+AVAILABLE_SLOTS_MAX_DAYS = 14
+
+def session_title_instrument(title):
+    """Best-effort instrument name from a session title, for sessions without an instrument_id"""
+    if not title:
+        return None
+    if " - " in title:
+        # Format: "Name - Instrument"
+        return title.split(" - ")[1].strip()
+    # Format: "Instrument PAYG Session"
+    return title.split()[0]
+
+def load_occupancy(start_date, end_date):
+    """
+    Build an OccupancyIndex of every session between start_date and end_date (inclusive).
+    Each booking is recorded under its room, its instrument and ALL_RESOURCES,
+    using the session's real duration. Unmaterialized rule occurrences count too.
+    """
+    rows = db.session.query(
+        Session.date,
+        Session.time,
+        Session.duration,
+        Session.room_id,
+        Session.title,
+        Instrument.name
+    ).outerjoin(
+        Instrument, Session.instrument_id == Instrument.id
+    ).filter(
+        Session.date >= start_date,
+        Session.date <= end_date
+    ).all()
+    rows.extend(
+        (occurrence_date, rule.time, rule.duration, rule.room_id, rule.title,
+         rule.instrument.name if rule.instrument else None)
+        for rule, occurrence_date in expand_occurrences(start_date, end_date)
+    )
+
+    occupancy = OccupancyIndex()
+    for session_date, session_time, duration, room_id, title, instrument_name in rows:
+        keys = [ALL_RESOURCES]
+        if room_id:
+            keys.append(room_key(room_id))
+        instrument_name = instrument_name or session_title_instrument(title)
+        if instrument_name:
+            keys.append(instrument_key(instrument_name))
+        occupancy.add(session_date, keys, minute_of_day(session_time), duration)
+    return occupancy
+
+def occupancy_keys(instrument=None, room_id=None):
+    """Resource keys to check for a request; with no room or instrument every booking counts"""
+    keys = []
+    if room_id:
+        keys.append(room_key(room_id))
+    if instrument:
+        keys.append(instrument_key(instrument))
+    return keys or [ALL_RESOURCES]
+
 @app.route('/check-session-availability', methods=['POST'])
 def check_session_availability():
     try:
@@ -2734,17 +4492,25 @@ def check_session_availability():
             requested_datetime = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
         except ValueError:
             return jsonify({'error': 'Invalid date or time format'}), 400
-            
+        
+        # Band practice runs 1.5 hours unless the caller says otherwise
+        try:
+            duration = int(data.get('duration', 90))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid duration'}), 400
+        if not is_valid_duration(duration):
+            return jsonify({
+                'error': f'Duration must be a multiple of {SLOT_MINUTES} minutes up to {MAX_DURATION_MINUTES}'
+            }), 400
+        
+        room = None
         # For band practice, check room capacity
         if instrument:
             # Get the room for this instrument
             room = Room.query.filter_by(name=f"{instrument} Room").first()
             if room:
                 # Find existing group for this term and instrument
-                term = Term.query.filter(
-                    Term.start_date <= date,
-                    Term.end_date >= date
-                ).first()
+                term = get_term_schedule().term_for(requested_datetime.date())
                 
                 if term:
                     group_name = f"{term.name} - {instrument}"
@@ -2759,23 +4525,15 @@ def check_session_availability():
                                 'message': 'This time slot is fully booked'
                             })
         
-        # Check for overlapping sessions
-        existing_sessions = Session.query.filter_by(date=date).all()
-        
-        for session in existing_sessions:
-            # Parse the session time
-            try:
-                session_time = datetime.strptime(session.time, "%H:%M").time()
-                session_datetime = datetime.combine(requested_datetime.date(), session_time)
-                
-                # Check if times overlap (assuming 1.5 hour duration for band practice)
-                if abs((session_datetime - requested_datetime).total_seconds()) < 5400:  # 1.5 hours = 5400 seconds
-                    return jsonify({
-                        'available': False,
-                        'message': 'This time slot is already booked'
-                    })
-            except ValueError:
-                continue
+        # Check the requested interval against the room and instrument bookings for the day
+        requested_date = requested_datetime.date()
+        occupancy = load_occupancy(requested_date, requested_date)
+        keys = occupancy_keys(instrument=instrument, room_id=room.id if room else None)
+        if not occupancy.is_free(requested_date, keys, minute_of_day(requested_datetime), duration):
+            return jsonify({
+                'available': False,
+                'message': 'This time slot is already booked'
+            })
         
         return jsonify({
             'available': True,
@@ -2790,57 +4548,250 @@ def check_session_availability():
 def get_available_slots():
     date = request.args.get('date')
     instrument = request.args.get('instrument')
+    room_id = request.args.get('room_id')
     
     if not date:
         return jsonify({'error': 'Date parameter is required'}), 400
     
-    # Generate all possible time slots (15-minute intervals from 9:00 to 21:00)
-    all_slots = []
-    start_time = datetime.strptime('09:00', '%H:%M')
-    end_time = datetime.strptime('21:00', '%H:%M')
-    
-    current_time = start_time
-    while current_time <= end_time:
-        all_slots.append(current_time.strftime('%H:%M'))
-        current_time += timedelta(minutes=15)
+    try:
+        date = parse_session_date(date)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    # Find booked slots
-    booked_slots = []
-    existing_sessions = Session.query.filter(
-        Session.date == date
-    ).all()
+    try:
+        days = int(request.args.get('days', 1))
+        duration = int(request.args.get('duration', SLOT_MINUTES))
+        room_id = int(room_id) if room_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid days, duration or room ID'}), 400
+    if not is_valid_duration(duration):
+        return jsonify({
+            'error': f'Duration must be a multiple of {SLOT_MINUTES} minutes up to {MAX_DURATION_MINUTES}'
+        }), 400
+    days = max(1, min(days, AVAILABLE_SLOTS_MAX_DAYS))
+    
+    # One query and one pass over the bitmap for the whole range
+    end_date = date + timedelta(days=days - 1)
+    occupancy = load_occupancy(date, end_date)
+    slot_days = occupancy.free_slots(
+        date, days, occupancy_keys(instrument=instrument, room_id=room_id), duration
+    )
     
-    for session in existing_sessions:
-        # Extract instrument from session title
-        session_instrument = None
-        if session.title:
-            if " - " in session.title:
-                # Format: "Name - Instrument"
-                session_instrument = session.title.split(" - ")[1].strip()
-            else:
-                # Format: "Instrument PAYG Session"
-                session_instrument = session.title.split()[0]
-        
-        # Only consider sessions with matching instrument
-        if session_instrument and session_instrument.lower() == instrument.lower():
-            session_start = datetime.strptime(session.time, '%H:%M')
-            session_end = session_start + timedelta(minutes=session.duration)
-            
-            # Add all 15-minute slots that overlap with this session
-            current = session_start
-            while current < session_end:
-                booked_slots.append(current.strftime('%H:%M'))
-                current += timedelta(minutes=15)
-    
-    # Create response with availability for each slot
-    available_slots = []
-    for slot in all_slots:
-        available_slots.append({
-            'time': slot,
-            'available': slot not in booked_slots
+    # Create response with availability for each 15-minute slot from 9:00 to 21:00
+    results = []
+    for slot_date, day_slots in slot_days:
+        results.append({
+            'date': slot_date.strftime('%Y-%m-%d'),
+            'slots': [
+                {'time': format_minute(minute), 'available': available}
+                for minute, available in day_slots
+            ]
         })
     
-    return jsonify(available_slots), 200
+    if days == 1:
+        return jsonify(results[0]['slots']), 200
+    return jsonify({'days': results}), 200
+
+def load_room_bookings(booking_date, room_ids=None):
+    """
+    Bookings on booking_date grouped by room ID, sorted by time.
+    Stored sessions come from one query: group and user names are joined in
+    and member counts come from a grouped subquery. Rule occurrences for the
+    day are added with their group/user names and counts fetched in bulk.
+    room_ids limits the result to those rooms.
+    """
+    now = datetime.now()
+    member_counts = db.session.query(
+        GroupMember.group_id,
+        func.count(GroupMember.id).label('member_count')
+    ).group_by(GroupMember.group_id).subquery()
+
+    query = db.session.query(
+        Session.id,
+        Session.title,
+        Session.time,
+        Session.duration,
+        Session.room_id,
+        Session.group_id,
+        Group.name,
+        User.username,
+        member_counts.c.member_count
+    ).outerjoin(
+        Group, Session.group_id == Group.id
+    ).outerjoin(
+        User, Session.user_id == User.id
+    ).outerjoin(
+        member_counts, member_counts.c.group_id == Session.group_id
+    ).filter(
+        Session.date == booking_date,  # uses the (date, room_id) index
+        Session.room_id.isnot(None)
+    )
+    rule_filter = RecurrenceRule.room_id.isnot(None)
+    if room_ids is not None:
+        query = query.filter(Session.room_id.in_(room_ids))
+        rule_filter = RecurrenceRule.room_id.in_(room_ids)
+    rows = query.all()
+
+    occurrences = expand_occurrences(booking_date, booking_date, rule_filter)
+    if occurrences:
+        group_ids = {rule.group_id for rule, _ in occurrences if rule.group_id}
+        user_ids = {rule.user_id for rule, _ in occurrences if rule.user_id}
+        group_info = {
+            group_id: (name, count)
+            for group_id, name, count in db.session.query(
+                Group.id, Group.name, member_counts.c.member_count
+            ).outerjoin(
+                member_counts, member_counts.c.group_id == Group.id
+            ).filter(Group.id.in_(group_ids))
+        } if group_ids else {}
+        usernames = dict(
+            db.session.query(User.id, User.username).filter(User.id.in_(user_ids))
+        ) if user_ids else {}
+        for rule, occurrence_date in occurrences:
+            group_name, member_count = group_info.get(rule.group_id, (None, None))
+            rows.append((
+                occurrence_id(rule.id, occurrence_date), rule.title, rule.time, rule.duration,
+                rule.room_id, rule.group_id, group_name, usernames.get(rule.user_id), member_count
+            ))
+
+    capacities = dict(db.session.query(Room.id, Room.capacity))
+    bookings = {}
+    for session_id, title, start, duration, room_id, group_id, group_name, username, member_count in rows:
+        # A group session whose group no longer exists is not shown
+        if group_id and group_name is None:
+            continue
+
+        start_time = datetime.combine(booking_date, start)
+        end_time = start_time + timedelta(minutes=duration)
+        booking = {
+            'id': session_id,
+            'name': group_name if group_id else (username or "Unknown User"),
+            'time': start.strftime('%H:%M'),
+            'end_time': end_time.strftime('%H:%M'),
+            'duration': duration,
+            # Extract instrument from the last word of the title
+            'instrument': title.split()[-1].strip() if title and title.split() else None,
+            'is_group': bool(group_id),
+            'is_active': start_time <= now.replace(second=0, microsecond=0) <= end_time
+        }
+        if group_id:
+            current_members = member_count or 0
+            capacity = capacities.get(room_id)
+            booking.update({
+                'current_members': current_members,
+                'capacity': capacity,
+                'is_full': capacity is not None and current_members >= capacity
+            })
+        bookings.setdefault(room_id, []).append(booking)
+
+    for room_bookings in bookings.values():
+        room_bookings.sort(key=lambda x: x['time'])
+    return bookings
+
+def room_bookings_payload(booking_date):
+    """Bookings of every room on booking_date, as served by /api/room-bookings"""
+    bookings = load_room_bookings(booking_date)
+    rooms = Room.query.order_by(Room.id).all()
+    return {
+        'date': booking_date.strftime('%Y-%m-%d'),
+        'rooms': [
+            {
+                'room_id': room.id,
+                'room_name': room.name,
+                'capacity': room.capacity,
+                'bookings': bookings.get(room.id, [])
+            }
+            for room in rooms
+        ]
+    }
+
+@app.route('/api/room-bookings', methods=['GET'])
+@login_required
+def get_all_room_bookings():
+    """Get bookings for every room on a date in one request."""
+    # Check if user is admin or staff
+    if 'user' not in session or session['user']['role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    date = request.args.get('date')
+    if not date:
+        return jsonify({'error': 'Date parameter is required'}), 400
+    
+    try:
+        booking_date = parse_session_date(date)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    try:
+        return jsonify(room_bookings_payload(booking_date))
+    except Exception as e:
+        print(f"ERROR in get_all_room_bookings: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Longest a room booking stream stays open before the browser has to reconnect.
+# Each open stream occupies a web worker and reads the change log every
+# POLL_SECONDS, so streaming is opt-in; at 0 the dashboard polls bookings.
+BOOKING_STREAM_SECONDS = int(os.getenv('BOOKING_STREAM_SECONDS', 0))
+
+@app.route('/api/room-bookings/stream', methods=['GET'])
+@login_required
+def stream_room_bookings():
+    """
+    Server-Sent Events stream of the bookings of every room on a date.
+    Sends a 'bookings' event on connect, after any session, room or group
+    change saved by any worker and whenever a booking becomes active or
+    finishes. Changes are found by polling the change log version, one
+    indexed read every POLL_SECONDS. The stream ends after
+    BOOKING_STREAM_SECONDS and EventSource reopens it.
+    """
+    # Check if user is admin or staff
+    if 'user' not in session or session['user']['role'] not in ['admin', 'staff']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        booking_date = parse_session_date(request.args.get('date', ''))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    if BOOKING_STREAM_SECONDS <= 0:
+        # EventSource stops reconnecting on a 204
+        return '', 204
+    
+    watched_tables = SESSION_SYNC_TABLES + GROUP_SYNC_TABLES
+    
+    def generate():
+        deadline = time.monotonic() + BOOKING_STREAM_SECONDS
+        version = get_latest_change_id(*watched_tables)
+        payload = room_bookings_payload(booking_date)
+        # Give the connection back to the pool between polls
+        db.session.close()
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        yield format_event('bookings', payload)
+        last_sent = time.monotonic()
+        
+        while time.monotonic() < deadline:
+            time.sleep(min(POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+            
+            latest = get_latest_change_id(*watched_tables)
+            changed = latest != version
+            if changed:
+                version = latest
+                payload = room_bookings_payload(booking_date)
+            db.session.close()
+            
+            # A reload has fresh is_active flags; otherwise recompute them from the last payload
+            if changed or refresh_active_flags(booking_date, payload['rooms'], datetime.now()):
+                yield format_event('bookings', payload)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/room-bookings/<room_name>', methods=['GET'])
 @login_required
@@ -2855,12 +4806,6 @@ def get_room_bookings(room_name):
         return jsonify({'error': 'Date parameter is required'}), 400
     
     try:
-        print(f"DEBUG: Getting bookings for room '{room_name}' on date '{date}'")
-        
-        # Get current time for real-time status
-        current_time = datetime.now().strftime('%H:%M')
-        current_date = datetime.now().strftime('%Y-%m-%d')
-        
         # Get the room by name
         room = Room.query.filter_by(name=room_name).first()
         if not room:
@@ -2870,77 +4815,11 @@ def get_room_bookings(room_name):
                 'bookings': []
             })
         
-        # Get all sessions for the specified date and room
-        sessions = Session.query.filter_by(date=date, room_id=room.id).all()
-        print(f"DEBUG: Found {len(sessions)} sessions for room {room_name} on date {date}")
-        
-        bookings = []
-        
-        for session_obj in sessions:
-            print(f"DEBUG: Processing session: ID={session_obj.id}, Title={session_obj.title}")
-            
-            # Calculate session end time
-            start_time = datetime.strptime(session_obj.time, '%H:%M')
-            end_time = start_time + timedelta(minutes=session_obj.duration)
-            end_time_str = end_time.strftime('%H:%M')
-            
-            # Determine if session is currently active
-            is_active = False
-            if date == current_date:
-                session_start = datetime.strptime(session_obj.time, '%H:%M')
-                session_end = session_start + timedelta(minutes=session_obj.duration)
-                current = datetime.strptime(current_time, '%H:%M')
-                is_active = session_start <= current <= session_end
-            
-            # Extract instrument from the last word of the title
-            instrument = None
-            if session_obj.title:
-                instrument = session_obj.title.split()[-1].strip()
-            
-            # Handle group sessions
-            if session_obj.group_id:
-                group = db.session.get(Group, session_obj.group_id)
-                if group:
-                    # Count current members
-                    current_members = GroupMember.query.filter_by(group_id=group.id).count()
-                    
-                    bookings.append({
-                        'id': session_obj.id,
-                        'name': group.name,
-                        'time': session_obj.time,
-                        'end_time': end_time_str,
-                        'duration': session_obj.duration,
-                        'instrument': instrument,
-                        'is_group': True,
-                        'current_members': current_members,
-                        'capacity': room.capacity,
-                        'is_full': current_members >= room.capacity,
-                        'is_active': is_active
-                    })
-            else:
-                # Handle individual sessions
-                user = db.session.get(User, session_obj.user_id)
-                user_name = user.username if user else "Unknown User"
-                
-                bookings.append({
-                    'id': session_obj.id,
-                    'name': user_name,
-                    'time': session_obj.time,
-                    'end_time': end_time_str,
-                    'duration': session_obj.duration,
-                    'instrument': instrument,
-                    'is_group': False,
-                    'is_active': is_active
-                })
-        
-        # Sort bookings by time
-        bookings.sort(key=lambda x: x['time'])
-        print(f"DEBUG: Returning {len(bookings)} bookings for room '{room_name}'")
-        
+        bookings = load_room_bookings(parse_session_date(date), [room.id])
         return jsonify({
             'room_name': room_name,
             'date': date,
-            'bookings': bookings
+            'bookings': bookings.get(room.id, [])
         })
     except Exception as e:
         print(f"ERROR in get_room_bookings: {str(e)}")
@@ -3227,7 +5106,16 @@ def export_student_data():
         # Get group IDs for this student
         group_ids = [gm.group_id for gm in GroupMember.query.filter_by(student_id=user.id).all()]
         # Get all group sessions for these groups
-        group_sessions = Session.query.filter(Session.group_id.in_(group_ids)).all() if group_ids else []
+        group_sessions = session_list_query().filter(Session.group_id.in_(group_ids)).all() if group_ids else []
+        own_sessions = session_list_query().filter(Session.user_id == user.id).all()
+        # Recurring series are stored as rules, so their occurrences are expanded like in the other feeds
+        own_session_dicts = [session.to_dict() for session in own_sessions]
+        own_session_dicts.extend(all_occurrence_dicts(RecurrenceRule.user_id == user.id))
+        own_session_dicts.sort(key=lambda s: (s['date'], s['time']))
+        group_session_dicts = [session.to_dict() for session in group_sessions]
+        if group_ids:
+            group_session_dicts.extend(all_occurrence_dicts(RecurrenceRule.group_id.in_(group_ids)))
+        group_session_dicts.sort(key=lambda s: (s['date'], s['time']))
         # Get all user data
         user_data = {
             'personal_info': {
@@ -3237,9 +5125,12 @@ def export_student_data():
                 'instrument_id': user.instrument_id,
                 'instrument': user.instrument.name if user.instrument else None
             },
-            'sessions': [session.to_dict() for session in user.sessions],
-            'group_sessions': [session.to_dict() for session in group_sessions],
-            'materials': [material.to_dict() for material in user.materials],
+            'sessions': own_session_dicts,
+            'group_sessions': group_session_dicts,
+            'materials': [
+                material.to_dict()
+                for material in Material.query.options(db.joinedload(Material.instrument)).filter_by(user_id=user.id)
+            ],
             'allocated_materials': [allocation.to_dict() for allocation in user.allocated_materials]
         }
         # Create response with JSON data
@@ -3652,31 +5543,15 @@ def admin_events():
         if image and image.filename:
             try:
                 service = get_google_drive_service()
-                # Only use Events Page folder at the root
-                events_folder = service.files().list(
-                    q="name='Events Page' and mimeType='application/vnd.google-apps.folder' and 'root' in parents and trashed=false",
-                    fields="files(id, name)"
-                ).execute()
-                if not events_folder.get('files'):
-                    # Create Events Page folder at root if not found
-                    events_folder_id = create_folder(service, 'Events Page')
-                else:
-                    events_folder_id = events_folder['files'][0]['id']
-                # Save image to temp file
-                temp_path = os.path.join(app.root_path, 'temp', secure_filename(image.filename))
-                os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-                image.save(temp_path)
-                # Upload to Google Drive
+                # Stream to Google Drive, into the Events Page folder at the root
                 mime_type = image.content_type or 'application/octet-stream'
-                file_id = upload_file(
-                    service=service,
-                    file_path=temp_path,
-                    file_name=secure_filename(image.filename),
-                    mime_type=mime_type,
-                    folder_id=events_folder_id
+                file_id = upload_file_to_folder(
+                    service,
+                    image.stream,
+                    secure_filename(image.filename),
+                    mime_type,
+                    'Events Page'
                 )
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
                 image_url = f'https://drive.google.com/uc?id={file_id}'
             except Exception as e:
                 flash(f'Error uploading image: {str(e)}', 'error')
@@ -3715,47 +5590,17 @@ def edit_event(event_id):
         if image and image.filename:
             # Upload to Google Drive under MPA Materials/Events Page
             service = get_google_drive_service()
-            # Get or create MPA Materials folder
-            main_folder = service.files().list(
-                q="name='MPA Materials' and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                fields="files(id, name)"
-            ).execute()
-            
-            if not main_folder.get('files'):
-                mpa_folder_id = create_folder(service, "MPA Materials")
-            else:
-                mpa_folder_id = main_folder['files'][0]['id']
-            
-            # Get or create the Events Page folder
-            events_folder = service.files().list(
-                q=f"name='Events Page' and '{mpa_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                fields="files(id, name)"
-            ).execute()
             
-            if not events_folder.get('files'):
-                events_folder_id = create_folder(service, "Events Page", mpa_folder_id)
-            else:
-                events_folder_id = events_folder['files'][0]['id']
-                
-            # Save image to temp file
-            temp_path = os.path.join(app.root_path, 'temp', secure_filename(image.filename))
-            os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-            image.save(temp_path)
-            
-            # Upload to Google Drive
+            # Stream to Google Drive
             mime_type = image.content_type or 'application/octet-stream'
-            file_id = upload_file(
-                service=service,
-                file_path=temp_path,
-                file_name=secure_filename(image.filename),
-                mime_type=mime_type,
-                folder_id=events_folder_id
+            file_id = upload_file_to_folder(
+                service,
+                image.stream,
+                secure_filename(image.filename),
+                mime_type,
+                "MPA Materials", "Events Page"
             )
             
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                
             # Create the direct access URL
             image_url = f'https://drive.google.com/uc?id={file_id}'
         db.session.commit()
@@ -3776,6 +5621,7 @@ def delete_event(event_id):
             file_id = event.image_url.split('id=')[-1]
             service = get_google_drive_service()
             delete_file(service, file_id)
+            file_cache.discard(file_id)
             print(f"Deleted file from Google Drive with ID: {file_id}")
         except Exception as e:
             print(f"Error deleting file from Google Drive: {str(e)}")
@@ -3794,61 +5640,89 @@ def events():
 # Create the events table if it doesn't exist
 with app.app_context():
     db.create_all()
+    ensure_material_search_index()
 
 
 
-@app.route('/api/sessions/<int:session_id>/attendance', methods=['GET'])
+@app.route('/api/sessions/<int(signed=True):session_id>/attendance', methods=['GET'])
 @login_required
 def get_session_attendance(session_id):
     if current_user.role not in ['admin', 'staff']:
         return jsonify({'error': 'Unauthorized'}), 403
         
+    if session_id < 0:
+        # Occurrences only get a row once attendance is recorded
+        session = materialized_session(session_id)
+        if not session:
+            if not get_occurrence(session_id):
+                abort(404)
+            return jsonify([])
+        session_id = session.id
+    
     session = Session.query.get_or_404(session_id)
     attendances = Attendance.query.filter_by(session_id=session_id).all()
     
     return jsonify([attendance.to_dict() for attendance in attendances])
 
-@app.route('/api/sessions/<int:session_id>/attendance', methods=['POST'])
+def upsert_attendance(session_id, records):
+    """
+    Record a register: (student_id, status, notes) per student, inserted or
+    updated in one INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT on SQLite)
+    against the unique (session_id, student_id) index. The caller commits.
+    """
+    now = datetime.now(pytz.timezone('Europe/London'))
+    # A student listed twice keeps the last entry
+    rows = list({
+        student_id: {
+            'session_id': session_id,
+            'student_id': student_id,
+            'status': status,
+            'notes': notes,
+            'recorded_by': current_user.id,
+            'recorded_at': now
+        }
+        for student_id, status, notes in records
+    }.values())
+    if not rows:
+        return
+    
+    if db.session.get_bind().dialect.name == 'sqlite':
+        statement = sqlite_insert(Attendance).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['session_id', 'student_id'],
+            set_={column: statement.excluded[column] for column in ('status', 'notes', 'recorded_by', 'recorded_at')}
+        )
+    else:
+        statement = mysql_insert(Attendance).values(rows)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in ('status', 'notes', 'recorded_by', 'recorded_at')}
+        )
+    db.session.execute(statement)
+
+@app.route('/api/sessions/<int(signed=True):session_id>/attendance', methods=['POST'])
 @login_required
 def record_attendance(session_id):
     if current_user.role not in ['admin', 'staff']:
         return jsonify({'error': 'Unauthorized'}), 403
         
+    class_session = materialize_session(session_id)
+    if not class_session:
+        return jsonify({'error': 'Session not found'}), 404
+    session_id = class_session.id
+    
     data = request.get_json()
     if not data or 'student_id' not in data or 'status' not in data:
         return jsonify({'error': 'Missing required fields'}), 400
         
-    # Check if attendance record already exists
-    existing = Attendance.query.filter_by(
-        session_id=session_id,
-        student_id=data['student_id']
-    ).first()
-    
-    if existing:
-        # Update existing record
-        existing.status = data['status']
-        existing.notes = data.get('notes')
-        existing.recorded_by = current_user.id
-        existing.recorded_at = datetime.now(pytz.timezone('Europe/London'))
-    else:
-        # Create new record
-        attendance = Attendance(
-            session_id=session_id,
-            student_id=data['student_id'],
-            status=data['status'],
-            notes=data.get('notes'),
-            recorded_by=current_user.id
-        )
-        db.session.add(attendance)
-    
     try:
+        upsert_attendance(session_id, [(data['student_id'], data['status'], data.get('notes'))])
         db.session.commit()
         return jsonify({'message': 'Attendance recorded successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/sessions/<int:session_id>/attendance/bulk', methods=['POST'])
+@app.route('/api/sessions/<int(signed=True):session_id>/attendance/bulk', methods=['POST'])
 @login_required
 def record_bulk_attendance(session_id):
     if current_user.role not in ['admin', 'staff']:
@@ -3858,46 +5732,35 @@ def record_bulk_attendance(session_id):
     if not data or not isinstance(data, list):
         return jsonify({'error': 'Invalid data format'}), 400
         
+    class_session = materialize_session(session_id)
+    if not class_session:
+        return jsonify({'error': 'Session not found'}), 404
+    session_id = class_session.id
+    
     try:
-        for record in data:
-            if 'student_id' not in record or 'status' not in record:
-                continue
-                
-            existing = Attendance.query.filter_by(
-                session_id=session_id,
-                student_id=record['student_id']
-            ).first()
-            
-            if existing:
-                existing.status = record['status']
-                existing.notes = record.get('notes')
-                existing.recorded_by = current_user.id
-                existing.recorded_at = datetime.now(pytz.timezone('Europe/London'))
-            else:
-                attendance = Attendance(
-                    session_id=session_id,
-                    student_id=record['student_id'],
-                    status=record['status'],
-                    notes=record.get('notes'),
-                    recorded_by=current_user.id
-                )
-                db.session.add(attendance)
-        
+        upsert_attendance(session_id, [
+            (record['student_id'], record['status'], record.get('notes'))
+            for record in data
+            if 'student_id' in record and 'status' in record
+        ])
         db.session.commit()
         return jsonify({'message': 'Attendance records updated successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/sessions/<int:session_id>/attendance', methods=['POST'])
+@app.route('/sessions/<int(signed=True):session_id>/attendance', methods=['POST'])
 @login_required
 def record_attendance_form(session_id):
     if current_user.role not in ['admin', 'staff']:
         flash('You do not have permission to record attendance.', 'error')
         return redirect(url_for('dashboard'))
     
-    # Get the session
-    class_session = Session.query.get_or_404(session_id)
+    # Get the session, storing a rule occurrence as a row first
+    class_session = materialize_session(session_id)
+    if not class_session:
+        abort(404)
+    session_id = class_session.id
     
     # Check if we received form data or JSON data
     if request.content_type and 'application/json' in request.content_type:
@@ -3905,30 +5768,11 @@ def record_attendance_form(session_id):
         data = request.get_json()
         if isinstance(data, list):
             try:
-                for record in data:
-                    if 'student_id' not in record or 'status' not in record:
-                        continue
-                        
-                    existing = Attendance.query.filter_by(
-                        session_id=session_id,
-                        student_id=record['student_id']
-                    ).first()
-                    
-                    if existing:
-                        existing.status = record['status']
-                        existing.notes = record.get('notes', '')
-                        existing.recorded_by = current_user.id
-                        existing.recorded_at = datetime.now(pytz.timezone('Europe/London'))
-                    else:
-                        attendance = Attendance(
-                            session_id=session_id,
-                            student_id=record['student_id'],
-                            status=record['status'],
-                            notes=record.get('notes', ''),
-                            recorded_by=current_user.id
-                        )
-                        db.session.add(attendance)
-                
+                upsert_attendance(session_id, [
+                    (record['student_id'], record['status'], record.get('notes', ''))
+                    for record in data
+                    if 'student_id' in record and 'status' in record
+                ])
                 db.session.commit()
                 return jsonify({'message': 'Attendance records updated successfully'})
             except Exception as e:
@@ -3936,36 +5780,14 @@ def record_attendance_form(session_id):
                 return jsonify({'error': str(e)}), 500
     else:
         # Process form data for each student
+        records = []
         for key, value in request.form.items():
             if key.startswith('status_'):
                 student_id = int(key.replace('status_', ''))
-                status = value
-                notes = request.form.get(f'notes_{student_id}', '')
-                
-                # Check if an attendance record already exists
-                existing = Attendance.query.filter_by(
-                    session_id=session_id,
-                    student_id=student_id
-                ).first()
-                
-                if existing:
-                    # Update existing record
-                    existing.status = status
-                    existing.notes = notes
-                    existing.recorded_by = current_user.id
-                    existing.recorded_at = datetime.now(pytz.timezone('Europe/London'))
-                else:
-                    # Create new record
-                    attendance = Attendance(
-                        session_id=session_id,
-                        student_id=student_id,
-                        status=status,
-                        notes=notes,
-                        recorded_by=current_user.id
-                    )
-                    db.session.add(attendance)
+                records.append((student_id, value, request.form.get(f'notes_{student_id}', '')))
         
         try:
+            upsert_attendance(session_id, records)
             db.session.commit()
             flash('Attendance recorded successfully', 'success')
         except Exception as e:
@@ -3974,14 +5796,26 @@ def record_attendance_form(session_id):
         
         return redirect(url_for('view_attendance', session_id=session_id))
 
-@app.route('/sessions/<int:session_id>/attendance')
+@app.route('/sessions/<int(signed=True):session_id>/attendance')
 @login_required
 def view_attendance(session_id):
     if current_user.role not in ['admin', 'staff']:
         flash('You do not have permission to view attendance records.', 'error')
         return redirect(url_for('dashboard'))
-        
-    class_session = Session.query.get_or_404(session_id)
+    
+    if session_id < 0:
+        class_session = materialized_session(session_id)
+        if class_session:
+            return redirect(url_for('view_attendance', session_id=class_session.id))
+        occurrence = get_occurrence(session_id)
+        if not occurrence:
+            abort(404)
+        # Shown from its rule without writing a row; saving the register stores the occurrence
+        rule, occurrence_date = occurrence
+        class_session = rule.occurrence_session(occurrence_date)
+        db.session.enable_relationship_loading(class_session)
+    else:
+        class_session = Session.query.get_or_404(session_id)
     group = class_session.group
     students = []
     
@@ -4063,12 +5897,12 @@ def get_attendance_data():
             Instrument, Session.instrument_id == Instrument.id
         )
         
-        # Apply filters
+        # Apply filters (date range filters use the native DATE column indexes)
         if start_date:
-            query = query.filter(Session.date >= start_date)
+            query = query.filter(Session.date >= parse_session_date(start_date))
         
         if end_date:
-            query = query.filter(Session.date <= end_date)
+            query = query.filter(Session.date <= parse_session_date(end_date))
         
         if student_id:
             query = query.filter(Attendance.student_id == student_id)
@@ -4114,8 +5948,8 @@ def get_attendance_data():
                 'status': attendance.status,
                 'notes': attendance.notes,
                 'invoiced': attendance.invoiced,
-                'date': date,
-                'time': time,
+                'date': date.strftime('%Y-%m-%d') if date else None,
+                'time': time.strftime('%H:%M') if time else None,
                 'instrument': instrument_name,
                 'group_id': group_id,
                 'duration': duration,
@@ -4165,32 +5999,27 @@ def get_current_term():
     if current_user.role not in ['admin', 'staff']:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    # Query to find current term based on current date
-    current_term = Term.query.filter(
-        Term.start_date <= datetime.now(pytz.timezone('Europe/London')).date(),
-        Term.end_date >= datetime.now(pytz.timezone('Europe/London')).date()
-    ).order_by(Term.display_order).first()
+    # Find the current term from the cached term calendar
+    today = datetime.now(pytz.timezone('Europe/London')).date()
+    schedule = get_term_schedule()
+    current_term = schedule.term_for(today)
     
     if not current_term:
         # If no current term, return upcoming term or most recent term
-        upcoming_term = Term.query.filter(
-            Term.start_date > datetime.now(pytz.timezone('Europe/London')).date()
-        ).order_by(Term.start_date).first()
+        upcoming_term = schedule.next_term(today)
         
         if upcoming_term:
-            return jsonify(upcoming_term.to_dict())
+            return jsonify(upcoming_term.term)
             
         # If no upcoming term, get the most recent past term
-        past_term = Term.query.filter(
-            Term.end_date < datetime.now(pytz.timezone('Europe/London')).date()
-        ).order_by(Term.end_date.desc()).first()
+        past_term = schedule.previous_term(today)
         
         if past_term:
-            return jsonify(past_term.to_dict())
+            return jsonify(past_term.term)
             
         return jsonify({})
     
-    return jsonify(current_term.to_dict())
+    return jsonify(current_term.term)
 
 # API endpoint to get students for filters
 @app.route('/api/students')
@@ -4241,8 +6070,8 @@ def get_groups_api():
                 'id': group.id,
                 'name': group.name,
                 'description': group.description,
-                'member_count': len(group.members) if group.members else 0,
-                'material_count': len(group.material_allocations) if group.material_allocations else 0
+                'member_count': group.member_count,
+                'material_count': group.material_count
             })
         
         return jsonify(group_data)
@@ -5367,14 +7196,15 @@ def delete_music_ai_file(file_id):
         app.logger.error(f"Error deleting Music AI file {file_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/sessions/<int:session_id>', methods=['PUT'])
+@app.route('/api/sessions/<int(signed=True):session_id>', methods=['PUT'])
 @login_required
 def update_session(session_id):
     # Only admin and staff can update sessions
     if current_user.role not in ['admin', 'staff']:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    session = db.session.get(Session, session_id)
+    # Editing an occurrence of a recurrence rule stores it as an override row
+    session = materialize_session(session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
     
@@ -5387,9 +7217,9 @@ def update_session(session_id):
         if 'title' in data:
             session.title = data['title']
         if 'date' in data:
-            session.date = data['date']
+            session.date = parse_session_date(data['date'])
         if 'time' in data:
-            session.time = data['time']
+            session.time = parse_session_time(data['time'])
         if 'duration' in data:
             session.duration = data['duration']
         if 'group_id' in data:
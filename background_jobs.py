@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Background Work Runner for Music Performance Academy
+
+Material uploads and Drive file deletions are normally handled by threads
+inside the web workers. Where web workers cannot run threads, or to catch up after a
+restart, run this script as a scheduled or always-on task instead.
+
+Usage:
+    python background_jobs.py            # one pass
+    python background_jobs.py --forever  # keep running, one pass every 30 seconds
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, stale_upload_ids, process_material_upload, process_drive_deletions
+
+PASS_INTERVAL_SECONDS = 30
+
+def run_pending_uploads():
+    """Send every queued or abandoned material upload to Drive on this thread"""
+    with app.app_context():
+        upload_ids = stale_upload_ids(include_queued=True)
+    for upload_id in upload_ids:
+        process_material_upload(upload_id)
+    return len(upload_ids)
+
+def run_once():
+    uploads = run_pending_uploads()
+    print(f"Processed {uploads} pending uploads")
+    process_drive_deletions()
+
+if __name__ == '__main__':
+    if '--forever' in sys.argv:
+        while True:
+            run_once()
+            time.sleep(PASS_INTERVAL_SECONDS)
+    else:
+        run_once()
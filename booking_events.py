@@ -0,0 +1,30 @@
+import json
+from datetime import datetime
+
+# Seconds between comment lines that keep idle streams (and proxies) open
+KEEPALIVE_SECONDS = 25
+# Seconds between checks of the change log for new booking changes
+POLL_SECONDS = 5
+# How long the browser waits before reopening a stream the server closed
+RECONNECT_MILLISECONDS = 3000
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _booking_bounds(day, booking):
+    start = datetime.combine(day, datetime.strptime(booking['time'], '%H:%M').time())
+    end = datetime.combine(day, datetime.strptime(booking['end_time'], '%H:%M').time())
+    return start, end
+
+def refresh_active_flags(day, rooms, now):
+    """Recompute is_active for every booking in a room bookings payload; True if any flag changed"""
+    now = now.replace(second=0, microsecond=0)
+    changed = False
+    for room in rooms:
+        for booking in room['bookings']:
+            start, end = _booking_bounds(day, booking)
+            is_active = start <= now <= end
+            if booking['is_active'] != is_active:
+                booking['is_active'] = is_active
+                changed = True
+    return changed
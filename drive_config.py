@@ -4,9 +4,13 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-import io
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+import json
 import logging
+import threading
+import time
+from datetime import datetime, timedelta
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -15,8 +19,106 @@ logger = logging.getLogger(__name__)
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 
-def get_google_drive_service():
-    logger.debug("Starting Google Drive service initialization")
+# Bytes sent per resumable upload request (a multiple of 256 KiB, as Drive requires)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Folder path -> Drive folder ID, kept across restarts
+FOLDER_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'drive_folders.json')
+
+class FolderCache:
+    """
+    Drive folder IDs by path (e.g. "MPA Materials/Guitar"), persisted to a JSON
+    file. Entries are trusted until Drive answers 404 for them.
+    """
+
+    def __init__(self, path=FOLDER_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._folders = None
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._folders, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def get(self, folder_path):
+        with self._lock:
+            if self._folders is None or folder_path not in self._folders:
+                # Another process may have resolved it since we last read the file
+                self._folders = self._read()
+            return self._folders.get(folder_path)
+
+    def set(self, folder_path, folder_id):
+        with self._lock:
+            self._folders = self._read()
+            self._folders[folder_path] = folder_id
+            self._write()
+
+    def forget(self, folder_path):
+        """Drop folder_path and everything below it"""
+        with self._lock:
+            self._folders = {
+                path: folder_id for path, folder_id in self._read().items()
+                if path != folder_path and not path.startswith(folder_path + '/')
+            }
+            self._write()
+
+folder_cache = FolderCache()
+
+def is_not_found(error):
+    return isinstance(error, HttpError) and error.resp.status == 404
+
+# Refresh the access token when it has less than this left
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+_credentials = None
+_credentials_lock = threading.Lock()
+# httplib2 transports are not thread-safe, so each thread builds its own service
+# around the shared credentials. Sync workers have one thread, i.e. one per process.
+_local = threading.local()
+
+# Counts and total seconds of service builds and token refreshes in this process
+_metrics_lock = threading.Lock()
+drive_metrics = {
+    'builds': 0,
+    'build_seconds': 0.0,
+    'refreshes': 0,
+    'refresh_seconds': 0.0
+}
+
+def _record_timing(event, started):
+    elapsed = time.perf_counter() - started
+    with _metrics_lock:
+        drive_metrics[f'{event}s'] += 1
+        drive_metrics[f'{event}_seconds'] += elapsed
+    logger.info(f"Drive {event} took {elapsed * 1000:.0f} ms")
+
+def get_drive_metrics():
+    with _metrics_lock:
+        return dict(drive_metrics)
+
+def _save_credentials(creds):
+    with open('token.pickle', 'wb') as token:
+        logger.debug("Saving new credentials to token.pickle")
+        pickle.dump(creds, token)
+
+def _refresh_credentials(creds):
+    started = time.perf_counter()
+    creds.refresh(Request())
+    _record_timing('refresh', started)
+    _save_credentials(creds)
+
+def _load_credentials():
+    """Credentials from token.pickle, refreshed or obtained through the OAuth flow if needed"""
     creds = None
     # The file token.pickle stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first time.
@@ -29,7 +131,7 @@ def get_google_drive_service():
         logger.debug("No valid credentials found")
         if creds and creds.expired and creds.refresh_token:
             logger.debug("Refreshing expired credentials")
-            creds.refresh(Request())
+            _refresh_credentials(creds)
         else:
             logger.debug("Starting new OAuth flow")
             try:
@@ -41,22 +143,60 @@ def get_google_drive_service():
             except Exception as e:
                 logger.error(f"Error during OAuth flow: {str(e)}")
                 raise
+            # Save the credentials for the next run
+            _save_credentials(creds)
+    return creds
 
-        # Save the credentials for the next run
-        with open('token.pickle', 'wb') as token:
-            logger.debug("Saving new credentials to token.pickle")
-            pickle.dump(creds, token)
+def _current_credentials():
+    """The process's credentials, refreshed only when they are close to expiry"""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = _load_credentials()
+        elif _credentials.expiry and _credentials.refresh_token and \
+                _credentials.expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN:
+            logger.debug("Refreshing credentials close to expiry")
+            _refresh_credentials(_credentials)
+        return _credentials
 
+def get_google_drive_service():
+    """
+    Drive service for the current thread, built on first use and reused after
+    that. The credentials behind it are shared and refreshed in place, so the
+    service keeps its authorized transport across token refreshes.
+    """
+    creds = _current_credentials()
+    service = getattr(_local, 'service', None)
+    if service is not None:
+        return service
+
+    logger.debug("Building Google Drive service")
+    started = time.perf_counter()
     try:
         service = build('drive', 'v3', credentials=creds)
-        logger.debug("Successfully built Drive service")
-        return service
     except Exception as e:
         logger.error(f"Error building Drive service: {str(e)}")
         raise
+    _record_timing('build', started)
+    _local.service = service
+    return service
+
+def find_folder(service, folder_name, parent_id=None):
+    """ID of the folder called folder_name under parent_id (the Drive root if None), or None"""
+    query = (
+        f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' "
+        f"and '{parent_id or 'root'}' in parents and trashed=false"
+    )
+    existing_folders = service.files().list(
+        q=query,
+        fields="files(id, name)"
+    ).execute()
+    if existing_folders.get('files'):
+        return existing_folders['files'][0]['id']
+    return None
 
 def create_folder(service, folder_name, parent_id=None):
-    """Creates a folder in Google Drive."""
+    """Creates a folder in Google Drive. Use get_folder_id to reuse an existing one."""
     logger.debug(f"Creating folder: {folder_name}")
     file_metadata = {
         'name': folder_name,
@@ -67,19 +207,6 @@ def create_folder(service, folder_name, parent_id=None):
         logger.debug(f"Folder will be created under parent ID: {parent_id}")
 
     try:
-        # First check if folder already exists
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        if parent_id:
-            query += f" and '{parent_id}' in parents"
-        existing_folders = service.files().list(
-            q=query,
-            fields="files(id, name)"
-        ).execute()
-        if existing_folders.get('files'):
-            folder_id = existing_folders['files'][0]['id']
-            logger.debug(f"Found existing folder with ID: {folder_id}")
-            return folder_id
-        # Create new folder if it doesn't exist
         file = service.files().create(
             body=file_metadata,
             fields='id, name',
@@ -104,8 +231,47 @@ def create_folder(service, folder_name, parent_id=None):
         logger.error(f"Error creating folder: {str(e)}")
         raise
 
-def upload_file(service, file_path, file_name, mime_type, folder_id=None):
-    """Uploads a file to Google Drive."""
+def get_folder_id(service, *folder_names):
+    """
+    ID of the folder at folder_names below the Drive root, creating missing
+    folders. Cached folders are used without asking Drive.
+    """
+    parent_id = None
+    for depth in range(1, len(folder_names) + 1):
+        folder_path = '/'.join(folder_names[:depth])
+        folder_id = folder_cache.get(folder_path)
+        if not folder_id:
+            folder_name = folder_names[depth - 1]
+            folder_id = find_folder(service, folder_name, parent_id)
+            if folder_id:
+                logger.debug(f"Found existing folder {folder_path} with ID: {folder_id}")
+            else:
+                folder_id = create_folder(service, folder_name, parent_id)
+            folder_cache.set(folder_path, folder_id)
+        parent_id = folder_id
+    return parent_id
+
+def upload_file_to_folder(service, stream, file_name, mime_type, *folder_names, progress=None):
+    """Upload stream into the folder at folder_names, looking the folder up again if its cached ID is gone"""
+    start = stream.tell()
+    try:
+        folder_id = get_folder_id(service, *folder_names)
+        return upload_stream(service, stream, file_name, mime_type, folder_id=folder_id, progress=progress)
+    except Exception as e:
+        if not is_not_found(e):
+            raise
+        logger.debug(f"Cached folder {'/'.join(folder_names)} not found, resolving again")
+        folder_cache.forget(folder_names[0])
+        folder_id = get_folder_id(service, *folder_names)
+        stream.seek(start)
+        return upload_stream(service, stream, file_name, mime_type, folder_id=folder_id, progress=progress)
+
+def upload_stream(service, stream, file_name, mime_type, folder_id=None, progress=None):
+    """
+    Uploads the contents of a readable file object to Google Drive as a
+    resumable upload, UPLOAD_CHUNK_SIZE bytes at a time. progress, if given,
+    is called with the fraction sent after each chunk.
+    """
     logger.debug(f"Starting file upload: {file_name}")
     file_metadata = {
         'name': file_name,
@@ -117,20 +283,28 @@ def upload_file(service, file_path, file_name, mime_type, folder_id=None):
         logger.debug(f"File will be uploaded to folder ID: {folder_id}")
 
     try:
-        media = MediaFileUpload(
-            file_path,
+        media = MediaIoBaseUpload(
+            stream,
             mimetype=mime_type,
+            chunksize=UPLOAD_CHUNK_SIZE,
             resumable=True
         )
         logger.debug("Created media upload object")
         
-        # Create the file in Google Drive
-        file = service.files().create(
+        # Create the file in Google Drive, one chunk per request
+        upload = service.files().create(
             body=file_metadata,
             media_body=media,
             fields='id, name, webViewLink',
             supportsAllDrives=True
-        ).execute()
+        )
+        file = None
+        while file is None:
+            status, file = upload.next_chunk()
+            if status:
+                logger.debug(f"Uploaded {int(status.progress() * 100)}% of {file_name}")
+                if progress:
+                    progress(status.progress())
         
         file_id = file.get('id')
         logger.debug(f"Successfully uploaded file with ID: {file_id}")
@@ -152,19 +326,28 @@ def upload_file(service, file_path, file_name, mime_type, folder_id=None):
         logger.error(f"Error uploading file: {str(e)}")
         raise
 
-def download_file(service, file_id, output_path):
-    """Downloads a file from Google Drive."""
+def upload_file(service, file_path, file_name, mime_type, folder_id=None):
+    """Uploads a file to Google Drive."""
+    with open(file_path, 'rb') as stream:
+        return upload_stream(service, stream, file_name, mime_type, folder_id=folder_id)
+
+def download_to(service, file_id, stream):
+    """Writes a Drive file's contents to a writable file object, one chunk at a time."""
     request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
+    downloader = MediaIoBaseDownload(stream, request, chunksize=UPLOAD_CHUNK_SIZE)
     
     done = False
     while done is False:
         status, done = downloader.next_chunk()
-    
-    fh.seek(0)
+
+def get_file_metadata(service, file_id):
+    """A Drive file's name and MIME type, as {'name': ..., 'mimeType': ...}"""
+    return service.files().get(fileId=file_id, fields='name, mimeType').execute()
+
+def download_file(service, file_id, output_path):
+    """Downloads a file from Google Drive."""
     with open(output_path, 'wb') as f:
-        f.write(fh.read())
+        download_to(service, file_id, f)
 
 def list_files(service, folder_id=None, query=None):
     """Lists files in Google Drive."""
@@ -182,10 +365,49 @@ def list_files(service, folder_id=None, query=None):
     
     return results.get('files', [])
 
+def file_exists(service, file_id):
+    """Whether file_id is still in Drive and not in the trash"""
+    try:
+        file = service.files().get(fileId=file_id, fields='id, trashed').execute()
+    except Exception as e:
+        if is_not_found(e):
+            return False
+        raise
+    return not file.get('trashed')
+
 def delete_file(service, file_id):
     """Deletes a file from Google Drive."""
     service.files().delete(fileId=file_id).execute()
 
+# Drive accepts at most this many calls in one batch HTTP request
+DRIVE_BATCH_SIZE = 100
+
+def batch_delete_files(service, file_ids):
+    """
+    Deletes files from Google Drive using batch HTTP requests. Returns
+    {file_id: error} for the deletions that failed; files already gone count
+    as deleted.
+    """
+    errors = {}
+
+    def deleted(request_id, response, exception):
+        if exception is not None and not is_not_found(exception):
+            errors[request_id] = exception
+
+    file_ids = list(file_ids)
+    for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=deleted)
+        for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+            batch.add(service.files().delete(fileId=file_id), request_id=file_id)
+        try:
+            batch.execute()
+        except Exception as e:
+            # The whole batch request failed; none of its deletions are known to have happened
+            for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+                errors.setdefault(file_id, e)
+        logger.debug(f"Deleted batch of {min(DRIVE_BATCH_SIZE, len(file_ids) - start)} files")
+    return errors
+
 def share_file(service, file_id, email, role='reader'):
     """Shares a file with a specific user."""
     user_permission = {
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import uuid
+
+# Default size cap of the on-disk cache of Drive files
+FILE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+class LocalFileStorage:
+    """
+    Cache storage in a local directory, one file per key. Other backends
+    provide the same methods; path() may return None when files are not on
+    the local disk, in which case they are served through open().
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def save(self, key, write):
+        """Store the bytes write(stream) produces under key; readers never see a partial file"""
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = os.path.join(self.root, f'.{key}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temp_path, 'wb') as stream:
+                write(stream)
+            os.replace(temp_path, self.path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def metadata_path(self, key):
+        # Dot files are skipped by entries(), so metadata does not count towards the size cap
+        return os.path.join(self.root, f'.{key}.json')
+
+    def read_metadata(self, key):
+        """The dict saved by save_metadata(), or None"""
+        try:
+            with open(self.metadata_path(key)) as stream:
+                return json.load(stream)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_metadata(self, key, metadata):
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = os.path.join(self.root, f'.{key}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temp_path, 'w') as stream:
+                json.dump(metadata, stream)
+            os.replace(temp_path, self.metadata_path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def touch(self, key):
+        """Mark key as just used"""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key):
+        for path in (self.path(key), self.metadata_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """(key, size, last used) of every stored file"""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if name.startswith('.'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((name, stat.st_size, stat.st_mtime))
+        return entries
+
+class FileCache:
+    """
+    Least-recently-used cache of immutable files (keyed e.g. by Drive file ID)
+    on top of a storage backend, kept under max_bytes in total.
+    """
+
+    def __init__(self, storage, max_bytes=FILE_CACHE_MAX_BYTES):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fetching = {}
+
+    def get(self, key, fetch):
+        """
+        Make sure key is stored, calling fetch(stream) to write its contents on
+        a miss. Returns True on a cache hit. Concurrent misses for the same key
+        in this process fetch it once.
+        """
+        if self.storage.exists(key):
+            self.storage.touch(key)
+            return True
+
+        with self._lock:
+            key_lock = self._fetching.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                if self.storage.exists(key):
+                    self.storage.touch(key)
+                    return True
+                self.storage.save(key, fetch)
+            finally:
+                with self._lock:
+                    self._fetching.pop(key, None)
+        self.evict(keep=key)
+        return False
+
+    def metadata(self, key, fetch):
+        """A stored file's metadata dict, calling fetch() for it on a miss"""
+        metadata = self.storage.read_metadata(key)
+        if metadata is None:
+            metadata = fetch()
+            self.storage.save_metadata(key, metadata)
+        return metadata
+
+    def evict(self, keep=None):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        entries = sorted(self.storage.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.storage.delete(key)
+            total -= size
+
+    def discard(self, key):
+        self.storage.delete(key)
@@ -0,0 +1,111 @@
+import re
+from sqlalchemy import text
+
+# Full-text index over material titles, descriptions, categories and instrument names.
+# MySQL keeps it in a table with a FULLTEXT index; SQLite uses an FTS5 table whose
+# rowid is the material ID.
+SEARCH_TABLE = 'material_search'
+SEARCH_COLUMNS = ('title', 'description', 'category', 'instrument')
+
+def query_terms(query):
+    """Words of a search string; punctuation and search operators are dropped"""
+    return re.findall(r'\w+', query or '')
+
+def create_index(conn):
+    """Create the search table if it is missing. Returns True if it was created."""
+    if conn.dialect.name == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = :name"
+        ), {'name': SEARCH_TABLE}).first()
+        if exists:
+            return False
+        conn.execute(text(f"""
+            CREATE VIRTUAL TABLE {SEARCH_TABLE}
+            USING fts5(title, description, category, instrument, tokenize = 'unicode61')
+        """))
+        return True
+
+    exists = conn.execute(text("SHOW TABLES LIKE :name"), {'name': SEARCH_TABLE}).first()
+    if exists:
+        return False
+    conn.execute(text(f"""
+        CREATE TABLE {SEARCH_TABLE} (
+            material_id INTEGER PRIMARY KEY,
+            title VARCHAR(100),
+            description TEXT,
+            category VARCHAR(50),
+            instrument VARCHAR(50),
+            FULLTEXT KEY ft_material_search (title, description, category, instrument)
+        ) ENGINE=InnoDB
+    """))
+    return True
+
+def remove(conn, material_ids):
+    if not material_ids:
+        return
+    key = 'rowid' if conn.dialect.name == 'sqlite' else 'material_id'
+    for material_id in material_ids:
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE {key} = :id"), {'id': material_id})
+
+def index(conn, rows):
+    """(Re)index materials given as dicts with 'id' and the SEARCH_COLUMNS"""
+    if not rows:
+        return
+    remove(conn, [row['id'] for row in rows])
+    key = 'rowid' if conn.dialect.name == 'sqlite' else 'material_id'
+    conn.execute(text(f"""
+        INSERT INTO {SEARCH_TABLE} ({key}, title, description, category, instrument)
+        VALUES (:id, :title, :description, :category, :instrument)
+    """), [
+        {'id': row['id'], **{column: row.get(column) or '' for column in SEARCH_COLUMNS}}
+        for row in rows
+    ])
+
+def search(conn, query, limit, offset, category=None, material_type=None, instrument=None):
+    """
+    Rank materials matching every word of query (as a prefix).
+    Returns (total matches, [(material_id, score), ...]) for the requested page,
+    best match first.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return 0, []
+
+    filters = ''
+    params = {'limit': limit, 'offset': offset}
+    if category:
+        filters += ' AND m.category = :category'
+        params['category'] = category
+    if material_type:
+        filters += ' AND m.type = :type'
+        params['type'] = material_type
+    if instrument:
+        filters += ' AND m.instrument_id IN (SELECT id FROM instruments WHERE name = :instrument)'
+        params['instrument'] = instrument
+
+    if conn.dialect.name == 'sqlite':
+        params['query'] = ' '.join(f'"{term}"*' for term in terms)
+        # FTS5 only accepts the table name (not an alias) in MATCH and bm25()
+        source = f"""
+            FROM {SEARCH_TABLE} JOIN materials m ON m.id = {SEARCH_TABLE}.rowid
+            WHERE {SEARCH_TABLE} MATCH :query{filters}
+        """
+        # bm25() is lower for better matches
+        page = conn.execute(text(f"""
+            SELECT {SEARCH_TABLE}.rowid, -bm25({SEARCH_TABLE}) AS score {source}
+            ORDER BY score DESC, {SEARCH_TABLE}.rowid LIMIT :limit OFFSET :offset
+        """), params).fetchall()
+    else:
+        params['query'] = ' '.join(f'+{term}*' for term in terms)
+        match = "MATCH(s.title, s.description, s.category, s.instrument) AGAINST(:query IN BOOLEAN MODE)"
+        source = f"""
+            FROM {SEARCH_TABLE} s JOIN materials m ON m.id = s.material_id
+            WHERE {match}{filters}
+        """
+        page = conn.execute(text(f"""
+            SELECT s.material_id, {match} AS score {source}
+            ORDER BY score DESC, s.material_id LIMIT :limit OFFSET :offset
+        """), params).fetchall()
+
+    total = conn.execute(text(f"SELECT COUNT(*) {source}"), params).scalar()
+    return total, [(row[0], float(row[1])) for row in page]
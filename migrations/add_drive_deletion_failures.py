@@ -0,0 +1,22 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_drive_deletion_failures():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            try:
+                conn.execute(text("ALTER TABLE drive_deletions ADD COLUMN failed_at DATETIME NULL"))
+                print("Added failed_at to drive_deletions")
+            except Exception as e:
+                if "Duplicate column name" not in str(e):
+                    raise e
+
+            conn.commit()
+        print("Drive deletion failures added successfully!")
+
+if __name__ == '__main__':
+    add_drive_deletion_failures()
@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_material_content_hash():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement in (
+                "ALTER TABLE materials ADD COLUMN content_hash VARCHAR(64) NULL",
+                "ALTER TABLE material_uploads ADD COLUMN content_hash VARCHAR(64) NULL",
+                "ALTER TABLE material_uploads ADD COLUMN deduplicated BOOLEAN NOT NULL DEFAULT FALSE"
+            ):
+                try:
+                    conn.execute(text(statement))
+                    print(f"Ran: {statement}")
+                except Exception as e:
+                    if "Duplicate column name" not in str(e):
+                        raise e
+
+            try:
+                conn.execute(text("CREATE INDEX ix_materials_content_hash ON materials (content_hash)"))
+                print("Created index ix_materials_content_hash")
+            except Exception as e:
+                if "Duplicate key name" not in str(e):
+                    raise e
+
+            conn.commit()
+        print("Material content hashes added successfully!")
+
+if __name__ == '__main__':
+    add_material_content_hash()
@@ -0,0 +1,35 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_material_file_details():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement in (
+                "ALTER TABLE materials ADD COLUMN file_name VARCHAR(255) NULL",
+                "ALTER TABLE materials ADD COLUMN mime_type VARCHAR(100) NULL"
+            ):
+                try:
+                    conn.execute(text(statement))
+                    print(f"Ran: {statement}")
+                except Exception as e:
+                    if "Duplicate column name" not in str(e):
+                        raise e
+
+            # Materials uploaded through the background queue still have their upload row
+            result = conn.execute(text("""
+                UPDATE materials m
+                JOIN material_uploads u ON u.material_id = m.id
+                SET m.file_name = u.file_name, m.mime_type = u.mime_type
+                WHERE m.file_name IS NULL
+            """))
+            print(f"Set file details on {result.rowcount} materials")
+
+            conn.commit()
+        print("Material file details added successfully!")
+
+if __name__ == '__main__':
+    add_material_file_details()
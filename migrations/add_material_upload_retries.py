@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_material_upload_retries():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement in (
+                "ALTER TABLE material_uploads ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+                "ALTER TABLE material_uploads ADD COLUMN updated_at DATETIME NULL"
+            ):
+                try:
+                    conn.execute(text(statement))
+                    print(f"Ran: {statement}")
+                except Exception as e:
+                    if "Duplicate column name" not in str(e):
+                        raise e
+
+            # Uploads left over from before the column existed become sweepable straight away
+            result = conn.execute(text("UPDATE material_uploads SET updated_at = created_at WHERE updated_at IS NULL"))
+            print(f"Set updated_at on {result.rowcount} uploads")
+
+            conn.commit()
+        print("Material upload retries added successfully!")
+
+if __name__ == '__main__':
+    add_material_upload_retries()
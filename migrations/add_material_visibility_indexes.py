@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+# Covering indexes for the student visible-materials UNION
+VISIBILITY_INDEXES = {
+    'ix_material_allocations_student_material': 'material_allocations (student_id, material_id)',
+    'ix_group_members_student_group': 'group_members (student_id, group_id)',
+    'ix_group_material_allocations_group_material': 'group_material_allocations (group_id, material_id)'
+}
+
+def add_material_visibility_indexes():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for index_name, index_target in VISIBILITY_INDEXES.items():
+                try:
+                    conn.execute(text(f"CREATE INDEX {index_name} ON {index_target}"))
+                    print(f"Created index {index_name}")
+                except Exception as e:
+                    if "Duplicate key name" not in str(e):
+                        raise e
+            
+            conn.commit()
+        print("Material visibility indexes added successfully!")
+
+if __name__ == '__main__':
+    add_material_visibility_indexes()
@@ -0,0 +1,130 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (app, db, Session, RecurrenceRule, Attendance,
+                 get_term_breaks, parse_session_date)
+from sqlalchemy import text
+
+# Fields an occurrence row must share with its rule to be dropped in favour of expansion
+RULE_FIELDS = ['title', 'time', 'duration', 'user_id', 'group_id', 'room_id', 'instrument_id']
+
+def add_recurrence_rule_columns():
+    with db.engine.connect() as conn:
+        try:
+            conn.execute(text("""
+                ALTER TABLE sessions
+                ADD COLUMN recurrence_rule_id INTEGER NULL,
+                ADD COLUMN occurrence_date DATE NULL
+            """))
+            print("Added recurrence_rule_id and occurrence_date columns")
+        except Exception as e:
+            if "Duplicate column name" not in str(e):
+                raise e
+
+        try:
+            conn.execute(text("""
+                ALTER TABLE sessions
+                ADD CONSTRAINT fk_sessions_recurrence_rule
+                FOREIGN KEY (recurrence_rule_id) REFERENCES recurrence_rules (id)
+            """))
+        except Exception as e:
+            if "Duplicate" not in str(e):
+                raise e
+
+        try:
+            conn.execute(text("""
+                CREATE UNIQUE INDEX ix_sessions_rule_occurrence
+                ON sessions (recurrence_rule_id, occurrence_date)
+            """))
+            print("Created index ix_sessions_rule_occurrence")
+        except Exception as e:
+            if "Duplicate key name" not in str(e):
+                raise e
+
+        conn.commit()
+
+def convert_legacy_series():
+    """
+    Turn each parent + children series into a RecurrenceRule. Rows that carry
+    attendance or were edited away from the series are kept as materialized
+    occurrences; the rest are deleted and expanded from the rule instead.
+    """
+    parents = Session.query.filter(
+        Session.is_recurring == True,
+        Session.parent_session_id == None,
+        Session.recurrence_rule_id == None,
+        Session.recurrence_end_date != None
+    ).all()
+
+    for parent in parents:
+        rule = RecurrenceRule(
+            title=parent.title,
+            start_date=parent.date,
+            end_date=parse_session_date(parent.recurrence_end_date),
+            time=parent.time,
+            duration=parent.duration,
+            user_id=parent.user_id,
+            group_id=parent.group_id,
+            room_id=parent.room_id,
+            instrument_id=parent.instrument_id,
+            recurrence_type=parent.recurrence_type or 'weekly',
+            excluded_dates=[],
+            skip_term_breaks=bool(parent.group_id)
+        )
+        db.session.add(rule)
+        db.session.flush()
+
+        rows = [parent] + Session.query.filter_by(parent_session_id=parent.id).all()
+        breaks = get_term_breaks(rule.start_date, rule.end_date) if rule.skip_term_breaks else ()
+        expected = set(rule.occurrence_dates(rule.start_date, rule.end_date, breaks))
+        attended = {
+            session_id for (session_id,) in db.session.query(Attendance.session_id)
+            .filter(Attendance.session_id.in_([row.id for row in rows]))
+            .distinct()
+        }
+
+        kept, dropped, covered = [], [], set()
+        for row in rows:
+            matches_rule = all(getattr(row, field) == getattr(rule, field) for field in RULE_FIELDS)
+            if row.date in expected and row.date not in covered and matches_rule and row.id not in attended:
+                dropped.append(row)
+            else:
+                kept.append(row)
+            covered.add(row.date)
+
+        # Dates of the series that were deleted one by one stay cancelled
+        rule.excluded_dates = sorted(
+            expected_date.strftime('%Y-%m-%d') for expected_date in expected - covered
+        )
+
+        occurrence_dates = set()
+        for row in kept:
+            row.parent_session_id = None
+            row.recurrence_rule_id = rule.id
+            # A duplicate row on the same date is kept as a stand-alone session of the series
+            if row.date not in occurrence_dates:
+                row.occurrence_date = row.date
+                occurrence_dates.add(row.date)
+        db.session.flush()
+
+        for row in dropped:
+            if row is not parent:
+                db.session.delete(row)
+        db.session.flush()
+        if parent in dropped:
+            db.session.delete(parent)
+
+        db.session.commit()
+        print(f"Series {parent.id}: rule {rule.id}, kept {len(kept)} rows, expanded {len(dropped)}")
+
+def add_recurrence_rules():
+    with app.app_context():
+        # Creates the recurrence_rules table
+        db.create_all()
+        add_recurrence_rule_columns()
+        convert_legacy_series()
+        print("Recurrence rules added successfully!")
+
+if __name__ == '__main__':
+    add_recurrence_rules()
@@ -0,0 +1,35 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_unique_attendances():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            # Keep the most recently created record of each (session, student) pair
+            result = conn.execute(text("""
+                DELETE a FROM attendances a
+                JOIN attendances b
+                  ON a.session_id = b.session_id
+                 AND a.student_id = b.student_id
+                 AND a.id < b.id
+            """))
+            print(f"Removed {result.rowcount} duplicate attendance records")
+
+            try:
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX ix_attendances_session_student
+                    ON attendances (session_id, student_id)
+                """))
+                print("Created unique index ix_attendances_session_student")
+            except Exception as e:
+                if "Duplicate key name" not in str(e):
+                    raise e
+
+            conn.commit()
+        print("Attendance records made unique successfully!")
+
+if __name__ == '__main__':
+    add_unique_attendances()
@@ -0,0 +1,41 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_unique_group_material_allocations():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            # Keep the oldest allocation of each (group, material) pair
+            result = conn.execute(text("""
+                DELETE a FROM group_material_allocations a
+                JOIN group_material_allocations b
+                  ON a.group_id = b.group_id
+                 AND a.material_id = b.material_id
+                 AND a.id > b.id
+            """))
+            print(f"Removed {result.rowcount} duplicate group allocations")
+
+            # Swap the index in one statement; it may be the one backing a foreign key
+            try:
+                conn.execute(text("""
+                    ALTER TABLE group_material_allocations
+                    DROP INDEX ix_group_material_allocations_group_material,
+                    ADD UNIQUE INDEX ix_group_material_allocations_group_material (group_id, material_id)
+                """))
+            except Exception as e:
+                if "check that column/key exists" not in str(e):
+                    raise e
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX ix_group_material_allocations_group_material
+                    ON group_material_allocations (group_id, material_id)
+                """))
+            print("Created unique index ix_group_material_allocations_group_material")
+
+            conn.commit()
+        print("Group material allocations made unique successfully!")
+
+if __name__ == '__main__':
+    add_unique_group_material_allocations()
@@ -0,0 +1,41 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def add_unique_material_allocations():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            # Keep the oldest allocation of each (material, student) pair
+            result = conn.execute(text("""
+                DELETE a FROM material_allocations a
+                JOIN material_allocations b
+                  ON a.material_id = b.material_id
+                 AND a.student_id = b.student_id
+                 AND a.id > b.id
+            """))
+            print(f"Removed {result.rowcount} duplicate allocations")
+
+            # Swap the index in one statement; it may be the one backing a foreign key
+            try:
+                conn.execute(text("""
+                    ALTER TABLE material_allocations
+                    DROP INDEX ix_material_allocations_student_material,
+                    ADD UNIQUE INDEX ix_material_allocations_student_material (student_id, material_id)
+                """))
+            except Exception as e:
+                if "check that column/key exists" not in str(e):
+                    raise e
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX ix_material_allocations_student_material
+                    ON material_allocations (student_id, material_id)
+                """))
+            print("Created unique index ix_material_allocations_student_material")
+
+            conn.commit()
+        print("Material allocations made unique successfully!")
+
+if __name__ == '__main__':
+    add_unique_material_allocations()
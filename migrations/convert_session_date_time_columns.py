@@ -0,0 +1,79 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+SESSION_INDEXES = {
+    'ix_sessions_date_room': '(date, room_id)',
+    'ix_sessions_date_instrument': '(date, instrument_id)',
+    'ix_sessions_group_date': '(group_id, date)',
+    'ix_sessions_user_date': '(user_id, date)'
+}
+
+def convert_session_date_time_columns():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            columns = {
+                row[0]: row[1].lower()
+                for row in conn.execute(text("SHOW COLUMNS FROM sessions"))
+            }
+
+            if columns['date'].startswith('varchar'):
+                # Add typed columns next to the old string columns
+                try:
+                    conn.execute(text("""
+                        ALTER TABLE sessions
+                        ADD COLUMN date_value DATE NULL,
+                        ADD COLUMN time_value TIME NULL
+                    """))
+                except Exception as e:
+                    if "Duplicate column name" not in str(e):
+                        raise e
+
+                # Backfill from the stored strings (YYYY-MM-DD and HH:MM)
+                conn.execute(text("""
+                    UPDATE sessions
+                    SET date_value = STR_TO_DATE(date, '%Y-%m-%d'),
+                        time_value = STR_TO_DATE(time, '%H:%i')
+                """))
+
+                unparsed = conn.execute(text("""
+                    SELECT id, date, time FROM sessions
+                    WHERE date_value IS NULL OR time_value IS NULL
+                """)).fetchall()
+                if unparsed:
+                    for row in unparsed:
+                        print(f"Could not convert session {row[0]}: date={row[1]!r} time={row[2]!r}")
+                    raise Exception(f"{len(unparsed)} sessions have unparseable dates or times, fix them and re-run")
+
+                # Swap the typed columns in under the original names
+                conn.execute(text("""
+                    ALTER TABLE sessions
+                    DROP COLUMN date,
+                    DROP COLUMN time
+                """))
+                conn.execute(text("""
+                    ALTER TABLE sessions
+                    CHANGE COLUMN date_value date DATE NOT NULL,
+                    CHANGE COLUMN time_value time TIME NOT NULL
+                """))
+                print("Converted sessions.date and sessions.time to DATE and TIME")
+            else:
+                print("sessions.date is already a DATE column")
+
+            # Composite indexes for the date-range lookups
+            for index_name, index_columns in SESSION_INDEXES.items():
+                try:
+                    conn.execute(text(f"CREATE INDEX {index_name} ON sessions {index_columns}"))
+                    print(f"Created index {index_name}")
+                except Exception as e:
+                    if "Duplicate key name" not in str(e):
+                        raise e
+
+            conn.commit()
+        print("Session date/time columns updated successfully!")
+
+if __name__ == '__main__':
+    convert_session_date_time_columns()
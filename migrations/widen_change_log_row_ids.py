@@ -0,0 +1,17 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def widen_change_log_row_ids():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            # Occurrence IDs are -(rule ID * 100000 + days), past INT range from rule 21475 on
+            conn.execute(text("ALTER TABLE change_log MODIFY row_id BIGINT NOT NULL"))
+            conn.commit()
+        print("Change log row IDs widened successfully!")
+
+if __name__ == '__main__':
+    widen_change_log_row_ids()
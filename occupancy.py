@@ -0,0 +1,104 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+# Booking grid used by the availability endpoints
+SLOT_MINUTES = 15
+DAY_START_MINUTE = 9 * 60    # 09:00
+DAY_END_MINUTE = 21 * 60     # 21:00, last bookable slot start
+# Longest interval a caller may check; free_slots() builds a bitmask this many slots wide
+MAX_DURATION_MINUTES = 12 * 60
+
+# Resource key that every booking is also recorded under
+ALL_RESOURCES = ('all',)
+
+def room_key(room_id):
+    return ('room', room_id)
+
+def instrument_key(instrument_name):
+    return ('instrument', instrument_name.strip().lower())
+
+def minute_of_day(value):
+    """Minutes since midnight for a time (or datetime)"""
+    return value.hour * 60 + value.minute
+
+def format_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+def is_valid_duration(duration):
+    """True for a positive whole number of slots no longer than MAX_DURATION_MINUTES"""
+    return 0 < duration <= MAX_DURATION_MINUTES and duration % SLOT_MINUTES == 0
+
+class OccupancyIndex:
+    """
+    Booked intervals per (day, resource), kept sorted by start minute.
+
+    A resource is a room, an instrument or ALL_RESOURCES. Interval checks
+    bisect the sorted list; slot listings turn each day into a bitmap of
+    15-minute slots so a whole week can be answered in one pass.
+    """
+
+    def __init__(self):
+        self._intervals = defaultdict(list)
+        self._bitmaps = {}
+
+    def add(self, day, keys, start_minute, duration):
+        """Record a booking of `duration` minutes starting at `start_minute` under each key"""
+        interval = (start_minute, start_minute + max(duration or 0, 0))
+        for key in keys:
+            insort(self._intervals[(day, key)], interval)
+            self._bitmaps.pop((day, key), None)
+
+    def intervals(self, day, key):
+        return list(self._intervals.get((day, key), []))
+
+    def is_free(self, day, keys, start_minute, duration):
+        """True if [start_minute, start_minute + duration) overlaps no booking under any key"""
+        end_minute = start_minute + duration
+        for key in keys:
+            intervals = self._intervals.get((day, key))
+            if not intervals:
+                continue
+            # Bookings are sorted by start, so only the ones starting before end_minute can overlap
+            position = bisect_left(intervals, (end_minute,))
+            for booked_start, booked_end in intervals[:position]:
+                if booked_end > start_minute and booked_start < end_minute:
+                    return False
+        return True
+
+    def _bitmap(self, day, key):
+        """Bit i is set when the i-th slot of the day is at least partly booked"""
+        cache_key = (day, key)
+        if cache_key not in self._bitmaps:
+            bitmap = 0
+            for booked_start, booked_end in self._intervals.get(cache_key, []):
+                first_slot = booked_start // SLOT_MINUTES
+                last_slot = (booked_end - 1) // SLOT_MINUTES
+                for slot in range(first_slot, last_slot + 1):
+                    bitmap |= 1 << slot
+            self._bitmaps[cache_key] = bitmap
+        return self._bitmaps[cache_key]
+
+    def free_slots(self, start_day, days, keys, duration=SLOT_MINUTES,
+                   day_start=DAY_START_MINUTE, day_end=DAY_END_MINUTE):
+        """
+        List every slot start between day_start and day_end for `days` days from start_day.
+        A slot is available when `duration` minutes from its start are free under all keys.
+        Returns a list of (day, [(minute, available), ...]) in date order.
+        """
+        if not is_valid_duration(duration):
+            raise ValueError(f"Duration must be a multiple of {SLOT_MINUTES} minutes up to {MAX_DURATION_MINUTES}")
+        slots_needed = max(1, -(-duration // SLOT_MINUTES))
+        window = (1 << slots_needed) - 1
+        result = []
+        for offset in range(days):
+            day = start_day + timedelta(days=offset)
+            bitmap = 0
+            for key in keys:
+                bitmap |= self._bitmap(day, key)
+            day_slots = []
+            for minute in range(day_start, day_end + 1, SLOT_MINUTES):
+                slot = minute // SLOT_MINUTES
+                day_slots.append((minute, (bitmap >> slot) & window == 0))
+            result.append((day, day_slots))
+        return result
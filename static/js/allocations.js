@@ -365,20 +365,21 @@ document.addEventListener('DOMContentLoaded', function() {
 
         try {
             if (recipientType === 'student') {
-                // Allocate to student
-                const promises = selectedMaterials.map(materialId => 
-                    fetch('/api/allocations', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify({
-                            student_id: recipientId,
-                            material_id: materialId
-                        })
+                // Allocate to student, all materials in one request
+                const response = await fetch('/api/allocations/bulk', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({
+                        student_ids: [parseInt(recipientId)],
+                        material_ids: selectedMaterials
                     })
-                );
-                await Promise.all(promises);
+                });
+                
+                if (!response.ok) {
+                    throw new Error('Failed to allocate materials to student');
+                }
             } else {
                 // Allocate to group
                 const response = await fetch(`/api/groups/${recipientId}/materials`, {
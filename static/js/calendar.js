@@ -296,6 +296,7 @@ document.addEventListener('DOMContentLoaded', function() {
         prevMonthBtn.addEventListener('click', () => {
             currentDate.setMonth(currentDate.getMonth() - 1);
             renderCalendar();
+            loadSessions();
         });
     }
     
@@ -303,6 +304,7 @@ document.addEventListener('DOMContentLoaded', function() {
         nextMonthBtn.addEventListener('click', () => {
             currentDate.setMonth(currentDate.getMonth() + 1);
             renderCalendar();
+            loadSessions();
         });
     }
     
@@ -513,7 +515,11 @@ document.addEventListener('DOMContentLoaded', function() {
             if (deleteAll) {
                 // Remove all related sessions
                 const sessionToDelete = sessions.find(s => s.id === id);
-                if (sessionToDelete) {
+                if (sessionToDelete && sessionToDelete.recurrence_rule_id) {
+                    // Rule-based series: drop every occurrence of the rule
+                    const ruleId = sessionToDelete.recurrence_rule_id;
+                    sessions = sessions.filter(s => s.recurrence_rule_id !== ruleId);
+                } else if (sessionToDelete) {
                     const parentId = sessionToDelete.parent_session_id || id;
                     sessions = sessions.filter(s => 
                         s.id !== id && 
@@ -687,12 +693,17 @@ document.addEventListener('DOMContentLoaded', function() {
                     console.warn('WARNING: Instrument was not saved properly. Sent:', sessionData.instrument_id, 'Received:', data.instrument_id);
                 }
                 
-                // Add the new session to the sessions array
-                sessions.push(data);
-                
-                // Refresh calendar and today's sessions
-                renderCalendar();
-                displayTodaySessions();
+                if (data.recurrence_rule_id) {
+                    // A recurring series spans many months, so sync the loaded months
+                    syncSessions();
+                } else {
+                    // Add the new session to the sessions array
+                    sessions.push(data);
+                    
+                    // Refresh calendar and today's sessions
+                    renderCalendar();
+                    displayTodaySessions();
+                }
                 
                 // Hide form and reset button
                 sessionForm.style.display = 'none';
@@ -742,47 +753,150 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Functions
-    function loadSessions() {
-        console.log('Loading sessions from API...');
-        fetch('/api/sessions')
+    // Months (YYYY-MM) whose sessions have already been fetched
+    const loadedMonths = new Set();
+    // Server change version every loaded month is known to be current with.
+    // Months are fetched at different times, so this is the lowest of their
+    // versions; syncing from a later one would skip changes to earlier months.
+    let changeVersion = 0;
+    
+    function noteChangeVersion(response) {
+        const version = parseInt(response.headers.get('X-Change-Version'), 10);
+        if (version && (!changeVersion || version < changeVersion)) {
+            changeVersion = version;
+        }
+    }
+    
+    // Format a Date as YYYY-MM-DD
+    function toDateString(date) {
+        return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
+    }
+    
+    // Fetch every session between start and end (YYYY-MM-DD), following the pagination cursor
+    function fetchSessionWindow(start, end, cursor = null, collected = []) {
+        let url = `/api/sessions?start=${start}&end=${end}&format=compact`;
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
+        return fetch(url)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
                 }
+                noteChangeVersion(response);
                 return response.json();
             })
             .then(data => {
-                console.log('Sessions loaded from API:', data);
-                
-                // Get the current user's ID from the page
-                const dashboard = document.querySelector('.dashboard-container, .student-dashboard');
-                const currentUserId = dashboard ? dashboard.getAttribute('data-user-id') : null;
-                console.log('Current user ID from data attribute:', currentUserId);
-                
-                if (currentUserId) {
-                    // Convert currentUserId to a number for comparison
-                    const currentUserIdNum = parseInt(currentUserId, 10);
-                    console.log('Current user ID as number:', currentUserIdNum);
-                    
-                    // Get the user's role from the session data
-                    const userRole = document.querySelector('body').getAttribute('data-user-role');
-                    console.log('User role from data attribute:', userRole);
-                    
-                    // Process all sessions
-                    sessions = data.map(session => {
-                        // Add a flag to indicate if this is a recurring session
-                        session.isRecurringSession = session.is_recurring || session.parent_session_id !== null;
-                        return session;
-                    });
-                    
-                    console.log('Processed sessions:', sessions);
-                } else {
-                    console.warn('No user ID found in the page, showing all sessions');
-                    sessions = data.map(session => {
-                        session.isRecurringSession = session.is_recurring || session.parent_session_id !== null;
-                        return session;
+                data.rows.forEach(row => {
+                    const session = {};
+                    data.fields.forEach((field, index) => {
+                        session[field] = row[index];
                     });
+                    collected.push(session);
+                });
+                if (data.next_cursor) {
+                    return fetchSessionWindow(start, end, data.next_cursor, collected);
+                }
+                return collected;
+            });
+    }
+    
+    // Merge fetched sessions into the local list, replacing any copies already held
+    function mergeSessions(data) {
+        const fetched = new Map(data.map(session => {
+            // Add a flag to indicate if this is a recurring session
+            session.isRecurringSession = session.is_recurring || session.parent_session_id !== null;
+            return [session.id, session];
+        }));
+        sessions = sessions.filter(session => !fetched.has(session.id)).concat(Array.from(fetched.values()));
+    }
+    
+    // Drop every fetched month and load the visible one again
+    function reloadSessions() {
+        loadedMonths.clear();
+        sessions = [];
+        changeVersion = 0;
+        loadSessions();
+    }
+    
+    // Apply only the sessions changed since the last known version
+    function syncSessions() {
+        if (!changeVersion) {
+            return reloadSessions();
+        }
+        const since = changeVersion;
+        fetch(`/api/changes?since=${since}&tables=sessions`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json();
+            })
+            .then(data => {
+                const rules = data.changes.recurrence_rules;
+                if (data.reset || rules.changed.length || rules.deleted.length) {
+                    // Rule edits move an unknown set of occurrences
+                    return reloadSessions();
                 }
+                // Drop the old copy of a changed session too, in case it moved to a month not loaded
+                const removed = new Set(data.changes.sessions.deleted.concat(
+                    data.changes.sessions.changed.map(session => session.id)
+                ));
+                sessions = sessions.filter(session => !removed.has(session.id));
+                mergeSessions(data.changes.sessions.changed.filter(
+                    session => loadedMonths.has(session.date.slice(0, 7))
+                ));
+                // A month that arrived meanwhile with an older version keeps it lower
+                if (changeVersion >= since) {
+                    changeVersion = data.version;
+                }
+                renderCalendar();
+                displayTodaySessions();
+            })
+            .catch(error => {
+                console.error('Error syncing sessions:', error);
+            });
+    }
+    
+    // Pick up changes made elsewhere when the tab comes back into view
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') {
+            syncSessions();
+        }
+    });
+    
+    // Make sure every month touching the start..end range has been loaded
+    function ensureSessionsLoaded(startDate, endDate) {
+        const pending = [];
+        const cursor = new Date(startDate.getFullYear(), startDate.getMonth(), 1);
+        while (cursor <= endDate) {
+            const monthKey = toDateString(cursor).slice(0, 7);
+            if (!loadedMonths.has(monthKey)) {
+                const monthStart = new Date(cursor.getFullYear(), cursor.getMonth(), 1);
+                const monthEnd = new Date(cursor.getFullYear(), cursor.getMonth() + 1, 0);
+                loadedMonths.add(monthKey);
+                pending.push(
+                    fetchSessionWindow(toDateString(monthStart), toDateString(monthEnd))
+                        .then(mergeSessions)
+                        .catch(error => {
+                            loadedMonths.delete(monthKey);
+                            throw error;
+                        })
+                );
+            }
+            cursor.setMonth(cursor.getMonth() + 1);
+        }
+        return Promise.all(pending);
+    }
+    
+    // Load sessions for the visible month
+    function loadSessions() {
+        console.log('Loading sessions from API...');
+        const monthStart = new Date(currentDate.getFullYear(), currentDate.getMonth(), 1);
+        const monthEnd = new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 0);
+        ensureSessionsLoaded(monthStart, monthEnd)
+            .then(() => {
+                console.log('Sessions loaded from API:', sessions);
                 
                 // Update upcoming sessions count
                 const today = new Date();
@@ -1180,10 +1294,10 @@ document.addEventListener('DOMContentLoaded', function() {
             return response.json();
         })
         .then(data => {
-            // Update the session in the local array
+            // Update the session in the local array (an edited occurrence comes back with its new stored ID)
             const index = sessions.findIndex(s => s.id === sessionId);
             if (index !== -1) {
-                sessions[index] = { ...sessions[index], ...updatedSession };
+                sessions[index] = { ...sessions[index], ...updatedSession, ...data };
             }
 
             // Close the modal
@@ -1264,115 +1378,125 @@ document.addEventListener('DOMContentLoaded', function() {
             const endDate = document.getElementById('printEndDate').value;
             const instrument = document.getElementById('printInstrument').value;
 
-            // Filter sessions based on date range and instrument
-            const filteredSessions = sessions.filter(session => {
-                const sessionDate = new Date(session.date);
-                const start = new Date(startDate);
-                const end = new Date(endDate);
+            // Open the window straight away so the popup is tied to the click
+            const printWindow = window.open('', '_blank');
+
+            // Load any months in the range that the calendar has not fetched yet
+            ensureSessionsLoaded(new Date(`${startDate}T00:00:00`), new Date(`${endDate}T00:00:00`))
+                .then(() => {
+                    // Filter sessions based on date range and instrument
+                    const filteredSessions = sessions.filter(session => {
+                        const sessionDate = new Date(session.date);
+                        const start = new Date(startDate);
+                        const end = new Date(endDate);
                 
-                // Check if session is within date range
-                const isInDateRange = sessionDate >= start && sessionDate <= end;
+                        // Check if session is within date range
+                        const isInDateRange = sessionDate >= start && sessionDate <= end;
                 
-                // Check if session matches instrument filter
-                const matchesInstrument = !instrument || session.instrument === instrument;
+                        // Check if session matches instrument filter
+                        const matchesInstrument = !instrument || session.instrument === instrument;
                 
-                return isInDateRange && matchesInstrument;
-            });
-
-            // Sort sessions by date and time
-            filteredSessions.sort((a, b) => {
-                const dateCompare = new Date(a.date) - new Date(b.date);
-                if (dateCompare === 0) {
-                    return a.time.localeCompare(b.time);
-                }
-                return dateCompare;
-            });
+                        return isInDateRange && matchesInstrument;
+                    });
 
-            // Create print window content
-            const printWindow = window.open('', '_blank');
-            printWindow.document.write(`
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Schedule Printout</title>
-                    <style>
-                        body { font-family: Arial, sans-serif; margin: 20px; }
-                        .header { text-align: center; margin-bottom: 20px; }
-                        .schedule-table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-                        .schedule-table th, .schedule-table td { 
-                            border: 1px solid #ddd; 
-                            padding: 8px; 
-                            text-align: left; 
-                        }
-                        .schedule-table th { background-color: #f5f5f5; }
-                        .date-header { 
-                            background-color: #f0f0f0; 
-                            font-weight: bold; 
-                            padding: 10px; 
-                            margin-top: 20px; 
+                    // Sort sessions by date and time
+                    filteredSessions.sort((a, b) => {
+                        const dateCompare = new Date(a.date) - new Date(b.date);
+                        if (dateCompare === 0) {
+                            return a.time.localeCompare(b.time);
                         }
-                        @media print {
-                            .no-print { display: none; }
-                            .schedule-table { page-break-inside: auto; }
-                            tr { page-break-inside: avoid; }
-                        }
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Music Performance Academy</h1>
-                        <h2>Schedule Printout</h2>
-                        <p>Period: ${new Date(startDate).toLocaleDateString()} - ${new Date(endDate).toLocaleDateString()}</p>
-                        ${instrument ? `<p>Instrument: ${instrument}</p>` : ''}
-                    </div>
-                    <div class="no-print">
-                        <button onclick="window.print()">Print Schedule</button>
-                    </div>
-            `);
+                        return dateCompare;
+                    });
 
-            // Group sessions by date
-            let currentDate = '';
-            filteredSessions.forEach(session => {
-                if (session.date !== currentDate) {
-                    currentDate = session.date;
                     printWindow.document.write(`
-                        <div class="date-header">${new Date(session.date).toLocaleDateString()}</div>
-                        <table class="schedule-table">
-                            <thead>
-                                <tr>
-                                    <th>Time</th>
-                                    <th>Session</th>
-                                    <th>Instrument</th>
-                                    <th>Room</th>
-                                    <th>Duration</th>
-                                    <th>Notes</th>
-                                </tr>
-                            </thead>
-                            <tbody>
+                        <!DOCTYPE html>
+                        <html>
+                        <head>
+                            <title>Schedule Printout</title>
+                            <style>
+                                body { font-family: Arial, sans-serif; margin: 20px; }
+                                .header { text-align: center; margin-bottom: 20px; }
+                                .schedule-table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+                                .schedule-table th, .schedule-table td { 
+                                    border: 1px solid #ddd; 
+                                    padding: 8px; 
+                                    text-align: left; 
+                                }
+                                .schedule-table th { background-color: #f5f5f5; }
+                                .date-header { 
+                                    background-color: #f0f0f0; 
+                                    font-weight: bold; 
+                                    padding: 10px; 
+                                    margin-top: 20px; 
+                                }
+                                @media print {
+                                    .no-print { display: none; }
+                                    .schedule-table { page-break-inside: auto; }
+                                    tr { page-break-inside: avoid; }
+                                }
+                            </style>
+                        </head>
+                        <body>
+                            <div class="header">
+                                <h1>Music Performance Academy</h1>
+                                <h2>Schedule Printout</h2>
+                                <p>Period: ${new Date(startDate).toLocaleDateString()} - ${new Date(endDate).toLocaleDateString()}</p>
+                                ${instrument ? `<p>Instrument: ${instrument}</p>` : ''}
+                            </div>
+                            <div class="no-print">
+                                <button onclick="window.print()">Print Schedule</button>
+                            </div>
                     `);
-                }
+
+                    // Group sessions by date
+                    let currentDate = '';
+                    filteredSessions.forEach(session => {
+                        if (session.date !== currentDate) {
+                            currentDate = session.date;
+                            printWindow.document.write(`
+                                <div class="date-header">${new Date(session.date).toLocaleDateString()}</div>
+                                <table class="schedule-table">
+                                    <thead>
+                                        <tr>
+                                            <th>Time</th>
+                                            <th>Session</th>
+                                            <th>Instrument</th>
+                                            <th>Room</th>
+                                            <th>Duration</th>
+                                            <th>Notes</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody>
+                            `);
+                        }
                 
-                printWindow.document.write(`
-                    <tr>
-                        <td>${session.time}</td>
-                        <td>${session.title}</td>
-                        <td>${session.instrument || 'N/A'}</td>
-                        <td>${session.room_id ? rooms.find(r => r.id === session.room_id)?.name || '-' : '-'}</td>
-                        <td>${session.duration} minutes</td>
-                        <td>${session.notes || ''}</td>
-                    </tr>
-                `);
-            });
+                        printWindow.document.write(`
+                            <tr>
+                                <td>${session.time}</td>
+                                <td>${session.title}</td>
+                                <td>${session.instrument || 'N/A'}</td>
+                                <td>${session.room_id ? rooms.find(r => r.id === session.room_id)?.name || '-' : '-'}</td>
+                                <td>${session.duration} minutes</td>
+                                <td>${session.notes || ''}</td>
+                            </tr>
+                        `);
+                    });
 
-            printWindow.document.write(`
-                    </tbody>
-                </table>
-                </body>
-                </html>
-            `);
+                    printWindow.document.write(`
+                            </tbody>
+                        </table>
+                        </body>
+                        </html>
+                    `);
 
-            printWindow.document.close();
-            printScheduleModal.hide();
+                    printWindow.document.close();
+                    printScheduleModal.hide();
+                })
+                .catch(error => {
+                    console.error('Error loading sessions for print:', error);
+                    printWindow.close();
+                    alert('Failed to load sessions for the selected range. Please try again.');
+                });
         });
     }
 
@@ -1495,51 +1619,20 @@ document.addEventListener('DOMContentLoaded', function() {
                     return;
                 }
                 
-                // Get student details for each member
-                const memberPromises = members.map(member => {
-                    return fetch(`/api/users?id=${member.student_id}`)
-                        .then(response => {
-                            if (!response.ok) {
-                                throw new Error(`Failed to fetch user details for ID ${member.student_id}`);
-                            }
-                            return response.json();
-                        })
-                        .then(data => {
-                            if (data && data.length > 0) {
-                                const userData = data[0];
-                                return {
-                                    ...member,
-                                    student: userData
-                                };
-                            }
-                            return member;
-                        })
-                        .catch(error => {
-                            console.error(`Error fetching user details for ID ${member.student_id}:`, error);
-                            return member;
-                        });
-                });
+                // Member rows already carry the student's details
+                const membersList = members.map(member => {
+                    const studentName = member.student ? member.student.username : 'Unknown Student';
+                    const instrument = member.student ? (member.student.instrument || 'No instrument assigned') : 'No instrument assigned';
+                    return `
+                        <div class="member-item">
+                            <i class="fas fa-user"></i>
+                            <span>${studentName}</span>
+                            <span class="instrument">${instrument}</span>
+                        </div>
+                    `;
+                }).join('');
                 
-                Promise.all(memberPromises)
-                    .then(membersWithDetails => {
-                        const membersList = membersWithDetails.map(member => {
-                            const studentName = member.student ? member.student.username : 'Unknown Student';
-                            const instrument = member.student ? member.student.instrument : 'No instrument assigned';
-                            return `
-                                <div class="member-item">
-                                    <i class="fas fa-user"></i>
-                                    <span>${studentName}</span>
-                                    <span class="instrument">${instrument}</span>
-                                </div>
-                            `;
-                        }).join('');
-                        
-                        membersContainer.innerHTML = membersList;
-                    })
-                    .catch(error => {
-                        console.error('Error loading member details:', error);
-                        membersContainer.innerHTML = '<p class="text-danger">Error loading group members.</p>';
-                    });
+                membersContainer.innerHTML = membersList;
             })
             .catch(error => {
                 console.error('Error loading group members:', error);
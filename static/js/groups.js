@@ -43,6 +43,8 @@ document.addEventListener('DOMContentLoaded', function() {
     let groupMembers = [];
     let groupAllocatedMaterials = [];
     let groupSessions = [];
+    // Highest server change version reflected in the local groups list
+    let groupsVersion = 0;
     
     // Initialize
     init();
@@ -132,6 +134,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (!response.ok) {
                     throw new Error('Failed to fetch groups');
                 }
+                groupsVersion = parseInt(response.headers.get('X-Change-Version'), 10) || 0;
                 return response.json();
             })
             .then(data => {
@@ -145,6 +148,43 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
     
+    // Fetch only the groups changed since the list was loaded
+    function syncGroups() {
+        if (!groupsVersion) {
+            return loadGroups();
+        }
+        fetch(`/api/changes?since=${groupsVersion}&tables=groups`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to sync groups');
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (data.reset) {
+                    return loadGroups();
+                }
+                const deleted = new Set(data.changes.groups.deleted);
+                const changed = new Map(data.changes.groups.changed.map(group => [group.id, group]));
+                groups = groups
+                    .filter(group => !deleted.has(group.id))
+                    .map(group => changed.has(group.id) ? changed.get(group.id) : group);
+                const knownIds = new Set(groups.map(group => group.id));
+                changed.forEach((group, id) => {
+                    if (!knownIds.has(id)) {
+                        groups.push(group);
+                    }
+                });
+                groupsVersion = Math.max(groupsVersion, data.version);
+                renderGroups(groups);
+                updateGroupsCount(groups.length);
+            })
+            .catch(error => {
+                console.error('Error syncing groups:', error);
+                loadGroups();
+            });
+    }
+    
     // Render groups grid
     function renderGroups(groupsToRender) {
         console.log('Rendering groups:', groupsToRender);
@@ -273,7 +313,7 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .then(data => {
             hideCreateGroupForm();
-            loadGroups(); // Reload groups to show the new one
+            syncGroups(); // Fetch the new group
             showSuccess('Group created successfully!');
         })
         .catch(error => {
@@ -658,6 +698,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             studentSelectForGroup.value = '';
             loadGroupMembers(currentGroupId);
+            syncGroups();
             showSuccess('Member added successfully!');
         })
         .catch(error => {
@@ -694,6 +735,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(data => {
             materialSelectForGroup.value = '';
             loadGroupMaterials(currentGroupId);
+            syncGroups();
             showSuccess('Material allocated successfully!');
         })
         .catch(error => {
@@ -788,7 +830,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 return response.json();
             })
             .then(data => {
-            loadGroups();
+            syncGroups();
             hideGroupDetailsModal();
             showSuccess('Group updated successfully!');
             })
@@ -822,7 +864,7 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
             hideGroupDetailsModal();
-            loadGroups();
+            syncGroups();
             showSuccess('Group deleted successfully!');
             })
             .catch(error => {
@@ -856,6 +898,7 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .then(data => {
             loadGroupMembers(currentGroupId);
+            syncGroups();
             showSuccess('Member removed successfully!');
         })
         .catch(error => {
@@ -888,6 +931,7 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
                     loadGroupMaterials(currentGroupId);
+                    syncGroups();
             showSuccess('Material removed successfully!');
             })
             .catch(error => {
@@ -257,19 +257,23 @@ document.addEventListener('DOMContentLoaded', function() {
                 let deletedMaterialIds = [];
                 
                 try {
-                    // Delete each selected material from the database
-                    for (const materialId of selectedMaterials) {
-                        const response = await fetch(`/api/materials?id=${materialId}`, {
-                            method: 'DELETE'
-                        });
-                        
-                        if (!response.ok) {
-                            errorCount++;
-                            console.error(`Failed to delete material with ID ${materialId}`);
-                        } else {
-                            successCount++;
-                            deletedMaterialIds.push(materialId);
-                        }
+                    // Delete all selected materials in one request; Drive files are removed in the background
+                    const response = await fetch('/api/materials/bulk-delete', {
+                        method: 'POST',
+                        headers: {
+                            'Content-Type': 'application/json'
+                        },
+                        body: JSON.stringify({ ids: selectedMaterials })
+                    });
+                    
+                    if (!response.ok) {
+                        errorCount = selectedMaterials.length;
+                        console.error('Failed to delete selected materials');
+                    } else {
+                        const result = await response.json();
+                        deletedMaterialIds = result.deleted;
+                        successCount = result.deleted.length;
+                        errorCount = result.not_found.length;
                     }
                     
                     // Update the materials array
@@ -322,11 +326,23 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Search requests are debounced; only the latest one is rendered
+    let searchTimer = null;
+    let searchRequest = 0;
+
     function filterMaterials() {
         const category = filterCategory ? filterCategory.value : '';
         const type = filterType ? filterType.value : '';
         const instrument = filterInstrument ? filterInstrument.value : '';
-        const searchTerm = searchInput ? searchInput.value.toLowerCase() : '';
+        const searchTerm = searchInput ? searchInput.value.trim() : '';
+
+        clearTimeout(searchTimer);
+        searchRequest++;
+
+        if (searchTerm) {
+            searchTimer = setTimeout(() => searchMaterials(searchTerm, category, type, instrument), 250);
+            return;
+        }
 
         let filtered = materials;
 
@@ -342,18 +358,32 @@ document.addEventListener('DOMContentLoaded', function() {
             filtered = filtered.filter(m => m.instrument === instrument);
         }
 
-        if (searchTerm) {
-            filtered = filtered.filter(m => 
-                m.title.toLowerCase().includes(searchTerm) ||
-                (m.category && m.category.toLowerCase().includes(searchTerm)) ||
-                (m.type && m.type.toLowerCase().includes(searchTerm)) ||
-                (m.instrument && m.instrument.toLowerCase().includes(searchTerm))
-            );
-        }
-
         renderMaterials(filtered);
     }
 
+    // Ranked full-text search on the server, best match first
+    async function searchMaterials(searchTerm, category, type, instrument) {
+        const request = searchRequest;
+        const params = new URLSearchParams({ q: searchTerm, per_page: 100 });
+        if (category && category !== 'all') params.set('category', category);
+        if (type && type !== 'all') params.set('type', type);
+        if (instrument) params.set('instrument', instrument);
+
+        try {
+            const response = await fetch(`/api/materials/search?${params}`);
+            if (!response.ok) throw new Error('Failed to search materials');
+            const data = await response.json();
+            if (request !== searchRequest) return;
+
+            renderMaterials(data.results.map(material => ({
+                ...material,
+                dateAdded: material.date_added || material.dateAdded
+            })));
+        } catch (error) {
+            console.error('Error searching materials:', error);
+        }
+    }
+
     // Drag and drop functionality
     function setupDragAndDrop() {
         if (!dropZone) return;
@@ -413,6 +443,25 @@ document.addEventListener('DOMContentLoaded', function() {
         uploadFiles(files);
     }
 
+    // Poll a background upload until its material has been created
+    async function waitForUpload(upload, onProgress) {
+        while (upload.status === 'queued' || upload.status === 'uploading') {
+            onProgress(upload.progress);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const response = await fetch(`/api/materials/uploads/${upload.id}`, { cache: 'no-cache' });
+            if (!response.ok) throw new Error('Failed to check upload status');
+            upload = await response.json();
+            if (upload.status === 'queued' && upload.attempts > 0) {
+                // A failed attempt is retried by the server minutes later; stop waiting for it here
+                throw new Error(`${upload.error_message || 'Upload failed'} (it will be retried in the background)`);
+            }
+        }
+        if (upload.status !== 'complete') {
+            throw new Error(upload.error_message || 'Upload failed');
+        }
+        return upload;
+    }
+
     // Upload files
     async function uploadFiles(files) {
         if (files.length === 0) return;
@@ -468,7 +517,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 console.log('Uploading file with instrument:', instrument, 'ID:', selectedInstrument.id); // Debug log
                 
-                // Upload file to server
+                formData.append('title', file.name);
+                formData.append('type', fileType);
+                formData.append('category', 'reference'); // Default category
+                
+                // Upload file to server; it is sent to Google Drive in the background
                 const uploadResponse = await fetch('/api/materials/upload', {
                     method: 'POST',
                     body: formData
@@ -479,34 +532,12 @@ document.addEventListener('DOMContentLoaded', function() {
                     throw new Error(errorData.error || 'Upload failed');
                 }
                 
-                const uploadData = await uploadResponse.json();
-                console.log('Upload response:', uploadData); // Debug log
-                
-                // Create material data
-                const materialData = {
-                    title: file.name,
-                    type: fileType,
-                    url: uploadData.url,
-                    category: 'reference', // Default category
-                    instrument_id: selectedInstrument.id, // Use instrument_id instead of instrument
-                    dateAdded: new Date().toISOString().split('T')[0]
-                };
-                
-                // Save material to database
-                const response = await fetch('/api/materials', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(materialData)
+                const upload = await waitForUpload(await uploadResponse.json(), progress => {
+                    uploadDetails.textContent = `File ${i + 1} of ${files.length} (${Math.round(progress * 100)}% sent to Drive)`;
                 });
+                console.log('Upload finished:', upload); // Debug log
                 
-                if (!response.ok) {
-                    const errorData = await response.json();
-                    throw new Error(errorData.error || 'Failed to add material');
-                }
-                
-                const newMaterial = await response.json();
+                const newMaterial = upload.material;
                 newMaterials.push(newMaterial);
                 successCount++;
                 
@@ -12,7 +12,6 @@ document.addEventListener('DOMContentLoaded', function() {
     const nextMonthBtn = document.getElementById('nextMonth');
     const sessionsList = document.getElementById('sessionsList');
     const sessionsTitle = document.getElementById('sessionsTitle');
-    const upcomingSessionsCount = document.getElementById('upcomingSessionsCount');
     
     // Session Modal functionality
     const sessionModal = new bootstrap.Modal(document.getElementById('sessionModal'));
@@ -20,6 +19,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const addToCalendarBtn = document.getElementById('addToCalendar');
     let currentSession = null;
     
+    // Months (YYYY-MM) whose sessions have already been fetched
+    const loadedMonths = new Set();
+    // Server change version every loaded month is known to be current with:
+    // the lowest of their versions, so a sync never skips changes to an earlier month
+    let changeVersion = 0;
+    
     // Initialize the calendar
     loadSessions();
     
@@ -28,6 +33,7 @@ document.addEventListener('DOMContentLoaded', function() {
         prevMonthBtn.addEventListener('click', () => {
             currentDate.setMonth(currentDate.getMonth() - 1);
             renderCalendar();
+            loadSessions();
         });
     }
     
@@ -35,48 +41,134 @@ document.addEventListener('DOMContentLoaded', function() {
         nextMonthBtn.addEventListener('click', () => {
             currentDate.setMonth(currentDate.getMonth() + 1);
             renderCalendar();
+            loadSessions();
         });
     }
     
-    // Load sessions
-    function loadSessions() {
-        console.log('Loading sessions...');
-        fetch('/api/sessions')
+    // Format a Date as YYYY-MM-DD
+    function toDateString(date) {
+        return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
+    }
+    
+    // Fetch every session between start and end (YYYY-MM-DD), following the pagination cursor
+    function fetchSessionWindow(start, end, cursor = null, collected = []) {
+        let url = `/api/sessions?start=${start}&end=${end}&format=compact`;
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
+        return fetch(url)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Failed to fetch sessions');
                 }
+                const version = parseInt(response.headers.get('X-Change-Version'), 10);
+                if (version && (!changeVersion || version < changeVersion)) {
+                    changeVersion = version;
+                }
                 return response.json();
             })
             .then(data => {
-                // Get the current user's ID from the page
-                const userId = parseInt(document.querySelector('.student-dashboard').dataset.userId);
-                console.log('Current user ID:', userId);
-                
-                // Filter sessions for the current user (both individual and group sessions)
-                sessions = data.filter(session => {
-                    // Include sessions where user is the owner
-                    if (session.user_id === userId) {
-                        return true;
-                    }
-                    // Include sessions from groups the user is a member of
-                    if (session.group_id) {
-                        return true;
+                data.rows.forEach(row => {
+                    const session = {};
+                    data.fields.forEach((field, index) => {
+                        session[field] = row[index];
+                    });
+                    collected.push(session);
+                });
+                if (data.next_cursor) {
+                    return fetchSessionWindow(start, end, data.next_cursor, collected);
+                }
+                return collected;
+            });
+    }
+    
+    // Load sessions for the visible month
+    function loadSessions() {
+        const year = currentDate.getFullYear();
+        const month = currentDate.getMonth();
+        const monthKey = `${year}-${String(month + 1).padStart(2, '0')}`;
+        if (loadedMonths.has(monthKey)) {
+            return;
+        }
+        loadedMonths.add(monthKey);
+        
+        const start = toDateString(new Date(year, month, 1));
+        const end = toDateString(new Date(year, month + 1, 0));
+        console.log(`Loading sessions from ${start} to ${end}...`);
+        fetchSessionWindow(start, end)
+            .then(data => {
+                // The server only returns the student's own and group sessions
+                const knownIds = new Set(sessions.map(session => session.id));
+                data.forEach(session => {
+                    if (!knownIds.has(session.id)) {
+                        sessions.push(session);
                     }
-                    return false;
                 });
                 
-                console.log('Filtered sessions:', sessions);
-                updateUpcomingSessionsCount();
+                console.log('Loaded sessions:', data);
                 renderCalendar();
-                displayTodaySessions();
+                if (monthKey === toDateString(new Date()).slice(0, 7)) {
+                    displayTodaySessions();
+                }
             })
             .catch(error => {
+                loadedMonths.delete(monthKey);
                 console.error('Error loading sessions:', error);
                 showError('Failed to load sessions. Please try again later.');
             });
     }
     
+    // Apply sessions changed since the last known version when the tab comes back into view
+    function syncSessions() {
+        if (!changeVersion) {
+            return;
+        }
+        const since = changeVersion;
+        fetch(`/api/changes?since=${since}&tables=sessions`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to sync sessions');
+                }
+                return response.json();
+            })
+            .then(data => {
+                const rules = data.changes.recurrence_rules || { changed: [], deleted: [] };
+                if (data.reset || rules.changed.length || rules.deleted.length) {
+                    // Membership or series changed: fetch the visible month again
+                    loadedMonths.clear();
+                    sessions = [];
+                    changeVersion = 0;
+                    loadSessions();
+                    return;
+                }
+                // Drop the old copy of a changed session too, in case it moved to a month not loaded
+                const removed = new Set(data.changes.sessions.deleted.concat(
+                    data.changes.sessions.changed.map(session => session.id)
+                ));
+                const changed = data.changes.sessions.changed.filter(
+                    session => loadedMonths.has(session.date.slice(0, 7))
+                );
+                sessions = sessions
+                    .filter(session => !removed.has(session.id))
+                    .concat(changed);
+                // A month that arrived meanwhile with an older version keeps it lower
+                if (changeVersion >= since) {
+                    changeVersion = data.version;
+                }
+                renderCalendar();
+                displayTodaySessions();
+            })
+            .catch(error => {
+                console.error('Error syncing sessions:', error);
+            });
+    }
+    
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') {
+            syncSessions();
+        }
+    });
+    
     // Render calendar
     function renderCalendar() {
         const year = currentDate.getFullYear();
@@ -264,19 +356,6 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    // Update upcoming sessions count
-    function updateUpcomingSessionsCount() {
-        const today = new Date();
-        today.setHours(0, 0, 0, 0);
-        
-        const upcomingCount = sessions.filter(session => {
-            const sessionDate = new Date(session.date);
-            return sessionDate >= today;
-        }).length;
-        
-        upcomingSessionsCount.textContent = upcomingCount;
-    }
-    
     // Check if date is today
     function isToday(date) {
         const today = new Date();
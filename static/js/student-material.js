@@ -48,9 +48,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Load allocated materials
     function loadAllocatedMaterials() {
         console.log('Loading allocated materials...');
-        // Add cache-busting parameter to ensure fresh data
-        const timestamp = new Date().getTime();
-        fetch(`/api/materials?t=${timestamp}`)
+        // Always revalidate; the server answers 304 while the list is unchanged
+        fetch('/api/materials', { cache: 'no-cache' })
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Failed to fetch materials');
@@ -236,10 +235,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // For uploaded files, images, and documents
             console.log('Opening file:', material.url);
             if (material.url.includes('drive.google.com/uc?id=')) {
-                const fileId = material.url.split('id=')[1];
-                // For Google Drive files, use the direct viewer URL
-                const viewerUrl = `https://drive.google.com/file/d/${fileId}/view`;
-                console.log('Opening Google Drive URL:', viewerUrl);
+                // Google Drive files are served from the site's file cache
+                const viewerUrl = `/files/${material.id}`;
+                console.log('Opening cached file:', viewerUrl);
                 window.open(viewerUrl, '_blank');
             } else {
                 // For non-Google Drive files
@@ -275,9 +273,8 @@ document.addEventListener('DOMContentLoaded', function() {
             if (material.url) {
                 console.log('Downloading file:', material.url);
                 if (material.url.includes('drive.google.com/uc?id=')) {
-                    const fileId = material.url.split('id=')[1];
-                    const downloadUrl = `https://drive.google.com/uc?export=download&id=${fileId}`;
-                    console.log('Opening Google Drive download URL:', downloadUrl);
+                    const downloadUrl = `/files/${material.id}?download=1`;
+                    console.log('Opening cached download URL:', downloadUrl);
                     window.open(downloadUrl, '_blank');
                 } else {
                     // Create a temporary link element
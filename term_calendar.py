@@ -0,0 +1,108 @@
+import threading
+from datetime import timedelta
+
+class TermCalendar:
+    """
+    Precomputed dates of one term: its break range, the teaching dates
+    outside the break and the teaching week number of each date. Week 1 is
+    the week the term starts in; weeks that fall entirely inside the break
+    are not numbered.
+    """
+
+    def __init__(self, term):
+        self.id = term['id']
+        self.name = term['name']
+        self.start_date = term['start_date']
+        self.end_date = term['end_date']
+        self.display_order = term['display_order'] or 0
+        self.term = term['dict']
+
+        self.breaks = []
+        if term['has_break'] and term['break_start_date'] and term['break_end_date']:
+            self.breaks.append((term['break_start_date'], term['break_end_date']))
+
+        self.teaching_dates = []
+        day = self.start_date
+        while day <= self.end_date:
+            if not self.in_break(day):
+                self.teaching_dates.append(day)
+            day += timedelta(days=1)
+        teaching = set(self.teaching_dates)
+
+        # Week number per week offset from the start date (None for break weeks)
+        self._week_numbers = []
+        week_number = 0
+        week_start = self.start_date
+        while week_start <= self.end_date:
+            week = [week_start + timedelta(days=i) for i in range(7)]
+            if any(day in teaching for day in week):
+                week_number += 1
+                self._week_numbers.append(week_number)
+            else:
+                self._week_numbers.append(None)
+            week_start += timedelta(days=7)
+        self.teaching_weeks = week_number
+
+    def contains(self, day):
+        return self.start_date <= day <= self.end_date
+
+    def in_break(self, day):
+        return any(break_start <= day <= break_end for break_start, break_end in self.breaks)
+
+    def is_teaching_day(self, day):
+        return self.contains(day) and not self.in_break(day)
+
+    def week_number(self, day):
+        """Teaching week of day, or None if the day is outside the term or in the break"""
+        if not self.is_teaching_day(day):
+            return None
+        return self._week_numbers[(day - self.start_date).days // 7]
+
+class TermSchedule:
+    """All term calendars, with lookups by date"""
+
+    def __init__(self, terms):
+        self.terms = sorted((TermCalendar(term) for term in terms), key=lambda t: t.start_date)
+        self.by_id = {term.id: term for term in self.terms}
+
+    def term_for(self, day):
+        """The term containing day (lowest display order wins if terms overlap), or None"""
+        matches = [term for term in self.terms if term.contains(day)]
+        return min(matches, key=lambda t: t.display_order) if matches else None
+
+    def next_term(self, day):
+        upcoming = [term for term in self.terms if term.start_date > day]
+        return upcoming[0] if upcoming else None
+
+    def previous_term(self, day):
+        past = [term for term in self.terms if term.end_date < day]
+        return max(past, key=lambda t: t.end_date) if past else None
+
+    def breaks_between(self, start_date, end_date):
+        """Break ranges of all terms overlapping start_date..end_date"""
+        return [
+            break_range
+            for term in self.terms
+            if term.start_date <= end_date and term.end_date >= start_date
+            for break_range in term.breaks
+        ]
+
+class TermCalendarCache:
+    """
+    Process-wide TermSchedule, keyed on the version of the term data it was
+    built from. Every process compares that version on each lookup, so a
+    change saved by any of them is picked up by all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedule = None
+        self._version = None
+
+    def get(self, version, load_terms):
+        """Return the schedule for version, calling load_terms() for fresh term data when it changed"""
+        with self._lock:
+            if self._schedule is None or self._version != version:
+                self._schedule = TermSchedule(load_terms())
+                self._version = version
+            return self._schedule
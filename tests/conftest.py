@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py connects when it is imported, so point it at a scratch SQLite database first
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ.setdefault('SECRET_KEY', 'test')
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app, db, User
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def admin(app):
+    user = User(username='admin', email='admin@example.com', role='admin', is_verified=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def admin_client(app, admin):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+        sess['user'] = {'id': admin.id, 'username': admin.username, 'role': admin.role}
+    return client
+
+@pytest.fixture
+def count_statements(app):
+    """Context manager collecting the SQL statements this thread sends while it is open"""
+    @contextmanager
+    def counting():
+        statements = []
+        thread_id = threading.get_ident()
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # Background workers share the engine; only count the test's own queries
+            if threading.get_ident() == thread_id:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return counting
@@ -0,0 +1,21 @@
+from occupancy import MAX_DURATION_MINUTES, SLOT_MINUTES
+
+SLOTS_URL = '/api/available-slots?date=2026-01-05'
+
+def test_available_slots_rejects_unbounded_durations(app):
+    client = app.test_client()
+    for duration in (10 ** 10, MAX_DURATION_MINUTES + SLOT_MINUTES, 0, -SLOT_MINUTES, 7):
+        response = client.get(f'{SLOTS_URL}&duration={duration}')
+        assert response.status_code == 400, duration
+
+    response = client.get(f'{SLOTS_URL}&duration=60')
+    assert response.status_code == 200
+
+def test_session_availability_rejects_unbounded_durations(admin_client):
+    response = admin_client.post('/check-session-availability', json={
+        'type': 'band_practice',
+        'date': '2026-01-05',
+        'time': '18:00',
+        'duration': 10 ** 10
+    })
+    assert response.status_code == 400
@@ -0,0 +1,104 @@
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+import pytz
+
+from app import (
+    db, Group, Room, Instrument, Session, RecurrenceRule, Attendance,
+    save_session, load_session_feed, materialize_session, occurrence_id, delete_session
+)
+
+SERIES_START = date(2026, 1, 5)
+GROUP_COUNT = 20
+
+def add_groups(admin):
+    room = Room(name='Studio', capacity=20)
+    instrument = Instrument(name='Guitar')
+    groups = [Group(name=f'Group {index}', created_by=admin.id) for index in range(GROUP_COUNT)]
+    db.session.add_all([room, instrument] + groups)
+    db.session.commit()
+    return room.id, instrument.id, [group.id for group in groups]
+
+def save_series(count_statements, admin_id, room_id, instrument_id, group_ids, weeks):
+    """Save one weekly series per group; returns (statements per series, seconds per series)"""
+    counts = []
+    started = timer.perf_counter()
+    for group_id in group_ids:
+        with count_statements() as statements:
+            save_session({
+                'title': f'Group class {group_id}',
+                'date': SERIES_START.strftime('%Y-%m-%d'),
+                'time': '18:00',
+                'duration': 60,
+                'user_id': admin_id,
+                'group_id': group_id,
+                'room_id': room_id,
+                'instrument_id': instrument_id,
+                'is_recurring': True,
+                'recurrence_type': 'weekly',
+                'recurrence_end_date': (SERIES_START + timedelta(weeks=weeks)).strftime('%Y-%m-%d')
+            }, admin_id)
+        counts.append([
+            statement for statement in statements
+            if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ])
+    elapsed = (timer.perf_counter() - started) / len(group_ids)
+    return counts, elapsed
+
+def test_year_long_series_take_one_write_each(admin, count_statements):
+    """Benchmark: 20 group series of a year of weekly classes, against 20 month-long ones"""
+    admin_id = admin.id
+    room_id, instrument_id, group_ids = add_groups(admin)
+
+    short_writes, short_seconds = save_series(count_statements, admin_id, room_id, instrument_id, group_ids, 4)
+    long_writes, long_seconds = save_series(count_statements, admin_id, room_id, instrument_id, group_ids, 52)
+    print(f"\n{GROUP_COUNT} series: {short_seconds * 1000:.1f} ms each for 5 classes, "
+          f"{long_seconds * 1000:.1f} ms each for 53 classes")
+
+    for writes in short_writes + long_writes:
+        # The series itself is one row; the other write is its change log entry
+        series_writes = [w for w in writes if 'recurrence_rules' in w or 'INTO sessions' in w]
+        assert len(series_writes) == 1
+        assert len(writes) == len(short_writes[0])
+
+    rows, _ = load_session_feed(
+        SERIES_START.strftime('%Y-%m-%d'),
+        (SERIES_START + timedelta(weeks=52)).strftime('%Y-%m-%d'),
+        limit=5000
+    )
+    assert len(rows) == GROUP_COUNT * 5 + GROUP_COUNT * 53
+
+def test_deleting_a_series_keeps_attendance(admin):
+    admin_id = admin.id
+    today = datetime.now(pytz.timezone('Europe/London')).date()
+    rule = RecurrenceRule(
+        title='Weekly lesson',
+        start_date=today - timedelta(weeks=4),
+        end_date=today + timedelta(weeks=8),
+        time=time(18, 0),
+        duration=60,
+        user_id=admin_id,
+        recurrence_type='weekly',
+        excluded_dates=[]
+    )
+    db.session.add(rule)
+    db.session.commit()
+    rule_id = rule.id
+
+    attended = {}
+    for weeks in (-2, 2):
+        session = materialize_session(occurrence_id(rule_id, today + timedelta(weeks=weeks)))
+        db.session.add(Attendance(session_id=session.id, student_id=admin_id, status='present', recorded_by=admin_id))
+        attended[weeks] = session.id
+    unattended_id = materialize_session(occurrence_id(rule_id, today + timedelta(weeks=3))).id
+    db.session.commit()
+
+    assert delete_session(occurrence_id(rule_id, today + timedelta(weeks=2)), admin_id, delete_all=True)
+    db.session.expunge_all()
+
+    rule = db.session.get(RecurrenceRule, rule_id)
+    assert rule.end_date < today
+    assert db.session.get(Session, attended[-2]).recurrence_rule_id == rule_id
+    assert db.session.get(Session, attended[2]).recurrence_rule_id is None
+    assert db.session.get(Session, unattended_id) is None
+    assert Attendance.query.filter(Attendance.session_id.in_(attended.values())).count() == 2
@@ -0,0 +1,85 @@
+from datetime import date, time, timedelta
+
+from app import db, Session, RecurrenceRule, Room, Instrument, load_session_feed
+
+WINDOW_START = date(2026, 1, 5)
+WINDOW_END = date(2026, 3, 29)
+
+def add_sessions(user_id, first, count):
+    """Add count one-off sessions and count weekly series, each with its own room and instrument"""
+    for index in range(first, first + count):
+        room = Room(name=f'Room {index}', capacity=6)
+        instrument = Instrument(name=f'Instrument {index}')
+        db.session.add_all([room, instrument])
+        db.session.flush()
+        db.session.add(Session(
+            title=f'Lesson {index}',
+            date=WINDOW_START + timedelta(days=index % 60),
+            time=time(9 + index % 8, 0),
+            duration=60,
+            user_id=user_id,
+            room_id=room.id,
+            instrument_id=instrument.id
+        ))
+        db.session.add(RecurrenceRule(
+            title=f'Series {index}',
+            start_date=WINDOW_START + timedelta(days=index % 7),
+            end_date=WINDOW_END,
+            time=time(17, 0),
+            duration=60,
+            user_id=user_id,
+            room_id=room.id,
+            instrument_id=instrument.id,
+            recurrence_type='weekly',
+            excluded_dates=[]
+        ))
+    db.session.commit()
+
+def statements_per_request(admin_client, count_statements, url):
+    # The first request warms per-process caches and workers, so count a repeat of it
+    admin_client.get(url)
+    with count_statements() as statements:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+def test_session_list_runs_constant_queries(admin, admin_client, count_statements):
+    add_sessions(admin.id, 0, 5)
+    small_count, small = statements_per_request(admin_client, count_statements, '/api/sessions')
+
+    add_sessions(admin.id, 5, 45)
+    large_count, large = statements_per_request(admin_client, count_statements, '/api/sessions')
+
+    assert len(large) > len(small)
+    assert all(item['room_name'] and item['instrument'] for item in large)
+    assert large_count == small_count
+
+def test_session_feed_runs_constant_queries(admin, admin_client, count_statements):
+    url = f'/api/sessions?start={WINDOW_START}&end={WINDOW_END}&limit=2000'
+
+    add_sessions(admin.id, 0, 5)
+    small_count, small = statements_per_request(admin_client, count_statements, url)
+
+    add_sessions(admin.id, 5, 45)
+    large_count, large = statements_per_request(admin_client, count_statements, url)
+
+    assert len(large['sessions']) > len(small['sessions'])
+    assert all(item['room_name'] and item['instrument'] for item in large['sessions'])
+    assert large_count == small_count
+
+def test_load_session_feed_runs_constant_queries(admin, count_statements):
+    start, end = WINDOW_START.strftime('%Y-%m-%d'), WINDOW_END.strftime('%Y-%m-%d')
+    admin_id = admin.id
+
+    add_sessions(admin_id, 0, 5)
+    db.session.expunge_all()
+    with count_statements() as small:
+        small_rows, _ = load_session_feed(start, end, limit=2000)
+
+    add_sessions(admin_id, 5, 45)
+    db.session.expunge_all()
+    with count_statements() as large:
+        large_rows, _ = load_session_feed(start, end, limit=2000)
+
+    assert len(large_rows) > len(small_rows)
+    assert len(large) == len(small)